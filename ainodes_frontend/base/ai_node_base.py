@@ -7,9 +7,15 @@ from qtpy.QtWidgets import QLabel
 
 from ainodes_frontend.node_engine.node_content_widget import QDMNodeContentWidget
 from ainodes_frontend.node_engine.node_graphics_node import QDMGraphicsNode
+from ainodes_frontend.node_engine.node_lod import LOD_BOX, painter_level_of_detail
 from ainodes_frontend.node_engine.node_node import Node
 from ainodes_frontend.node_engine.node_socket import LEFT_BOTTOM, RIGHT_BOTTOM
+from ainodes_frontend.cancellation import RunCancelled
 from ainodes_frontend.node_engine.utils import dumpException
+from . import tracing
+from .headless import HeadlessContent
+from .image_cache import STATUS_ICONS_PATH, cached_image
+from .output_store import NodeOutputs, get_output_store
 from .settings import handle_ainodes_exception
 from .worker import Worker
 
@@ -38,7 +44,7 @@ class CalcGraphicsNode(QDMGraphicsNode):
         Initialize the assets (such as icons) for the graphical representation of the node.
         """
         super().initAssets()
-        self.icons = QImage("ainodes_frontend/icons/status_icons.png")
+        self.icons = cached_image(STATUS_ICONS_PATH)
 
     def paint(self, painter, QStyleOptionGraphicsItem, widget=None):
         """
@@ -51,6 +57,8 @@ class CalcGraphicsNode(QDMGraphicsNode):
         """
 
         super().paint(painter, QStyleOptionGraphicsItem, widget)
+        # status icon and thumbnail are too small to make out when zoomed out
+        if painter_level_of_detail(painter) >= LOD_BOX: return
 
         offset = 24.0
         if self.node.isDirty(): offset = 0.0
@@ -99,6 +107,19 @@ class AiNode(Node):
     GraphicsNode_class = CalcGraphicsNode
     NodeContent_class = CalcContent
     sockets = None
+    # set while a GraphScheduler owns this node's execution
+    _scheduler = None
+    # outputs may be served from the output cache when content and inputs are unchanged, set to True in nodes
+    # which are deterministic, never in nodes using random seeds, noise, webcam input or files read at eval time.
+    # On a cache hit onWorkerFinished is called again with the cached result of evalImplementation_thread
+    cacheable = False
+    _values = None
+    # the content widget is only created once the node is painted at full detail or its content is used,
+    # set to False in nodes which need their widgets right away
+    lazy_content = True
+    _content = None
+    # HeadlessContent holding the serialized values until the widget exists
+    _pending_content = None
 
     def __init__(self, scene, inputs=[2,2], outputs=[1]):
         #self.threadpool = QThreadPool()
@@ -135,22 +156,100 @@ class AiNode(Node):
         self.values = {}
         self.busy = False
         self.init_done = None
+    @property
+    def values(self) -> NodeOutputs:
+        """
+        Output values keyed by getID(index), held in the memory-budgeted output store.
+        """
+        if self._values is None:
+            self._values = NodeOutputs(get_output_store())
+        return self._values
+
+    @values.setter
+    def values(self, values):
+        # assigning replaces the contents, the mapping itself stays registered with the store
+        self.values.clear()
+        if values:
+            self._values.update(values)
+
+    @property
+    def content(self):
+        """
+        The content widget, created on first access from the UI thread. Worker threads reading the content of a
+        node whose widget does not exist yet get the serialized values as a strict HeadlessContent instead, which
+        raises on attributes it has no value for.
+        """
+        if self._pending_content is not None:
+            # widgets must never be created outside of the UI thread
+            if threading.current_thread() is not threading.main_thread():
+                return self._pending_content
+            self.materializeContent()
+        return self._content
+
+    @content.setter
+    def content(self, content):
+        self._content = content
+        self._pending_content = None
+
     def initInnerClasses(self):
         node_content_class = self.getNodeContentClass()
         graphics_node_class = self.getGraphicsNodeClass()
-        if node_content_class is not None: self.content = node_content_class(self)
+        if node_content_class is not None:
+            if self.lazy_content:
+                self._pending_content = HeadlessContent(self, strict=True)
+            else:
+                self.content = node_content_class(self)
         if graphics_node_class is not None: self.grNode = graphics_node_class(self)
         if hasattr(self, "dim"):
-            width = self.dim[0]
-            height = self.dim[1]
-            self.grNode.width = width
-            self.grNode.height = height
-            self.content.setMinimumHeight(height - 100)
-            self.content.setMinimumWidth(width)
-        self.grNode.icon = QtGui.QImage(self.icon)
-        self.grNode.thumbnail = self.grNode.icon.scaled(64, 64, QtCore.Qt.KeepAspectRatio)
+            self.grNode.width = self.dim[0]
+            self.grNode.height = self.dim[1]
+        self.grNode.icon = cached_image(self.icon)
+        self.grNode.thumbnail = cached_image(self.icon, 64, 64)
 
-        self.content.eval_signal.connect(self.evalImplementation)
+        if self._content is not None:
+            self.setupContent()
+
+    def setupContent(self):
+        """Size the content widget and connect its signals, called once the widget exists"""
+        if hasattr(self, "dim"):
+            self._content.setMinimumHeight(self.dim[1] - 100)
+            self._content.setMinimumWidth(self.dim[0])
+        self._content.eval_signal.connect(self.evalImplementation)
+        self._content.mark_dirty_signal.connect(self.onContentChanged)
+
+    def isContentMaterialized(self) -> bool:
+        return self._pending_content is None
+
+    def materializeContent(self):
+        """
+        Create the content widget of a lazily built node and restore the values it was loaded with.
+
+        Returns:
+            QDMNodeContentWidget: The content widget.
+        """
+        pending = self._pending_content
+        if pending is None:
+            return self._content
+        self._pending_content = None
+        self._content = self.getNodeContentClass()(self)
+        # restored before the signals are connected, showing a node is not an edit
+        if pending.values:
+            self._content.deserialize(pending.values)
+        self.setupContent()
+        if self.grNode is not None:
+            self.grNode.attachContent()
+            self.grNode.setLevelOfDetail(self.scene.grScene.lod)
+        return self._content
+
+    def serializeContent(self) -> dict:
+        if self._pending_content is not None:
+            return self._pending_content.serialize()
+        return super().serializeContent()
+
+    def deserializeContent(self, data: dict, hashmap: dict = {}) -> bool:
+        if self._pending_content is not None:
+            return self._pending_content.deserialize(data, hashmap)
+        return super().deserializeContent(data, hashmap)
 
     def set_socket_names(self):
         """
@@ -240,12 +339,10 @@ class AiNode(Node):
         :rtype: Any or None
         """
         try:
-            if len(self.getInputs(index)) > 0:
-                node, index = self.getInput(index)
-                data = node.getOutput(index)
-                return data
-            else:
+            socket = self.scene.adjacency.firstInput(self, index)
+            if socket is None:
                 return None
+            return socket.node.getOutput(socket.index)
         except Exception as e:
             done = handle_ainodes_exception()
 
@@ -294,6 +391,10 @@ class AiNode(Node):
         if gs.should_run:
             if not self.busy:
                 self.busy = True
+                # evalImplementation_thread reads the widgets of this node and its inputs, create them here on the
+                # UI thread
+                self.materializeContent()
+                for parent in self.scene.adjacency.parents(self): parent.materializeContent()
                 worker = Worker(self.evalImplementationThreadHandler)
                 worker.signals.result.connect(self.onWorkerFinished)
                 self.scene.threadpool.start(worker)
@@ -313,12 +414,28 @@ class AiNode(Node):
         else:
             return"""
 
-    def evalImplementationThreadHandler(self, *args, **kwargs):
+    def evalImplementationThreadHandler(self, *args, raise_errors=False, **kwargs):
+        if tracing.TRACER is not None:
+            return tracing.TRACER.traceNode(self, lambda: self.evalImplementationGuarded(raise_errors))
+        return self.evalImplementationGuarded(raise_errors)
+
+    def evalImplementationGuarded(self, raise_errors=False):
+        """
+        Run evalImplementation_thread, turning exceptions into an error log entry and a None result.
+
+        Args:
+            raise_errors (bool): Re-raise after logging, so executors can tell a failed node from a node returning None.
+        """
         try:
             result = self.evalImplementation_thread()
             return result
+        except RunCancelled:
+            print(f"Run cancelled during {self.title}")
+            if raise_errors: raise
+            return None
         except:
             handle_ainodes_exception()
+            if raise_errors: raise
             return None
 
     #@QtCore.Slot()
@@ -329,6 +446,18 @@ class AiNode(Node):
 
         self.busy = False
         self.markDirty(False)
+        self.setOutputsFromResult(result)
+
+        if hasattr(self, "exec_port"):
+            if len(self.getOutputs(self.exec_port)) > 0:
+                self.executeChild(output_index=self.exec_port)
+    def setOutputsFromResult(self, result):
+        """
+        Store the result returned by evalImplementation_thread on the ports listed in output_data_ports.
+
+        Args:
+            result: The value returned by evalImplementation_thread, indexed in the order of output_data_ports.
+        """
         if result:
             if hasattr(self, "output_data_ports"):
                 x = 0
@@ -339,9 +468,13 @@ class AiNode(Node):
                     self.setOutput(port, result[x])
                     x += 1
 
-        if hasattr(self, "exec_port"):
-            if len(self.getOutputs(self.exec_port)) > 0:
-                self.executeChild(output_index=self.exec_port)
+    def initHeadless(self):
+        """
+        Called instead of __init__ when the node is created by the headless executor, without graphics or widgets.
+        Override in your custom node pack to set up any state evalImplementation_thread relies on.
+        """
+        pass
+
     def eval(self, index=0):
         try:
             self.content.eval_signal.emit()
@@ -377,7 +510,8 @@ class AiNode(Node):
 
     def executeChild(self, output_index=0):
         """
-        Execute the child node connected to the output socket with the given index.
+        Execute the child nodes connected to the output socket with the given index.
+        Does nothing while a GraphScheduler runs this node, the scheduler dispatches the children itself.
 
         Args:
             output_index (int): The index of the output socket. Defaults to 0.
@@ -385,9 +519,10 @@ class AiNode(Node):
         Returns:
             None
         """
-        if len(self.getOutputs(output_index)) > 0:
+        if self._scheduler is not None:
+            return
+        for node in self.getOutputs(output_index):
             try:
-                node = self.getOutputs(output_index)[0]
                 #node.markDirty(True)
                 node.eval()
             except Exception as e:
@@ -401,7 +536,8 @@ class AiNode(Node):
             socket: The input socket that changed.
         """
         print("%s::__onInputChanged" % self.__class__.__name__)
-        #self.markDirty(True)
+        self.markDirty(True)
+        self.markDescendantsDirty()
 
     def update_vars(self, data):
 
@@ -656,12 +792,10 @@ class AiDummyNode(Node):
         :rtype: Any or None
         """
         try:
-            if len(self.getInputs(index)) > 0:
-                node, index = self.getInput(index)
-                data = node.getOutput(index)
-                return data
-            else:
+            socket = self.scene.adjacency.firstInput(self, index)
+            if socket is None:
                 return None
+            return socket.node.getOutput(socket.index)
         except Exception as e:
             done = handle_ainodes_exception()
 
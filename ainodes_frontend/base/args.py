@@ -35,5 +35,12 @@ def get_args():
     parser.add_argument('--disable_shader_disk_cache', action='store_true',
                         help='Disables the caching of compiled shader programs to disk')
 
+    parser.add_argument('--trace', type=str, default=None, metavar="PATH",
+                        help='Records node execution and writes a Chrome trace json to PATH on exit')
+    parser.add_argument('--headless', type=str, default=None, metavar="GRAPH",
+                        help='Runs the given graph json without the UI and exits')
+    parser.add_argument('--eager_nodes', action='store_true',
+                        help='Imports every node module at startup instead of listing unchanged ones from the node manifest')
+
     args = parser.parse_args()
     return args
@@ -0,0 +1,266 @@
+"""
+Periodic autosave and crash recovery.
+
+Every ``autosave_interval_s`` the graphs which changed since their last snapshot are serialized on the UI thread,
+that is the only part done there. Dumping, compressing and writing the snapshot happens on a single background
+thread, so a slow disk never stalls the editor.
+
+Each session writes gzip compressed json snapshots into its own directory under ``autosave_dir`` and keeps the newest
+``autosave_keep`` of every graph, together with an ``index.json`` naming the file each graph came from. A running
+session holds a lock on ``session.lock`` in its directory, which the operating system releases when the process
+dies. A clean exit removes the session directory, so any unlocked session directory left behind belongs to a run
+which crashed or was killed; File > Recover Autosaved Graphs opens its newest snapshots.
+"""
+import gzip
+import json
+import os
+import re
+import shutil
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from qtpy.QtCore import QObject, QTimer
+
+from ainodes_frontend import singleton as gs
+from ainodes_frontend.node_engine.utils import dumpException
+
+DEBUG = False
+
+INDEX_FILENAME = "index.json"
+LOCK_FILENAME = "session.lock"
+RECOVERED_DIRNAME = "recovered"
+SNAPSHOT_EXTENSION = ".json.gz"
+# recovered sessions kept around in case a recovery has to be repeated
+KEEP_RECOVERED_SESSIONS = 5
+
+
+def snapshot_key(scene: 'Scene', filename: str = None) -> str:
+    """File name safe name of a graph's snapshots, stable for the lifetime of the scene"""
+    name = os.path.splitext(os.path.basename(filename))[0] if filename else "untitled"
+    return "%s_%s" % (re.sub(r"[^\w\-]+", "_", name)[:64], scene.id)
+
+
+def write_snapshot(directory: str, key: str, data: dict, source: str, keep: int):
+    """
+    Compress and write one snapshot, then drop the oldest ones of the same graph. Runs on the autosave thread.
+
+    Args:
+        directory (str): Session directory.
+        key (str): Graph name from :func:`snapshot_key`.
+        data (dict): ``Scene.serialize()`` snapshot.
+        source (str): File the graph was loaded from or saved to, None for new graphs.
+        keep (int): Number of snapshots kept per graph.
+    """
+    os.makedirs(directory, exist_ok=True)
+    saved_at = time.time()
+    path = os.path.join(directory, "%s.%d%s" % (key, saved_at * 1000, SNAPSHOT_EXTENSION))
+    temp_path = path + ".tmp"
+    with gzip.open(temp_path, "wt", encoding="utf-8", compresslevel=6) as file:
+        json.dump(data, file, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+    snapshots = sorted(name for name in os.listdir(directory)
+                       if name.startswith(key + ".") and name.endswith(SNAPSHOT_EXTENSION))
+    for name in snapshots[:-keep]:
+        os.remove(os.path.join(directory, name))
+
+    index = read_index(directory)
+    index[key] = {'source': source, 'snapshot': os.path.basename(path), 'saved_at': saved_at}
+    temp_index = os.path.join(directory, INDEX_FILENAME + ".tmp")
+    with open(temp_index, "w", encoding="utf-8") as file:
+        file.write(json.dumps(index, indent=2))
+    os.replace(temp_index, os.path.join(directory, INDEX_FILENAME))
+    if DEBUG: print("Autosave: wrote", path)
+
+
+def read_index(directory: str) -> dict:
+    try:
+        with open(os.path.join(directory, INDEX_FILENAME), "r", encoding="utf-8") as file:
+            return json.loads(file.read())
+    except (OSError, ValueError):
+        return {}
+
+
+def lock_session(directory: str):
+    """
+    Lock a session directory for the lifetime of this process.
+
+    Returns:
+        file: The open lock file, the lock is held until :func:`unlock_session`, None if another process holds it.
+    """
+    os.makedirs(directory, exist_ok=True)
+    file = open(os.path.join(directory, LOCK_FILENAME), "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        file.close()
+        return None
+    return file
+
+
+def unlock_session(file):
+    try:
+        if os.name == "nt":
+            import msvcrt
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    finally:
+        file.close()
+
+
+def is_session_running(directory: str) -> bool:
+    """Is the session directory locked by a running instance?"""
+    if not os.path.isfile(os.path.join(directory, LOCK_FILENAME)):
+        return False
+    file = lock_session(directory)
+    if file is None:
+        return True
+    unlock_session(file)
+    return False
+
+
+def find_recoverable_sessions(autosave_dir: str, exclude: str = None) -> list:
+    """
+    Session directories left behind by runs which did not exit cleanly, newest first.
+
+    Returns:
+        list: (session directory, index) pairs of sessions holding at least one snapshot.
+    """
+    if not os.path.isdir(autosave_dir):
+        return []
+    sessions = []
+    for name in os.listdir(autosave_dir):
+        directory = os.path.join(autosave_dir, name)
+        if name == RECOVERED_DIRNAME or not os.path.isdir(directory):
+            continue
+        if exclude is not None and os.path.abspath(directory) == os.path.abspath(exclude):
+            continue
+        # the live session of another instance
+        if is_session_running(directory):
+            continue
+        index = {key: entry for key, entry in read_index(directory).items()
+                 if os.path.isfile(os.path.join(directory, entry['snapshot']))}
+        if index:
+            sessions.append((directory, index))
+    sessions.sort(key=lambda session: max(entry['saved_at'] for entry in session[1].values()), reverse=True)
+    return sessions
+
+
+class Autosave(QObject):
+    """
+    Snapshots modified graphs on a timer.
+
+    Args:
+        scenes (function): Returns the ``(scene, filename)`` pairs of the open graphs.
+        interval_s (int): Seconds between two autosaves.
+        directory (str): Directory holding the session directories.
+        keep (int): Snapshots kept per graph.
+    """
+
+    def __init__(self, scenes, interval_s: int = 60, directory: str = "cache/recovery", keep: int = 5):
+        super().__init__()
+        self.scenes = scenes
+        self.keep = max(1, keep)
+        self.directory = directory
+        self.session_dir = os.path.join(directory, "%s_%d" % (time.strftime("%Y%m%d_%H%M%S"), os.getpid()))
+        # the history stamp each scene was at when it was last snapshotted
+        self.snapshotted = weakref.WeakKeyDictionary()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autosave")
+        self.pending = None
+        self.lock_file = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(interval_s * 1000))
+        self.timer.timeout.connect(self.autosave)
+
+    def start(self):
+        self.lock_file = lock_session(self.session_dir)
+        self.timer.start()
+
+    def needsSnapshot(self, scene: 'Scene') -> bool:
+        if not scene.has_been_modified or scene.isLoading():
+            return False
+        return self.snapshotted.get(scene) is not self.currentStamp(scene)
+
+    @staticmethod
+    def currentStamp(scene: 'Scene'):
+        history = scene.history
+        if 0 <= history.history_current_step < len(history.history_stack):
+            return history.history_stack[history.history_current_step]
+        return None
+
+    def autosave(self):
+        # a snapshot still being written means the disk is slow, skip this round rather than queueing up
+        if self.pending is not None and not self.pending.done():
+            return
+        for scene, filename in self.scenes():
+            if not self.needsSnapshot(scene):
+                continue
+            try:
+                data = scene.serialize()
+            except Exception as e:
+                dumpException(e)
+                continue
+            self.snapshotted[scene] = self.currentStamp(scene)
+            self.pending = self.executor.submit(write_snapshot, self.session_dir, snapshot_key(scene, filename),
+                                                data, filename, self.keep)
+            self.pending.add_done_callback(self.onWritten)
+
+    def onWritten(self, future):
+        error = future.exception()
+        if error is not None:
+            print("Autosave failed:", error)
+
+    def recover(self, session_dir: str) -> list:
+        """
+        Move a crashed session out of the way and return its newest snapshots.
+
+        Returns:
+            list: (snapshot path, source filename) pairs.
+        """
+        if is_session_running(session_dir):
+            raise OSError("%s belongs to a running instance" % session_dir)
+        recovered_dir = os.path.join(self.directory, RECOVERED_DIRNAME)
+        os.makedirs(recovered_dir, exist_ok=True)
+        target = os.path.join(recovered_dir, os.path.basename(session_dir))
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(session_dir, target)
+
+        sessions = sorted(os.listdir(recovered_dir))
+        for name in sessions[:-KEEP_RECOVERED_SESSIONS]:
+            shutil.rmtree(os.path.join(recovered_dir, name), ignore_errors=True)
+
+        index = read_index(target)
+        return [(os.path.join(target, entry['snapshot']), entry['source']) for entry in index.values()]
+
+    def stop(self):
+        """Clean exit, waits for the snapshot being written and removes this session's snapshots"""
+        self.timer.stop()
+        self.executor.shutdown(wait=True)
+        if self.lock_file is not None:
+            unlock_session(self.lock_file)
+            self.lock_file = None
+        shutil.rmtree(self.session_dir, ignore_errors=True)
+
+
+def create_autosave(scenes):
+    """
+    Returns a started :class:`Autosave` configured from the settings, or None if ``autosave_interval_s`` is 0.
+    """
+    interval_s = getattr(gs, "autosave_interval_s", 60)
+    if not interval_s:
+        return None
+    autosave = Autosave(scenes, interval_s=interval_s,
+                        directory=getattr(gs, "autosave_dir", "cache/recovery"),
+                        keep=getattr(gs, "autosave_keep", 5))
+    autosave.start()
+    return autosave
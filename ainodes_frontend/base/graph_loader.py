@@ -0,0 +1,219 @@
+"""
+Background graph loading.
+
+Opening a graph happens in two phases:
+
+1. :func:`parse_graph_file` runs on a :class:`~ainodes_frontend.base.worker.Worker`. It reads and decodes the file
+   (JSON or binary ``.aigraph``) and builds the edge map, dropping edges whose sockets do not exist in the file.
+2. :class:`GraphLoader` resolves the class of every node and builds the nodes and edges on the UI thread in time
+   slices of ``slice_ms``, so the window keeps repainting and the view can be panned and zoomed while a large graph
+   materializes. Resolving a lazily registered node class imports its module, which must not happen on a worker.
+
+While a loader is attached to a scene, :meth:`~node_engine.node_scene.Scene.isLoading` is ``True``; the view only
+lets the user pan and zoom, and no history stamps are scheduled.
+"""
+import gzip
+import json
+import os
+import time
+
+from qtpy.QtCore import QObject, QTimer, Signal
+
+from ainodes_frontend.base.node_config import OpCodeNotRegistered
+from ainodes_frontend.base.worker import Worker
+from ainodes_frontend.node_engine.node_edge import Edge
+from ainodes_frontend.node_engine.node_graph_binary import InvalidBinaryGraph, is_binary_graph, load_graph
+from ainodes_frontend.node_engine.node_scene import InvalidFile
+from ainodes_frontend.node_engine.utils import dumpException
+
+DEBUG = False
+
+
+class ParsedGraph:
+    """
+    Result of :func:`parse_graph_file`, everything the UI thread needs to build the scene.
+
+    Args:
+        filename (str): The parsed file.
+        scene_data (dict): Serialized scene without its nodes and edges.
+        nodes (list): Serialized nodes in file order.
+        edges (list): Serialized edges whose both sockets belong to a parsed node.
+        skipped_edges (int): Number of edges dropped from the edge map.
+    """
+
+    def __init__(self, filename: str, scene_data: dict, nodes: list, edges: list, skipped_edges: int):
+        self.filename = filename
+        self.scene_data = scene_data
+        self.nodes = nodes
+        self.edges = edges
+        # node data of nodes whose class is not registered, filled while building
+        self.missing = []
+        self.skipped_edges = skipped_edges
+
+    def __len__(self):
+        return len(self.nodes) + len(self.edges)
+
+
+def is_gzip_file(filename: str) -> bool:
+    with open(filename, "rb") as file:
+        return file.read(2) == b"\x1f\x8b"
+
+
+def read_graph_file(filename: str) -> dict:
+    """
+    Read a JSON, gzip compressed JSON (autosave snapshots) or binary graph file into ``Scene.serialize()`` data.
+
+    Raises:
+        InvalidFile: If the file cannot be decoded.
+    """
+    try:
+        if is_binary_graph(filename):
+            return load_graph(filename)
+        if is_gzip_file(filename):
+            with gzip.open(filename, "rt", encoding="utf-8") as file:
+                return json.loads(file.read())
+        with open(filename, "r", encoding="utf-8") as file:
+            return json.loads(file.read())
+    except (json.JSONDecodeError, gzip.BadGzipFile, EOFError):
+        raise InvalidFile("%s is not a valid JSON file" % os.path.basename(filename))
+    except InvalidBinaryGraph as e:
+        raise InvalidFile("%s is not a valid graph file: %s" % (os.path.basename(filename), e))
+
+
+def parse_graph_file(filename: str) -> ParsedGraph:
+    """
+    Decode a graph file and resolve everything that does not touch Qt objects or the node registry. Runs on a
+    worker thread.
+
+    Args:
+        filename (str): Graph file to read.
+
+    Returns:
+        ParsedGraph: The parsed graph.
+    """
+    data = read_graph_file(filename)
+    scene_data = {key: value for key, value in data.items() if key not in ('nodes', 'edges')}
+
+    nodes = data.get('nodes', [])
+    socket_ids = set()
+    for node_data in nodes:
+        socket_ids.update(socket_data['id'] for socket_data in node_data.get('inputs', []))
+        socket_ids.update(socket_data['id'] for socket_data in node_data.get('outputs', []))
+
+    edges = []
+    skipped_edges = 0
+    for edge_data in data.get('edges', []):
+        if edge_data.get('start') in socket_ids and edge_data.get('end') in socket_ids:
+            edges.append(edge_data)
+        else:
+            skipped_edges += 1
+
+    if DEBUG: print("GraphLoader: parsed", len(nodes), "nodes,", len(edges), "edges,", skipped_edges, "edges skipped")
+    return ParsedGraph(filename, scene_data, nodes, edges, skipped_edges)
+
+
+class GraphLoader(QObject):
+    """
+    Loads a graph file into a scene without blocking the UI thread.
+
+    Args:
+        scene (Scene): Scene to load into, it is cleared first.
+        filename (str): Graph file to load.
+        class_selector (function): Returns the node class for serialized node data,
+            ``CalculatorSubWindow.getNodeClassFromData``. Called on the UI thread.
+        slice_ms (int): How long a single construction slice may run before control returns to the event loop.
+    """
+
+    progress = Signal(int, int)
+    # succeeded, error message
+    finished = Signal(bool, str)
+
+    def __init__(self, scene: 'Scene', filename: str, class_selector, slice_ms: int = 12):
+        super().__init__()
+        self.scene = scene
+        self.filename = filename
+        self.class_selector = class_selector
+        self.slice_ms = slice_ms
+        self.parsed = None
+        self.hashmap = {}
+        self.built = 0
+        self.cancelled = False
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.buildSlice)
+
+    def start(self):
+        self.scene.clear()
+        self.scene.loader = self
+        worker = Worker(parse_graph_file, False, self.filename)
+        worker.signals.result.connect(self.onParsed)
+        worker.signals.error.connect(self.onParseError)
+        self.scene.threadpool.start(worker)
+
+    def cancel(self):
+        """Stop building, whatever was built so far stays in the scene"""
+        self.cancelled = True
+        self.timer.stop()
+        self.detach()
+
+    def detach(self):
+        if self.scene.loader is self:
+            self.scene.loader = None
+
+    def onParseError(self, error: tuple):
+        self.detach()
+        if self.cancelled: return
+        exctype, value, formatted = error
+        self.finished.emit(False, str(value))
+
+    def onParsed(self, parsed: ParsedGraph):
+        if self.cancelled: return
+        self.parsed = parsed
+        if 'id' in parsed.scene_data:
+            self.scene.id = parsed.scene_data['id']
+        self.progress.emit(0, len(parsed))
+        self.timer.start()
+
+    def buildSlice(self):
+        deadline = time.perf_counter() + self.slice_ms / 1000
+        parsed = self.parsed
+        try:
+            while self.built < len(parsed) and time.perf_counter() < deadline:
+                if self.built < len(parsed.nodes):
+                    self.buildNode(parsed.nodes[self.built])
+                else:
+                    self.buildEdge(parsed.edges[self.built - len(parsed.nodes)])
+                self.built += 1
+        except Exception as e:
+            dumpException(e)
+            self.timer.stop()
+            self.detach()
+            self.finished.emit(False, str(e))
+            return
+
+        self.progress.emit(self.built, len(parsed))
+        if self.built >= len(parsed):
+            self.timer.stop()
+            self.detach()
+            if parsed.missing:
+                print("Graph %s uses node types which are not installed: %s" % (
+                    os.path.basename(parsed.filename),
+                    ", ".join(sorted({node_data.get('content_label_objname', '?') for node_data in parsed.missing}))))
+            self.finished.emit(True, "")
+
+    def buildNode(self, node_data: dict):
+        try:
+            node_class = self.class_selector(node_data)
+        except (KeyError, OpCodeNotRegistered):
+            # its edges are skipped in buildEdge, the sockets never make it into the hashmap
+            self.parsed.missing.append(node_data)
+            return
+        node = node_class(self.scene)
+        self.scene.deserializeNode(node_data, self.hashmap, True, node)
+
+    def buildEdge(self, edge_data: dict):
+        start, end = self.hashmap.get(edge_data['start']), self.hashmap.get(edge_data['end'])
+        # a node of the edge failed to deserialize
+        if start is None or end is None: return
+        if start.node not in self.scene.nodes or end.node not in self.scene.nodes: return
+        Edge(self.scene).deserialize(edge_data, self.hashmap, True)
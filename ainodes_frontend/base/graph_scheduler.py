@@ -0,0 +1,208 @@
+"""
+Dependency driven scheduling of scene nodes.
+
+Instead of the serial ``executeChild`` chain, :class:`GraphScheduler` looks at the edges of the scene, computes how
+many upstream nodes every node waits for, and dispatches all nodes whose inputs are ready onto
+``scene.threadpool`` at once. Independent branches (e.g. two conditioning nodes feeding one sampler) therefore run
+concurrently, and a node with several inputs only starts once every one of them has finished (the join point).
+"""
+from functools import partial
+
+from ainodes_frontend import singleton as gs
+from ainodes_frontend.cancellation import CancellationToken, activate, release_memory
+from ainodes_frontend.base.output_cache import get_output_cache, is_cacheable, node_cache_key, cache_entry, \
+    cached_result, restore_outputs
+from ainodes_frontend.base.worker import Worker
+
+DEBUG = False
+
+
+class GraphScheduler:
+    """
+    Runs a set of scene nodes in topological order, in parallel where the graph allows it.
+
+    While a node is owned by a scheduler its ``executeChild`` does nothing, as the scheduler dispatches the
+    downstream nodes itself.
+
+    :param scene: scene holding the nodes, its ``threadpool`` is used to run them
+    :param nodes: nodes to run, defaults to every node in the scene. Upstream nodes outside of this set are treated
+        as already evaluated and their current ``values`` are reused.
+
+    Every run owns a :class:`~ainodes_frontend.cancellation.CancellationToken`, active on the threads evaluating
+    its nodes, so :meth:`cancel` interrupts samplers between steps without touching other runs.
+
+    A node raising an exception is marked invalid and left dirty, the nodes depending on it are not run.
+    """
+
+    def __init__(self, scene, nodes: list = None):
+        self.scene = scene
+        self.nodes = list(scene.nodes if nodes is None else nodes)
+        self.pending = {}
+        self.children = {}
+        self.running = set()
+        self.finished = []
+        self.failed = []
+        self.skipped = set()
+        self.is_running = False
+        self._dispatching = 0
+        self._finished_listeners = []
+        self.cache = get_output_cache()
+        self.cache_keys = {}
+        self.cache_hits = []
+        self.token = CancellationToken()
+        self.buildDependencies()
+
+    def addFinishedListener(self, callback: 'function'):
+        """Register callback for when every scheduled node has finished"""
+        self._finished_listeners.append(callback)
+
+    def buildDependencies(self):
+        scheduled = set(self.nodes)
+        self.pending = {node: 0 for node in self.nodes}
+        self.children = {node: [] for node in self.nodes}
+        adjacency = self.scene.adjacency
+        for node in self.nodes:
+            parents = {parent for parent in adjacency.parents(node) if parent in scheduled and parent is not node}
+            for parent in parents:
+                self.children[parent].append(node)
+            self.pending[node] = len(parents)
+
+    def cacheKey(self, node) -> str:
+        if node not in self.cache_keys:
+            self.cache_keys[node] = node_cache_key(node, self.cacheKey)
+        return self.cache_keys[node]
+
+    def restoreFromCache(self, node) -> bool:
+        entry = self.cache.get(self.cacheKey(node))
+        if not entry:
+            return False
+        if DEBUG: print("GraphScheduler: cached outputs for", node)
+        restore_outputs(node, entry)
+        # the node's finish hook updates previews, labels etc. just like after an evaluation
+        node._scheduler = self
+        node.markInvalid(False)
+        node.onWorkerFinished(cached_result(entry))
+        node._scheduler = None
+        node.markDirty(False)
+        self.cache_hits.append(node)
+        return True
+
+    def run(self):
+        """Dispatch every node which does not wait for any other node"""
+        self.is_running = True
+        self.materializeNodes()
+        ready = [node for node, count in self.pending.items() if count == 0]
+        self.dispatchAll(ready)
+
+    def materializeNodes(self):
+        """
+        Create the content widgets of every scheduled node and of the nodes they read inputs from, on the UI thread.
+        Cache hits run their finish hook with the widgets too, and nodes read the content of their upstream nodes.
+        """
+        adjacency = self.scene.adjacency
+        for node in self.nodes:
+            node.materializeContent()
+            for parent in adjacency.parents(node): parent.materializeContent()
+
+    def dispatchAll(self, nodes: list):
+        # completion is only checked once the whole batch is out, so instantly finishing nodes can't end the run
+        self._dispatching += 1
+        for node in nodes:
+            self.dispatch(node)
+        self._dispatching -= 1
+        self.checkFinished()
+
+    def cancel(self):
+        """Stop this run, the node currently evaluating is interrupted at its next cancellation check"""
+        if self.is_running:
+            print("Cancelling run")
+            self.token.cancel()
+
+    def evalNode(self, node):
+        with activate(self.token):
+            return node.evalImplementationThreadHandler(raise_errors=True)
+
+    def dispatch(self, node):
+        if not gs.should_run or self.token.is_cancelled:
+            if DEBUG: print("GraphScheduler: stopped before", node)
+            return
+        if not hasattr(node, "evalImplementationThreadHandler"):
+            # plain Nodes (backdrops etc.) have nothing to evaluate
+            self.onNodeFinished(node, None)
+            return
+        if self.cache is not None and is_cacheable(node) and self.restoreFromCache(node):
+            self.onNodeFinished(node, None)
+            return
+
+        if DEBUG: print("GraphScheduler: dispatching", node)
+        node.busy = True
+        node._scheduler = self
+        self.running.add(node)
+        worker = Worker(partial(self.evalNode, node))
+        worker.signals.result.connect(partial(self.onNodeResult, node))
+        worker.signals.error.connect(partial(self.onNodeError, node))
+        self.scene.threadpool.start(worker)
+
+    def onNodeResult(self, node, result):
+        node.markInvalid(False)
+        node.onWorkerFinished(result)
+        if self.cache is not None and is_cacheable(node) and not self.token.is_cancelled:
+            # only a result produced in this run is cached, never values left over from an earlier one
+            entry = cache_entry(node, result)
+            if entry: self.cache.put(self.cacheKey(node), entry)
+        self.onNodeFinished(node, result)
+
+    def onNodeError(self, node, error):
+        node.busy = False
+        if self.token.is_cancelled:
+            self.onNodeFinished(node, None)
+            return
+        # the node stays dirty so the next Run Dirty retries it, its descendants are not run on missing inputs
+        print("GraphScheduler: %s failed, skipping the nodes depending on it" % node.title)
+        node.markInvalid()
+        node.markDirty()
+        node._scheduler = None
+        self.running.discard(node)
+        self.failed.append(node)
+        self.skipDescendants(node)
+        self.checkFinished()
+
+    def skipDescendants(self, node):
+        stack = list(self.children.get(node, []))
+        while stack:
+            child = stack.pop()
+            if child in self.skipped: continue
+            self.skipped.add(child)
+            child.markDirty()
+            stack.extend(self.children.get(child, []))
+
+    def onNodeFinished(self, node, result):
+        if self.token.is_cancelled and node in self.running:
+            # whatever the interrupted node produced is incomplete
+            node.values = {}
+            node.markDirty()
+        node._scheduler = None
+        self.running.discard(node)
+        self.finished.append(node)
+        ready = []
+        for child in self.children.get(node, []):
+            self.pending[child] -= 1
+            if self.pending[child] == 0:
+                ready.append(child)
+        self.dispatchAll(ready)
+
+    def checkFinished(self):
+        if self.is_running and not self.running and not self._dispatching:
+            waiting = [node for node, count in self.pending.items() if count > 0 and node not in self.skipped]
+            if self.failed:
+                print("GraphScheduler: %d node(s) failed, %d node(s) depending on them were skipped"
+                      % (len(self.failed), len(self.skipped)))
+            if self.token.is_cancelled:
+                release_memory()
+            elif waiting and gs.should_run:
+                print("GraphScheduler: %d node(s) were never ready, the graph contains a cycle" % len(waiting))
+            self.onAllFinished()
+
+    def onAllFinished(self):
+        self.is_running = False
+        for callback in self._finished_listeners: callback()
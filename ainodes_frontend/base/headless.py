@@ -0,0 +1,423 @@
+"""
+Headless execution of saved graphs.
+
+Graphs stored in the ``Scene.serialize()`` format are turned into a lightweight DAG of node runtimes and executed
+in topological order by calling each node's ``evalImplementation_thread`` directly. No ``QApplication``,
+``QGraphicsScene``, graphics node or content widget is ever created, which makes this suitable for batch servers.
+
+Node runtimes are real instances of the registered node classes, created without running ``__init__``. Their
+sockets and edges are plain python stand-ins, so the regular traversal helpers (``getInputs``, ``getInput``,
+``getInputData``, ``getOutput``...) work unchanged. Widget reads inside ``evalImplementation_thread`` are answered
+from the serialized content values by :class:`HeadlessContent`. Nodes which set up extra state in ``__init__``
+can override ``AiNode.initHeadless`` to do the same without widgets.
+"""
+import json
+import re
+from collections import OrderedDict, deque
+
+from ainodes_frontend import singleton as gs
+from ainodes_frontend.cancellation import CancellationToken, RunCancelled, activate, release_memory
+from ainodes_frontend.base.node_config import get_class_from_content_label_objname
+from ainodes_frontend.node_engine.node_adjacency import AdjacencyIndex
+from ainodes_frontend.node_engine.node_graph_binary import is_binary_graph, load_graph
+from ainodes_frontend.base.output_cache import get_output_cache, is_cacheable, node_cache_key, cache_entry, \
+    cached_result, restore_outputs
+
+DEBUG = False
+
+
+class HeadlessGraphError(Exception): pass
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r'[^a-z0-9]', '', str(name).lower())
+
+
+class _Noop:
+    """Absorbs signal emits, connects and any other widget call a node makes purely for UI purposes"""
+    def __call__(self, *args, **kwargs):
+        return None
+
+    def __getattr__(self, name):
+        return self
+
+
+_NOOP = _Noop()
+
+
+class HeadlessWidget:
+    """Stand-in for a content widget answering the usual getters from a serialized value"""
+
+    def __init__(self, value=None):
+        self._value = value
+
+    def text(self):
+        return "" if self._value is None else str(self._value)
+
+    currentText = text
+    toPlainText = text
+
+    def value(self):
+        if isinstance(self._value, (int, float)):
+            return self._value
+        try:
+            return int(self._value)
+        except (TypeError, ValueError):
+            try:
+                return float(self._value)
+            except (TypeError, ValueError):
+                return 0
+
+    def isChecked(self):
+        return self._value in (True, "True", "true", 1, "1")
+
+    def setValue(self, value):
+        self._value = value
+
+    setText = setValue
+    setPlainText = setValue
+    setCurrentText = setValue
+    setChecked = setValue
+
+    def __getattr__(self, name):
+        return _NOOP
+
+
+class HeadlessContent:
+    """
+    Replacement for :class:`~ainodes_frontend.node_engine.node_content_widget.QDMNodeContentWidget` which keeps the
+    serialized values in a plain ``dict``.
+
+    Content widgets are serialized by their `objectName` (usually the label text, e.g. ``"Steps"``) while node code
+    reads them by attribute (e.g. ``self.content.steps``). Attributes are resolved by exact name first, then by
+    normalized name (lower case, alphanumerics only), then by the longest serialized name the attribute starts with,
+    so ``model_dropdown`` resolves to ``"Model:"``.
+
+    Unresolved attributes return a no-op stand-in, unless ``strict`` is set, then they raise ``AttributeError``.
+    """
+
+    def __init__(self, node, values: dict = None, strict: bool = False):
+        self.node = node
+        self.values = dict(values) if values else {}
+        self.strict = strict
+        self._widgets = {}
+        self._normalized = {_normalize(key): key for key in self.values}
+
+    def resolveKey(self, name: str):
+        if name in self.values:
+            return name
+        normalized = _normalize(name)
+        if normalized in self._normalized:
+            return self._normalized[normalized]
+        candidates = [key for key in self._normalized if key and normalized.startswith(key)]
+        if candidates:
+            return self._normalized[max(candidates, key=len)]
+        return None
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        widgets = self.__dict__['_widgets']
+        if name not in widgets:
+            key = self.resolveKey(name)
+            if key is None:
+                if self.__dict__['strict']:
+                    raise AttributeError("HeadlessContent: no serialized value for '%s' on %s, the content widget "
+                                         "was not created before the node ran" % (name, self.node))
+                if DEBUG: print("HeadlessContent: no serialized value for", name, "on", self.node)
+                return _NOOP
+            widgets[name] = HeadlessWidget(self.values[key])
+        return widgets[name]
+
+    def serialize(self) -> dict:
+        return dict(self.values)
+
+    def deserialize(self, data: dict, hashmap: dict = {}, restore_id: bool = True) -> bool:
+        self.values.update(data)
+        self._normalized = {_normalize(key): key for key in self.values}
+        self._widgets = {}
+        return True
+
+
+class HeadlessSocket:
+    """Plain python socket exposing what :class:`~ainodes_frontend.node_engine.node_node.Node` traversal needs"""
+
+    def __init__(self, node, data: dict, is_input: bool):
+        self.node = node
+        self.id = data['id']
+        self.index = data['index']
+        self.position = data['position']
+        self.socket_type = data['socket_type']
+        self.is_multi_edges = data.get('multi_edges', True)
+        self.is_input = is_input
+        self.is_output = not is_input
+        self.edges = []
+
+    def addEdge(self, edge):
+        self.edges.append(edge)
+
+    def removeEdge(self, edge):
+        if edge in self.edges: self.edges.remove(edge)
+
+    def hasAnyEdge(self) -> bool:
+        return len(self.edges) > 0
+
+
+class HeadlessEdge:
+    def __init__(self, data: dict, start_socket: HeadlessSocket, end_socket: HeadlessSocket):
+        self.id = data['id']
+        self.edge_type = data.get('edge_type', 2)
+        self.start_socket = start_socket
+        self.end_socket = end_socket
+        start_socket.addEdge(self)
+        end_socket.addEdge(self)
+
+    def getOtherSocket(self, known_socket: HeadlessSocket) -> HeadlessSocket:
+        return self.start_socket if known_socket == self.end_socket else self.end_socket
+
+    @property
+    def output_socket(self) -> HeadlessSocket:
+        return self.start_socket if self.start_socket.is_output else self.end_socket
+
+    @property
+    def input_socket(self) -> HeadlessSocket:
+        return self.end_socket if self.start_socket.is_output else self.start_socket
+
+
+class HeadlessScene:
+    """Minimal scene the node runtimes are attached to"""
+
+    def __init__(self):
+        self.nodes = []
+        self.edges = []
+        self.threadpool = None
+        self.adjacency = AdjacencyIndex()
+        self._nodes_by_id = {}
+
+    def addNode(self, node):
+        self.nodes.append(node)
+        self._nodes_by_id[node.id] = node
+
+    def getNodeByID(self, node_id):
+        return self._nodes_by_id.get(node_id)
+
+    def getView(self):
+        return None
+
+
+class HeadlessGraph:
+    """
+    DAG of node runtimes built from ``Scene.serialize()`` data.
+
+    :param data: serialized scene, as produced by :meth:`~ainodes_frontend.node_engine.node_scene.Scene.serialize`
+    :type data: ``dict``
+
+    After a run ``failed`` holds the nodes which raised, ``skipped`` the nodes not run because an upstream node
+    failed, and ``cancelled`` whether the run was stopped before every node was evaluated.
+    """
+
+    def __init__(self, data: dict):
+        self.scene = HeadlessScene()
+        self.sockets = {}
+        self.failed = []
+        self.skipped = []
+        self.cancelled = False
+        self.buildNodes(data['nodes'])
+        self.buildEdges(data['edges'])
+
+    @property
+    def nodes(self) -> list:
+        return self.scene.nodes
+
+    @property
+    def edges(self) -> list:
+        return self.scene.edges
+
+    def createNode(self, node_data: dict):
+        objname = node_data.get('content_label_objname')
+        try:
+            node_class = get_class_from_content_label_objname(objname)
+        except KeyError:
+            raise HeadlessGraphError("Node class '%s' is not registered, is its node pack installed?" % objname)
+
+        node = node_class.__new__(node_class)
+        node.id = node_data['id']
+        node._title = node_data.get('title', node_class.op_title)
+        node.scene = self.scene
+        node.grNode = None
+        node.inputs = [HeadlessSocket(node, socket_data, True) for socket_data in
+                       sorted(node_data['inputs'], key=lambda socket: socket['index'])]
+        node.outputs = [HeadlessSocket(node, socket_data, False) for socket_data in
+                        sorted(node_data['outputs'], key=lambda socket: socket['index'])]
+        node._inputs = [socket.socket_type for socket in node.inputs]
+        node._outputs = [socket.socket_type for socket in node.outputs]
+        node.content = HeadlessContent(node, node_data.get('content', {}))
+        node._is_dirty = True
+        node._is_invalid = False
+        node.value = None
+        node.output_values = {}
+        node.values = {}
+        node.busy = False
+        node.init_done = True
+        if hasattr(node, "initHeadless"):
+            node.initHeadless()
+        return node
+
+    def buildNodes(self, nodes_data: list):
+        for node_data in nodes_data:
+            node = self.createNode(node_data)
+            self.scene.addNode(node)
+            for socket in node.inputs + node.outputs:
+                self.sockets[socket.id] = socket
+
+    def buildEdges(self, edges_data: list):
+        for edge_data in edges_data:
+            start = self.sockets.get(edge_data['start'])
+            end = self.sockets.get(edge_data['end'])
+            if start is None or end is None:
+                if DEBUG: print("HeadlessGraph: skipping dangling edge", edge_data['id'])
+                continue
+            edge = HeadlessEdge(edge_data, start, end)
+            self.scene.edges.append(edge)
+            self.scene.adjacency.addEdge(edge)
+
+    def getNodeByID(self, node_id):
+        return self.scene.getNodeByID(node_id)
+
+    def topologicalOrder(self) -> list:
+        """
+        Kahn's algorithm over all edges (EXEC edges included, as they express ordering)
+
+        :return: nodes ordered so that every node comes after all of its upstream nodes
+        :rtype: ``list``
+        :raises HeadlessGraphError: when the graph contains a cycle
+        """
+        adjacency = self.scene.adjacency
+        in_degree = OrderedDict((node, len(adjacency.parents(node))) for node in self.nodes)
+
+        ready = deque(node for node, degree in in_degree.items() if degree == 0)
+        order = []
+        while ready:
+            node = ready.popleft()
+            order.append(node)
+            for child in dict.fromkeys(adjacency.children(node)):
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    ready.append(child)
+
+        if len(order) != len(self.nodes):
+            raise HeadlessGraphError("Graph contains a cycle, cannot execute it headless")
+        return order
+
+
+class HeadlessExecutor:
+    """
+    Runs a :class:`HeadlessGraph` node by node on the calling thread.
+
+    :param graph: graph to run
+    :type graph: :class:`HeadlessGraph`
+    :param token: cancellation token of this run, cancelling it interrupts the current node at its next check
+    :type token: :class:`~ainodes_frontend.cancellation.CancellationToken`
+    """
+
+    def __init__(self, graph: HeadlessGraph, token: CancellationToken = None):
+        self.graph = graph
+        self.token = token if token is not None else CancellationToken()
+        self.cache = get_output_cache()
+        self.cache_keys = {}
+
+    def cacheKey(self, node) -> str:
+        if node not in self.cache_keys:
+            self.cache_keys[node] = node_cache_key(node, self.cacheKey)
+        return self.cache_keys[node]
+
+    def runNode(self, node):
+        use_cache = self.cache is not None and is_cacheable(node)
+        if use_cache:
+            entry = self.cache.get(self.cacheKey(node))
+            if entry:
+                restore_outputs(node, entry)
+                node.markDirty(False)
+                return cached_result(entry)
+        try:
+            result = node.evalImplementationThreadHandler(raise_errors=True)
+        except RunCancelled:
+            return None
+        except Exception:
+            # already logged, whatever the node set before failing must not end up in the cache
+            node.markInvalid()
+            self.graph.failed.append(node)
+            return None
+        if self.token.is_cancelled:
+            return None
+        node.setOutputsFromResult(result)
+        node.markDirty(False)
+        if use_cache:
+            entry = cache_entry(node, result)
+            if entry: self.cache.put(self.cacheKey(node), entry)
+        return result
+
+    def run(self) -> HeadlessGraph:
+        graph = self.graph
+        adjacency = graph.scene.adjacency
+        not_run = set()
+        with activate(self.token):
+            for node in graph.topologicalOrder():
+                if not gs.should_run or self.token.is_cancelled:
+                    print("Headless run stopped before", node.title)
+                    graph.cancelled = True
+                    break
+                if not_run.intersection(adjacency.parents(node)):
+                    # the node would only run on missing inputs, it stays dirty
+                    graph.skipped.append(node)
+                    not_run.add(node)
+                    continue
+                if DEBUG: print("Headless: evaluating", node)
+                self.runNode(node)
+                if graph.failed and graph.failed[-1] is node:
+                    not_run.add(node)
+        if self.token.is_cancelled:
+            graph.cancelled = True
+            for node in graph.nodes:
+                node.values = {}
+            release_memory()
+        if graph.failed:
+            print("Headless: %d node(s) failed: %s"
+                  % (len(graph.failed), ", ".join(node.title for node in graph.failed)))
+            if graph.skipped:
+                print("Headless: %d node(s) depending on them were skipped: %s"
+                      % (len(graph.skipped), ", ".join(node.title for node in graph.skipped)))
+        return graph
+
+
+def load_graph_file(filename: str) -> dict:
+    if is_binary_graph(filename):
+        return load_graph(filename)
+    with open(filename, "r", encoding="utf-8") as file:
+        return json.loads(file.read())
+
+
+def run_graph(data: dict) -> HeadlessGraph:
+    """
+    Build and execute a graph from serialized scene data.
+
+    Args:
+        data (dict): Serialized scene, in the ``Scene.serialize()`` format.
+
+    Returns:
+        HeadlessGraph: The executed graph, node outputs can be read with ``getOutput``.
+    """
+    return HeadlessExecutor(HeadlessGraph(data)).run()
+
+
+def run_graph_file(filename: str) -> HeadlessGraph:
+    """
+    Execute a saved graph file without the UI.
+
+    Args:
+        filename (str): Path to a graph saved by the node editor.
+
+    Returns:
+        HeadlessGraph: The executed graph.
+    """
+    return run_graph(load_graph_file(filename))
@@ -0,0 +1,44 @@
+"""
+Process wide cache of node images.
+
+Every node used to decode its class icon, scale it into a thumbnail and decode the status icon strip from disk when
+it was created. Images are now decoded once per path and scaled once per path and target size, nodes share the
+resulting ``QImage`` objects. ``QImage`` is implicitly shared, so painting from a cached image costs the same as
+painting from a private copy. Only use from the UI thread.
+"""
+from qtpy.QtCore import Qt
+from qtpy.QtGui import QImage
+
+DEBUG = False
+
+STATUS_ICONS_PATH = "ainodes_frontend/icons/status_icons.png"
+
+_images = {}
+
+
+def cached_image(path: str, width: int = None, height: int = None) -> QImage:
+    """
+    Decode ``path``, optionally scaled to fit ``width`` x ``height`` keeping its aspect ratio.
+
+    Args:
+        path (str): Image file, a path which cannot be decoded gives a null image which is cached as well.
+        width (int): Target width, None for the image as stored.
+        height (int): Target height, defaults to ``width``.
+
+    Returns:
+        QImage: The shared image, do not paint into it.
+    """
+    key = (path, width, height)
+    image = _images.get(key)
+    if image is None:
+        if width is None:
+            image = QImage(path)
+        else:
+            image = cached_image(path).scaled(width, height if height is not None else width, Qt.KeepAspectRatio)
+        _images[key] = image
+        if DEBUG: print("Image cache: loaded", key)
+    return image
+
+
+def clear_image_cache():
+    _images.clear()
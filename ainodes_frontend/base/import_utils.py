@@ -28,7 +28,10 @@ def update_all_nodes_req():
 
 
 
-def import_nodes_from_directory(directory):
+def node_files_in_directory(directory):
+    """
+    Yields (file path, module name) of the node modules in one directory of a node pack
+    """
     if "ainodes_backend" not in directory and "backend" not in directory and "_nodes" in directory:
         node_files = glob.glob(os.path.join(directory, "*.py"))
 
@@ -38,20 +41,31 @@ def import_nodes_from_directory(directory):
                 module_name = os.path.basename(node_file)[:-3].replace('/', '.')
                 dir = directory.replace('/', '.')
                 dir = dir.replace('\\', '.').lstrip('.')
+                yield node_file, f"{dir}.{module_name}"
+
 
+def node_files_in_pack(directory):
+    """
+    Yields (file path, module name) of every node module of a node pack, e.g. ``custom_nodes/ainodes_engine_base_nodes``
+    """
+    if "ainodes_backend" not in directory and "backend" not in directory and directory.endswith("_nodes"):
+        for subdir in os.listdir(directory):
+            subdir_path = os.path.join(directory, subdir)
+            if os.path.isdir(subdir_path) and subdir != "base":
+                yield from node_files_in_directory(subdir_path)
 
-                module = importlib.import_module(f"{dir}.{module_name}")
 
+def import_nodes_from_directory(directory):
+    for node_file, module_name in node_files_in_directory(directory):
+        module = importlib.import_module(module_name)
 
 
 def import_nodes_from_subdirectories(directory):
 
     if "ainodes_backend" not in directory and "backend" not in directory and directory.endswith("_nodes"):
         print("Importing from", directory)
-        for subdir in os.listdir(directory):
-            subdir_path = os.path.join(directory, subdir)
-            if os.path.isdir(subdir_path) and subdir != "base":
-                import_nodes_from_directory(subdir_path)
+        for node_file, module_name in node_files_in_pack(directory):
+            module = importlib.import_module(module_name)
 
 
 def check_repo_update(folder_path):
@@ -1,4 +1,5 @@
 import glob
+import importlib
 import os
 
 from ainodes_frontend import singleton as gs
@@ -7,6 +8,8 @@ LISTBOX_MIMETYPE = "application/x-item"
 
 CALC_NODES = {
 }
+# op codes handed to lazily imported node modules, mapped to the op code the node was listed under
+OPCODE_ALIASES = {}
 
 node_categories = []
 
@@ -36,7 +39,74 @@ def get_next_opcode():
             return i
 
     raise RuntimeError("Could not find a free opcode.")
+class LazyNodeClass:
+    """
+    Stands in for a node class listed in the node manifest (see :mod:`ainodes_frontend.base.node_manifest`) until
+    its module is imported.
+
+    The attributes node lists and menus read (``op_title``, ``category``, ``icon``, ``help_text``...) come from the
+    manifest. Calling it, like a class, or reading any other attribute imports the module first and forwards to the
+    real class, which then replaces this stand-in in ``CALC_NODES`` and ``gs.nodes``.
+    """
+
+    def __init__(self, op_code, entry: dict):
+        self.op_code = op_code
+        self.entry = entry
+        self.op_title = entry['op_title']
+        self.content_label_objname = entry['content_label_objname']
+        self.category = entry['category']
+        self.icon = entry['icon']
+        self.help_text = entry['help_text']
+        self.node_class = None
+
+    def __repr__(self):
+        return "<LazyNodeClass %s from %s>" % (self.content_label_objname, self.entry['module'])
+
+    def resolve(self):
+        """Import the node's module and return the real class"""
+        if self.node_class is None:
+            importlib.import_module(self.entry['module'])
+            if self.node_class is None:
+                raise OpCodeNotRegistered("%s no longer registers '%s'" % (
+                    self.entry['module'], self.content_label_objname))
+        return self.node_class
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+
+def register_lazy_node(entry: dict):
+    """
+    Register a node from its manifest entry without importing its module, nodes registered already are kept
+    """
+    if entry['content_label_objname'] in gs.nodes:
+        return
+    op_code = entry['op_code']
+    # op codes are handed out in import order, the one from the manifest may be taken by now
+    if op_code in CALC_NODES or f"OP_NODE_{op_code}" in globals():
+        op_code = get_next_opcode()
+    globals()[f"OP_NODE_{op_code}"] = op_code
+    lazy = LazyNodeClass(op_code, entry)
+    CALC_NODES[op_code] = lazy
+    gs.nodes[lazy.content_label_objname] = {'op_code': op_code, 'class': lazy}
+
+
 def register_node_now(op_code, class_reference):
+    registered = gs.nodes.get(class_reference.content_label_objname)
+    if registered is not None and isinstance(registered['class'], LazyNodeClass):
+        # the module of a node listed from the manifest was imported, the node keeps the op code it is listed under
+        lazy = registered['class']
+        lazy.node_class = class_reference
+        class_reference.op_code = lazy.op_code
+        if op_code != lazy.op_code: OPCODE_ALIASES[op_code] = lazy.op_code
+        CALC_NODES[lazy.op_code] = class_reference
+        registered['class'] = class_reference
+        return
     if op_code in CALC_NODES:
         raise InvalidNodeRegistration("Duplicate node registration of '%s'. There is already %s" %(
             op_code, CALC_NODES[op_code]
@@ -55,10 +125,27 @@ def register_node(op_code):
     return decorator
 
 def get_class_from_opcode(op_code):
+    op_code = OPCODE_ALIASES.get(op_code, op_code)
     if op_code not in CALC_NODES: raise OpCodeNotRegistered("OpCode '%d' is not registered" % op_code)
     return CALC_NODES[op_code]
 def get_class_from_content_label_objname(content_label_objname):
-    return gs.nodes[content_label_objname]['class']
+    node_class = gs.nodes[content_label_objname]['class']
+    if isinstance(node_class, LazyNodeClass):
+        return node_class.resolve()
+    return node_class
+def resolve_node_classes(graph: dict):
+    """
+    Import the modules of the lazily registered node classes a serialized graph uses. Node modules create Qt objects
+    and registering them changes CALC_NODES and gs.nodes, so call this on the UI thread before a worker thread
+    builds the graph.
+    """
+    for content_label_objname in {node_data.get('content_label_objname') for node_data in graph.get('nodes', [])}:
+        node_class = gs.nodes.get(content_label_objname, {}).get('class')
+        if isinstance(node_class, LazyNodeClass):
+            try:
+                node_class.resolve()
+            except OpCodeNotRegistered as e:
+                print(e)
 def import_nodes_from_directory(directory):
     if "ainodes_backend" not in directory and "backend" not in directory:
         node_files = glob.glob(os.path.join(directory, "*.py"))
@@ -0,0 +1,136 @@
+"""
+Cached node registry for fast startup.
+
+Importing every node module of every node pack at startup pulls in torch, transformers and the like just to fill
+``CALC_NODES`` and ``gs.nodes``. The manifest remembers what each node module registered: op code, content label
+object name, title, category, icon, help text and the module of the class. It is keyed by the file's modification
+time and size, with a sha1 of the contents as fallback when only the time changed (a checkout or copy touching
+unchanged files).
+
+On startup nodes from unchanged files are registered as :class:`~ainodes_frontend.base.node_config.LazyNodeClass`
+stand-ins, so the node list and menus are complete right away; a module is imported the first time one of its nodes
+is created, evaluated or resolved by a loading graph. New and modified files are imported as before and their
+entries rebuilt. ``--eager_nodes`` imports everything up front and leaves the manifest alone.
+
+Sockets are passed to a node's ``__init__`` rather than declared on the class, so they are only known once a node
+is created and are not part of the manifest.
+"""
+import hashlib
+import importlib
+import json
+import os
+
+from ainodes_frontend.base.import_utils import import_nodes_from_subdirectories, node_files_in_pack
+from ainodes_frontend.base.node_config import CALC_NODES, LazyNodeClass, register_lazy_node
+
+DEBUG = False
+
+MANIFEST_VERSION = 1
+MANIFEST_PATH = "cache/node_manifest.json"
+
+
+def file_sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            manifest = json.loads(file.read())
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('files', {})
+
+
+def write_manifest(path: str, files: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(json.dumps({'version': MANIFEST_VERSION, 'files': files}, indent=2))
+    os.replace(temp_path, path)
+
+
+def is_unchanged(entry: dict, path: str, stat: os.stat_result) -> bool:
+    """
+    Does the manifest entry still describe ``path``? A file with the same size but a new modification time is
+    compared by its sha1, the entry takes over the new time if it matches.
+    """
+    if entry.get('size') != stat.st_size:
+        return False
+    if entry.get('mtime') == stat.st_mtime:
+        return True
+    if entry.get('sha1') != file_sha1(path):
+        return False
+    entry['mtime'] = stat.st_mtime
+    return True
+
+
+def node_entry(op_code, node_class) -> dict:
+    return {
+        'op_code': op_code,
+        'content_label_objname': node_class.content_label_objname,
+        'op_title': getattr(node_class, 'op_title', node_class.__name__),
+        'category': getattr(node_class, 'category', "default"),
+        'icon': getattr(node_class, 'icon', None),
+        'help_text': getattr(node_class, 'help_text', ""),
+        'module': node_class.__module__,
+        'class_name': node_class.__name__,
+    }
+
+
+def import_node_file(path: str, module_name: str, stat: os.stat_result) -> dict:
+    """Import a node module and return its manifest entry listing the nodes it registered"""
+    before = set(CALC_NODES)
+    importlib.import_module(module_name)
+    nodes = [node_entry(op_code, CALC_NODES[op_code]) for op_code in CALC_NODES
+             if op_code not in before and not isinstance(CALC_NODES[op_code], LazyNodeClass)]
+    if DEBUG: print("Node manifest: imported", module_name, "registering", len(nodes), "nodes")
+    return {'mtime': stat.st_mtime, 'size': stat.st_size, 'sha1': file_sha1(path), 'nodes': nodes}
+
+
+def register_node_packs(folders: list, manifest_path: str = MANIFEST_PATH, eager: bool = False):
+    """
+    Register the nodes of the given node pack folders.
+
+    Args:
+        folders (list): Node pack folders, e.g. ``custom_nodes/ainodes_engine_base_nodes``.
+        manifest_path (str): Manifest file, rewritten whenever a node module was added, changed or removed.
+        eager (bool): Import every node module like before the manifest existed.
+    """
+    if eager:
+        for folder in folders:
+            import_nodes_from_subdirectories(folder)
+        return
+
+    cached = read_manifest(manifest_path)
+    files = {}
+    changed = False
+    for folder in folders:
+        for path, module_name in node_files_in_pack(folder):
+            path = os.path.normpath(path)
+            stat = os.stat(path)
+            entry = cached.get(path)
+            mtime = entry.get('mtime') if entry is not None else None
+            if entry is not None and is_unchanged(entry, path, stat):
+                for node in entry['nodes']:
+                    register_lazy_node(node)
+                # only the modification time changed
+                changed = changed or entry['mtime'] != mtime
+            else:
+                entry = import_node_file(path, module_name, stat)
+                changed = True
+            files[path] = entry
+
+    if changed or set(files) != set(cached):
+        try:
+            write_manifest(manifest_path, files)
+        except OSError as e:
+            print("Could not write the node manifest:", e)
+    print(f"Registered {sum(len(entry['nodes']) for entry in files.values())} nodes "
+          f"from {len(files)} node modules, {sum(1 for path in files if path not in cached)} new")
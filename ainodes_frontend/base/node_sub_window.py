@@ -12,6 +12,9 @@ from qtpy.QtGui import QIcon, QPixmap
 from qtpy.QtWidgets import QAction, QGraphicsProxyWidget, QMenu
 from qtpy.QtWidgets import QColorDialog
 
+from ainodes_frontend.base.graph_loader import GraphLoader
+from ainodes_frontend.base.graph_scheduler import GraphScheduler
+from ainodes_frontend.base.run_queue import get_run_queue
 from ainodes_frontend.base.node_config import CALC_NODES, get_class_from_opcode, LISTBOX_MIMETYPE, \
     node_categories, get_class_from_content_label_objname
 from ainodes_frontend.node_engine.node_edge import EDGE_TYPE_DIRECT, EDGE_TYPE_BEZIER, EDGE_TYPE_SQUARE
@@ -46,6 +49,9 @@ class CalculatorSubWindow(NodeEditorWidget):
         #print(self._search_widget.isVisible())
         self.scenePos = None
         self.subgraph = None
+        self.scheduler = None
+        self.scene.queue = get_run_queue()
+        self.load_progress = None
         #self.tab_search_toggle()
     def wheelEvent(self, event):
         #print("IGNORE IN NODE SUB WINDOW")
@@ -85,6 +91,12 @@ class CalculatorSubWindow(NodeEditorWidget):
 
     def handle_task_finished(self):
         self.scene.queue.start_next_task()
+
+    def doQueueRun(self, priority=0):
+        # queued runs execute headless in the background, on a snapshot of the graph as it is now
+        job = self.scene.queue.submit(self.scene.serialize(), priority=priority, name=self.getUserFriendlyFilename())
+        print(f"Queued {job}, {len(self.scene.queue.jobs)} job(s) waiting")
+        return job
     def getNodeClassFromData(self, data):
         if 'op_code' not in data: return Node
 
@@ -99,10 +111,29 @@ class CalculatorSubWindow(NodeEditorWidget):
             if node.__class__.__name__ == "CalcNode_Output":
                 node.eval()
     def doRunAll(self):
-        # eval all output nodes
+        # run every node once, in dependency order, independent branches in parallel
         for node in self.scene.nodes:
             node.markDirty(True)
-            node.eval()
+        self.runNodes(self.scene.nodes)
+
+    def doStopRun(self):
+        if self.scheduler is not None:
+            self.scheduler.cancel()
+
+    def doRunDirty(self):
+        # incremental run, only the dirty nodes are evaluated, clean upstream nodes keep their values
+        dirty_nodes = [node for node in self.scene.nodes if node.isDirty()]
+        if not dirty_nodes:
+            print("Nothing to run, no node is dirty")
+            return
+        self.runNodes(dirty_nodes)
+
+    def runNodes(self, nodes):
+        if self.scheduler is not None and self.scheduler.is_running:
+            print("A run is already in progress")
+            return
+        self.scheduler = GraphScheduler(self.scene, nodes)
+        self.scheduler.run()
 
     def onHistoryRestored(self):
         pass
@@ -144,6 +175,48 @@ class CalculatorSubWindow(NodeEditorWidget):
 
     def closeEvent(self, event):
         for callback in self._close_event_listeners: callback(self, event)
+        if event.isAccepted():
+            if self.scene.isLoading():
+                self.scene.loader.cancel()
+            # give the outputs of the closed graph back right away
+            self.scene.clear()
+
+    def fileLoadInBackground(self, filename: str, callback=None):
+        """
+        Load a graph file without blocking the window. The file is parsed on the scene's thread pool and built in
+        time slices on the UI thread, a progress bar is shown under the view meanwhile.
+
+        :param filename: file to load
+        :type filename: ``str``
+        :param callback: called with ``(self, succeeded, error message)`` once the graph is built
+        """
+        self.filename = filename
+        self.setTitle()
+        self.load_progress = QtWidgets.QProgressBar(self)
+        self.load_progress.setMaximumHeight(12)
+        self.load_progress.setTextVisible(False)
+        self.load_progress.setRange(0, 0)
+        self.layout.addWidget(self.load_progress)
+
+        loader = GraphLoader(self.scene, filename, self.getNodeClassFromData)
+        loader.progress.connect(self.onLoadProgress)
+        loader.finished.connect(lambda succeeded, message: self.onLoadFinished(succeeded, message, callback))
+        loader.start()
+
+    def onLoadProgress(self, built: int, total: int):
+        self.load_progress.setRange(0, total)
+        self.load_progress.setValue(built)
+
+    def onLoadFinished(self, succeeded: bool, message: str, callback=None):
+        self.layout.removeWidget(self.load_progress)
+        self.load_progress.deleteLater()
+        self.load_progress = None
+        self.scene.filename = self.filename
+        self.scene.has_been_modified = False
+        self.scene.history.clear()
+        self.scene.history.storeInitialHistoryStamp()
+        self.setTitle()
+        if callback is not None: callback(self, succeeded, message)
 
     def onDragEnter(self, event):
 
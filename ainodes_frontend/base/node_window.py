@@ -16,9 +16,11 @@ from qtpy.QtWidgets import QMdiArea, QDockWidget, QAction, QMessageBox, QFileDia
 
 from ainodes_frontend.base import CalcGraphicsNode
 from ainodes_frontend.base.ai_nodes_listbox import QDMDragListbox
+from ainodes_frontend.base.autosave import create_autosave, find_recoverable_sessions
 from ainodes_frontend.base.node_config import CALC_NODES, import_nodes_from_file, import_nodes_from_subdirectories, \
     get_class_from_content_label_objname
 from ainodes_frontend.base.node_sub_window import CalculatorSubWindow
+from ainodes_frontend.base.run_queue import get_run_queue
 from ainodes_frontend.base.settings import load_settings, save_settings, save_error_log
 from ainodes_frontend.base.webview_widget import BrowserWidget
 from ainodes_frontend.base.worker import Worker
@@ -659,6 +661,9 @@ class CalculatorWindow(NodeEditorWindow):
         self.updateMenus()
         self.readSettings()
         self.setWindowTitle("aiNodes - Engine")
+        self.autosave = create_autosave(self.openScenes)
+        if self.autosave is not None and find_recoverable_sessions(self.autosave.directory, self.autosave.session_dir):
+            print("Graphs autosaved by a session which did not exit cleanly can be restored with File > Recover Autosaved Graphs")
         #self.show_github_repositories()
         if not gs.args.no_console:
             self.create_console_widget()
@@ -820,6 +825,7 @@ class CalculatorWindow(NodeEditorWindow):
             event.ignore()
         else:
             self.writeSettings()
+            if self.autosave is not None: self.autosave.stop()
             event.accept()
             # hacky fix for PyQt 5.14.x
             import sys
@@ -831,6 +837,14 @@ class CalculatorWindow(NodeEditorWindow):
         self.actNode = QAction('&Add Node', self, shortcut='Ctrl+L', statusTip="Open new node", triggered=self.onNodeOpen)
         self.actNodePacks = QAction('&Node Packages', self, shortcut='Ctrl+K', statusTip="Download Nodes", triggered=self.show_github_repositories)
         self.actShowSettingsEditor = QAction('&Settings Editor', self, shortcut='Ctrl+J', statusTip="Open Settings", triggered=self.showSettingsEditor)
+        self.actRecover = QAction('&Recover Autosaved Graphs', self, statusTip="Open the graphs autosaved by the last session which did not exit cleanly", triggered=self.onRecoverAutosave)
+        self.actRunAll = QAction('Run &All', self, shortcut='Ctrl+Shift+R', statusTip="Run every node in the graph", triggered=self.onRunAll)
+        self.actRunDirty = QAction('Run &Dirty', self, shortcut='Ctrl+R', statusTip="Run only the nodes changed since the last run", triggered=self.onRunDirty)
+        self.actStopRun = QAction('&Stop', self, shortcut='Ctrl+.', statusTip="Cancel the running graph, interrupting samplers between steps", triggered=self.onStopRun)
+        self.actQueueRun = QAction('Add to &Queue', self, shortcut='Ctrl+Shift+Q', statusTip="Queue a background run of the current graph", triggered=self.onQueueRun)
+        self.actPauseQueue = QAction('&Pause Queue', self, statusTip="Pause or resume the run queue", triggered=self.onPauseQueue)
+        self.actPauseQueue.setCheckable(True)
+        self.actQueueStats = QAction('Queue &Statistics', self, statusTip="Print run queue throughput and wait times", triggered=self.onQueueStats)
 
         self.actClose = QAction("Cl&ose", self, statusTip="Close the active window", triggered=self.mdiArea.closeActiveSubWindow)
         self.actCloseAll = QAction("Close &All", self, statusTip="Close all the windows", triggered=self.mdiArea.closeAllSubWindows)
@@ -877,6 +891,65 @@ class CalculatorWindow(NodeEditorWindow):
         if activeSubWindow:
             return activeSubWindow.widget()
         return None
+    def onRunAll(self):
+        current = self.getCurrentNodeEditorWidget()
+        if current is not None:
+            current.doRunAll()
+
+    def onRunDirty(self):
+        current = self.getCurrentNodeEditorWidget()
+        if current is not None:
+            current.doRunDirty()
+
+    def onStopRun(self):
+        current = self.getCurrentNodeEditorWidget()
+        if current is not None:
+            current.doStopRun()
+
+    def onQueueRun(self):
+        current = self.getCurrentNodeEditorWidget()
+        if current is not None:
+            current.doQueueRun()
+
+    def onPauseQueue(self, checked):
+        if checked:
+            get_run_queue().pause()
+        else:
+            get_run_queue().resume()
+
+    def openScenes(self) -> list:
+        """The (scene, filename) pairs of every open graph"""
+        return [(window.widget().scene, window.widget().filename) for window in self.mdiArea.subWindowList()
+                if isinstance(window.widget(), CalculatorSubWindow)]
+
+    def onRecoverAutosave(self):
+        if self.autosave is None:
+            self.statusBar().showMessage("Autosave is disabled", 5000)
+            return
+        sessions = find_recoverable_sessions(self.autosave.directory, self.autosave.session_dir)
+        if not sessions:
+            self.statusBar().showMessage("No autosaved graphs to recover", 5000)
+            return
+        session_dir, index = sessions[0]
+        try:
+            snapshots = self.autosave.recover(session_dir)
+        except OSError as e:
+            dumpException(e)
+            return
+        for path, source in snapshots:
+            self.openFileInBackground(path, lambda nodeeditor, source=source: self.onGraphRecovered(nodeeditor, source))
+
+    def onGraphRecovered(self, nodeeditor, source: str):
+        # the recovered graph belongs to its original file, it has unsaved changes by definition
+        nodeeditor.filename = source
+        nodeeditor.scene.filename = source
+        nodeeditor.scene.has_been_modified = True
+        nodeeditor.setTitle()
+
+    def onQueueStats(self):
+        for key, value in get_run_queue().stats().items():
+            print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+
     def onNodeOpen(self):
         """Handle File Open operation"""
         fname, filter = QFileDialog.getOpenFileName(None, 'Open graph from file', f"{self.getFileDialogDirectory()}/ainodes_frontend/custom_nodes", 'Python Files (*.py)')
@@ -971,22 +1044,33 @@ class CalculatorWindow(NodeEditorWindow):
                     if existing:
                         self.mdiArea.setActiveSubWindow(existing)
                     else:
-                        # we need to create new subWindow and open the file
-                        nodeeditor = CalculatorSubWindow()
-                        if nodeeditor.fileLoad(fname):
-                            self.statusBar().showMessage("File %s loaded" % fname, 5000)
-                            nodeeditor.setTitle()
-                            subwnd = self.createMdiChild(nodeeditor)
-                            icon = QtGui.QIcon("ainodes_frontend/qss/icon.png")
-                            subwnd.setWindowIcon(icon)
-                            subwnd.show()
-                            # Install event filter on the subwnd object
-                            subwnd.installEventFilter(self)
-
-
-                        else:
-                            nodeeditor.close()
+                        self.openFileInBackground(fname)
         except Exception as e: dumpException(e)
+
+    def openFileInBackground(self, fname: str, on_loaded=None):
+        """
+        Open a graph file in a new sub window, which is shown right away and filled while the file loads
+
+        :param on_loaded: called with the new ``CalculatorSubWindow`` once the graph loaded successfully
+        """
+        nodeeditor = CalculatorSubWindow()
+        subwnd = self.createMdiChild(nodeeditor)
+        icon = QtGui.QIcon("ainodes_frontend/qss/icon.png")
+        subwnd.setWindowIcon(icon)
+        subwnd.show()
+        # Install event filter on the subwnd object
+        subwnd.installEventFilter(self)
+        self.statusBar().showMessage("Loading %s" % fname)
+        nodeeditor.fileLoadInBackground(fname, lambda widget, succeeded, message: self.onFileLoaded(subwnd, widget, succeeded, message, on_loaded))
+
+    def onFileLoaded(self, subwnd, nodeeditor, succeeded: bool, message: str, on_loaded=None):
+        if succeeded:
+            self.statusBar().showMessage("File %s loaded" % nodeeditor.filename, 5000)
+            if on_loaded is not None: on_loaded(nodeeditor)
+            return
+        self.statusBar().clearMessage()
+        QMessageBox.warning(self, "Error loading %s" % os.path.basename(nodeeditor.filename), message)
+        subwnd.close()
     def onFileOpen_subgraph(self, graph):
         try:
             existing = self.findMdiChild(fname)
@@ -1017,18 +1101,7 @@ class CalculatorWindow(NodeEditorWindow):
                     if existing:
                         self.mdiArea.setActiveSubWindow(existing)
                     else:
-                        # we need to create new subWindow and open the file
-                        nodeeditor = CalculatorSubWindow()
-                        if nodeeditor.fileLoad(fname):
-                            self.statusBar().showMessage("File %s loaded" % fname, 5000)
-                            nodeeditor.setTitle()
-                            subwnd = self.createMdiChild(nodeeditor)
-                            subwnd.show()
-                            # Install event filter on the subwnd object
-                            subwnd.installEventFilter(self)
-
-                        else:
-                            nodeeditor.close()
+                        self.openFileInBackground(fname)
         except Exception as e: dumpException(e)
 
 
@@ -1048,6 +1121,16 @@ class CalculatorWindow(NodeEditorWindow):
 
         self.menuBar().addSeparator()
 
+        self.runMenu = self.menuBar().addMenu("&Run")
+        self.runMenu.addAction(self.actRunAll)
+        self.runMenu.addAction(self.actRunDirty)
+        self.runMenu.addAction(self.actStopRun)
+        self.runMenu.addSeparator()
+        self.runMenu.addAction(self.actQueueRun)
+        self.runMenu.addAction(self.actPauseQueue)
+        self.runMenu.addAction(self.actQueueStats)
+        self.actPauseQueue.setChecked(get_run_queue().paused)
+
         self.helpMenu = self.menuBar().addMenu("&Help")
         self.helpMenu.addAction(self.actAbout)
         self.helpMenu.addAction(self.actTraining)
@@ -1059,6 +1142,7 @@ class CalculatorWindow(NodeEditorWindow):
         self.fileMenu.addAction(self.actNode)
         self.fileMenu.addAction(self.actNodePacks)
         self.fileMenu.addAction(self.actShowSettingsEditor)
+        self.fileMenu.addAction(self.actRecover)
         # Get the index of the action in the fileMenu
         action_index = self.fileMenu.actions().index(self.actNode)
 
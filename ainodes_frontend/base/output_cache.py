@@ -0,0 +1,273 @@
+"""
+Content-addressed cache for node outputs.
+
+A node's cache key is a hash of its class, its serialized content and the cache keys of the nodes feeding its
+inputs, so an unchanged node downstream of unchanged nodes maps to the same key on every run and its outputs can
+be returned without evaluating it again. Entries are kept in RAM up to ``output_cache_ram_mb`` and, when a disk
+budget is configured, older entries are moved to ``output_cache_dir`` before being dropped for good.
+With the output store enabled the values of cached entries are held by the store, so values shared between the
+nodes and the cache are counted once against ``output_store_ram_mb`` and spilled to disk like any other output.
+"""
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+from ainodes_frontend import singleton as gs
+
+DEBUG = False
+
+MB = 1024 * 1024
+
+
+def estimate_size(value, seen: set = None) -> int:
+    """
+    Estimate the number of bytes a node output keeps alive.
+
+    Args:
+        value: Tensor, ndarray, PIL image, container of those, or any other python object.
+        seen (set): ids of objects already counted, an object referenced twice is only counted once.
+
+    Returns:
+        int: Estimated size in bytes.
+    """
+    if value is None:
+        return 0
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if hasattr(value, "element_size") and hasattr(value, "nelement"):
+        # torch.Tensor
+        return value.element_size() * value.nelement()
+    if hasattr(value, "nbytes"):
+        # numpy.ndarray
+        return int(value.nbytes)
+    if hasattr(value, "getbands") and hasattr(value, "size"):
+        # PIL.Image
+        width, height = value.size
+        return width * height * len(value.getbands())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(item, seen) for item in value.values())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(item, seen) for item in value)
+    return sys.getsizeof(value)
+
+
+def dump_value(path: str, value):
+    """Write a value to disk, via a temporary file so a crash never leaves a truncated entry behind"""
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as file:
+        pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+
+def load_value(path: str):
+    with open(path, "rb") as file:
+        return pickle.load(file)
+
+
+def node_cache_key(node, upstream_key) -> str:
+    """
+    Compute the content address of a node.
+
+    Args:
+        node (AiNode): The node to hash.
+        upstream_key (callable): Returns the cache key of an upstream node.
+
+    Returns:
+        str: Hex digest identifying the node's outputs.
+    """
+    digest = hashlib.sha1()
+    # not the op code, it depends on the node manifest and import order and changes between sessions
+    digest.update(str(node.__class__.content_label_objname).encode())
+    content = node.content.serialize() if node.content is not None else {}
+    digest.update(json.dumps(content, sort_keys=True, default=str).encode())
+    connections = node.scene.adjacency.upstreamConnections(node)
+    for index in sorted(connections):
+        for other_socket in connections[index].values():
+            digest.update(("|%d:%d:" % (index, other_socket.index)).encode())
+            digest.update(upstream_key(other_socket.node).encode())
+    return digest.hexdigest()
+
+
+class OutputCache:
+    """
+    Two level LRU cache mapping cache keys to the entries built by :func:`cache_entry`.
+
+    Args:
+        ram_budget (int): Maximum bytes kept in memory.
+        disk_budget (int): Maximum bytes kept on disk, 0 disables the disk level.
+        directory (str): Where disk entries are stored.
+        store (OutputStore): Output store holding the values of entries in memory. The RAM budget then limits how
+            much the cache references, the store decides what of it stays resident.
+    """
+
+    def __init__(self, ram_budget: int, disk_budget: int = 0, directory: str = "cache/outputs", store=None):
+        self.ram_budget = ram_budget
+        self.disk_budget = disk_budget
+        self.directory = directory
+        self.store = store
+        self.ram = OrderedDict()
+        self.disk = OrderedDict()
+        self.ram_bytes = 0
+        self.disk_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+    def get(self, key: str):
+        with self.lock:
+            if key in self.ram:
+                self.ram.move_to_end(key)
+                self.hits += 1
+                return self.ram[key][0]
+            if key in self.disk:
+                path, size = self.disk.pop(key)
+                self.disk_bytes -= size
+                try:
+                    entry = load_value(path)
+                    os.remove(path)
+                except Exception as e:
+                    print("Could not read cached outputs from", path, e)
+                    self.misses += 1
+                    return None
+                self.hits += 1
+                self.put(key, entry)
+                return self.ram[key][0] if key in self.ram else entry
+            self.misses += 1
+            return None
+
+    def put(self, key: str, entry: dict):
+        size = estimate_size(entry)
+        with self.lock:
+            if key in self.ram:
+                self.ram_bytes -= self.ram.pop(key)[1]
+            if size > self.ram_budget:
+                if DEBUG: print("OutputCache: entry of %d bytes is larger than the RAM budget" % size)
+                self.spill(key, entry, size)
+                return
+            self.ram[key] = (self.holdInStore(entry), size)
+            self.ram_bytes += size
+            while self.ram_bytes > self.ram_budget and self.ram:
+                old_key, (old_outputs, old_size) = self.ram.popitem(last=False)
+                self.ram_bytes -= old_size
+                self.spill(old_key, old_outputs, old_size)
+
+    def holdInStore(self, entry: dict) -> dict:
+        """
+        Move the outputs of an entry into the output store, which counts values shared with the nodes once and
+        spills them like any other output, so the cache keeps no references of its own.
+        """
+        if self.store is None:
+            return entry
+        from ainodes_frontend.base.output_store import NodeOutputs
+        outputs = NodeOutputs(self.store)
+        outputs.update(entry['outputs'])
+        return {'outputs': outputs, 'result': entry['result']}
+
+    def spill(self, key: str, entry: dict, size: int):
+        if self.disk_budget <= 0 or size > self.disk_budget:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, key + ".pkl")
+        try:
+            dump_value(path, {'outputs': dict(entry['outputs'].items()), 'result': entry['result']})
+        except Exception as e:
+            # not everything a node outputs can be pickled, such entries just fall out of the cache
+            if DEBUG: print("OutputCache: could not spill", key, e)
+            return
+        self.disk[key] = (path, size)
+        self.disk_bytes += size
+        while self.disk_bytes > self.disk_budget and self.disk:
+            old_key, (old_path, old_size) = self.disk.popitem(last=False)
+            self.disk_bytes -= old_size
+            if os.path.exists(old_path): os.remove(old_path)
+
+    def clear(self):
+        with self.lock:
+            for path, size in self.disk.values():
+                if os.path.exists(path): os.remove(path)
+            self.ram.clear()
+            self.disk.clear()
+            self.ram_bytes = 0
+            self.disk_bytes = 0
+
+
+def get_output_cache():
+    """
+    Returns the process wide output cache, or None if it is disabled (``output_cache_ram_mb: 0``).
+    """
+    if getattr(gs, "output_cache", None) is None:
+        ram_mb = getattr(gs, "output_cache_ram_mb", 0)
+        if not ram_mb:
+            return None
+        # output_store imports this module
+        from ainodes_frontend.base.output_store import get_output_store
+        gs.output_cache = OutputCache(ram_budget=ram_mb * MB,
+                                      disk_budget=getattr(gs, "output_cache_disk_mb", 0) * MB,
+                                      directory=getattr(gs, "output_cache_dir", "cache/outputs"),
+                                      store=get_output_store())
+    return gs.output_cache
+
+
+def is_cacheable(node) -> bool:
+    """
+    Only nodes which opted in with ``cacheable = True`` and produce data can be served from the cache, nodes with
+    side effects only (save, preview...) always run.
+    """
+    if not getattr(node, "cacheable", False):
+        return False
+    return any(socket.socket_type != 1 for socket in node.outputs)
+
+
+def collect_outputs(node) -> dict:
+    outputs = {}
+    for socket in node.outputs:
+        object_name = node.getID(socket.index)
+        if object_name in node.values:
+            outputs[socket.index] = node.values[object_name]
+    return outputs
+
+
+class OutputRef:
+    """Stands in for a result item which is also one of the outputs, so an entry holds every value only once"""
+    __slots__ = ('index',)
+
+    def __init__(self, index: int):
+        self.index = index
+
+
+def cache_entry(node, result):
+    """
+    The outputs a node just produced, together with the result of its ``evalImplementation_thread`` which is handed
+    to ``onWorkerFinished`` again on a cache hit. None if the node has no outputs to cache.
+    """
+    outputs = collect_outputs(node)
+    if not outputs:
+        return None
+    by_id = {id(value): index for index, value in outputs.items()}
+    if id(result) in by_id:
+        result = OutputRef(by_id[id(result)])
+    elif type(result) in (list, tuple):
+        result = type(result)(OutputRef(by_id[id(item)]) if id(item) in by_id else item for item in result)
+    return {'outputs': outputs, 'result': result}
+
+
+def cached_result(entry: dict):
+    """The result of ``evalImplementation_thread`` stored in a cache entry"""
+    outputs, result = entry['outputs'], entry['result']
+    if isinstance(result, OutputRef):
+        return outputs[result.index]
+    if type(result) in (list, tuple):
+        return type(result)(outputs[item.index] if isinstance(item, OutputRef) else item for item in result)
+    return result
+
+
+def restore_outputs(node, entry: dict):
+    for index, value in entry['outputs'].items():
+        node.setOutput(index, value)
@@ -0,0 +1,364 @@
+"""
+Memory-budgeted storage for node outputs.
+
+``AiNode.values`` is a :class:`NodeOutputs` mapping. Every value stored in it is sized with
+:func:`~ainodes_frontend.base.output_cache.estimate_size` and registered with the process wide :class:`OutputStore`,
+which keeps the resident values of all nodes in one LRU order. When the total goes over ``output_store_ram_mb`` the
+coldest values are written to ``output_store_dir`` by a background thread and dropped from memory; reading them
+again (``getOutput``) loads them back, numpy arrays and CPU tensors as memory-mapped views of the spilled file.
+The output cache keeps its entries in the store as well, so a value shared by a node and the cache is counted once
+and spilling it really frees the memory.
+
+Values which cannot be written (open handles, models, anything pickle refuses) stay in memory. Every process
+spills into its own sub directory, which is removed at exit.
+"""
+import atexit
+import os
+import pickle
+import shutil
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+
+from ainodes_frontend import singleton as gs
+from ainodes_frontend.base.output_cache import estimate_size, dump_value, load_value, MB
+
+DEBUG = False
+
+SPILL_NUMPY = "numpy"
+SPILL_TORCH = "torch"
+SPILL_PICKLE = "pickle"
+
+
+def write_value(directory: str, value):
+    """
+    Write a value to a new file in ``directory``.
+
+    Returns:
+        tuple: (path, format, device) describing how to read it back.
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = uuid.uuid4().hex
+    if type(value).__module__ == "numpy" and hasattr(value, "dtype") and value.dtype != object:
+        import numpy as np
+        path = os.path.join(directory, name + ".npy")
+        np.save(path, value, allow_pickle=False)
+        return path, SPILL_NUMPY, None
+    if hasattr(value, "element_size") and hasattr(value, "device"):
+        import torch
+        path = os.path.join(directory, name + ".pt")
+        torch.save(value.detach().cpu(), path)
+        return path, SPILL_TORCH, value.device
+    path = os.path.join(directory, name + ".pkl")
+    dump_value(path, value)
+    return path, SPILL_PICKLE, None
+
+
+def read_value(path: str, spill_format: str, device):
+    if spill_format == SPILL_NUMPY:
+        import numpy as np
+        # copy on write, nodes are free to modify the array in place without touching the file
+        return np.load(path, mmap_mode='c')
+    if spill_format == SPILL_TORCH:
+        import torch
+        try:
+            tensor = torch.load(path, map_location="cpu", mmap=True)
+        except TypeError:
+            # torch < 2.1 has no mmap loading
+            tensor = torch.load(path, map_location="cpu")
+        return tensor.to(device) if device is not None and device.type != "cpu" else tensor
+    return load_value(path)
+
+
+class NodeOutputs(MutableMapping):
+    """
+    Mapping of output ids to values, with values the store spilled to disk loaded back on access.
+
+    Args:
+        store (OutputStore): Store enforcing the memory budget, None keeps every value in memory.
+    """
+
+    def __init__(self, store: 'OutputStore' = None):
+        self.store = store
+        self.resident = {}
+        # key -> (path, format, device)
+        self.spilled = {}
+        # key -> path of the file a reloaded, memory-mapped value is backed by
+        self.mapped = {}
+        self.owner = id(self)
+        if store is not None:
+            store.register(self)
+
+    def __getitem__(self, key):
+        if self.store is None:
+            return self.resident[key]
+        with self.store.lock:
+            if key in self.resident:
+                self.store.touch(self, key)
+                return self.resident[key]
+            if key in self.spilled:
+                return self.store.reload(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if self.store is None:
+            self.resident[key] = value
+            return
+        with self.store.lock:
+            self.store.release(self, key)
+            self.resident[key] = value
+            self.store.track(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in self.resident and key not in self.spilled:
+            raise KeyError(key)
+        if self.store is None:
+            del self.resident[key]
+            return
+        with self.store.lock:
+            self.store.release(self, key)
+
+    def __contains__(self, key):
+        # membership never needs the value, so it must not reload spilled entries
+        return key in self.resident or key in self.spilled
+
+    def __iter__(self):
+        return iter(list(self.resident) + list(self.spilled))
+
+    def __len__(self):
+        return len(self.resident) + len(self.spilled)
+
+    def clear(self):
+        if self.store is None:
+            self.resident.clear()
+            return
+        with self.store.lock:
+            for key in list(self):
+                self.store.release(self, key)
+
+    def __repr__(self):
+        return "<NodeOutputs %d resident, %d spilled>" % (len(self.resident), len(self.spilled))
+
+
+class StoredValue:
+    """
+    Accounting record of one value object, which may be held by several mappings (a node's values and the output
+    cache) and is counted, spilled and reloaded once for all of them.
+    """
+    __slots__ = ('value', 'size', 'holders', 'spilling', 'pinned')
+
+    def __init__(self, value, size: int):
+        self.value = value
+        self.size = size
+        # (owner, key) of every mapping holding the value
+        self.holders = set()
+        self.spilling = False
+        # failed to spill, skipped from then on
+        self.pinned = False
+
+
+class OutputStore:
+    """
+    Shared LRU accounting for the values held by all :class:`NodeOutputs`.
+
+    Values are accounted per object, an object stored in several mappings only counts once and spilling it frees it
+    in all of them. Files are written by a background thread, so setting an output never waits for the disk; a value
+    stays readable from memory until its file is complete.
+
+    Args:
+        ram_budget (int): Bytes of node outputs kept in memory before cold values are spilled.
+        directory (str): Where spilled values are written, a sub directory per process is used.
+    """
+
+    def __init__(self, ram_budget: int, directory: str = "cache/values"):
+        self.ram_budget = ram_budget
+        self.directory = os.path.join(directory, str(os.getpid()))
+        # (owner, key) -> id of the value, least recently used first
+        self.resident = OrderedDict()
+        # id of the value -> StoredValue
+        self.values = {}
+        # path -> number of spilled or mapped entries backed by the file
+        self.files = {}
+        self.owners = {}
+        self.ram_bytes = 0
+        # part of ram_bytes which is being written to disk
+        self.spilling_bytes = 0
+        self.spills = 0
+        self.reloads = 0
+        self.lock = threading.RLock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="OutputStore")
+
+    def register(self, outputs: NodeOutputs):
+        # the store must not keep nodes alive, values of collected nodes are released in forget()
+        self.owners[outputs.owner] = weakref.ref(outputs)
+        weakref.finalize(outputs, self.forget, outputs.owner, outputs.spilled, outputs.mapped)
+
+    def forget(self, owner: int, spilled: dict, mapped: dict):
+        with self.lock:
+            for entry in [entry for entry in self.resident if entry[0] == owner]:
+                self.dropHolder(entry)
+            for path, spill_format, device in spilled.values():
+                self.releaseFile(path)
+            for path in mapped.values():
+                self.releaseFile(path)
+            self.owners.pop(owner, None)
+
+    def track(self, outputs: NodeOutputs, key, value):
+        entry = (outputs.owner, key)
+        stored = self.values.get(id(value))
+        if stored is None:
+            stored = self.values[id(value)] = StoredValue(value, estimate_size(value))
+            self.ram_bytes += stored.size
+        stored.holders.add(entry)
+        self.resident[entry] = id(value)
+        self.enforce(keep=stored)
+
+    def touch(self, outputs: NodeOutputs, key):
+        entry = (outputs.owner, key)
+        if entry in self.resident:
+            self.resident.move_to_end(entry)
+
+    def dropHolder(self, entry):
+        stored = self.values[self.resident.pop(entry)]
+        stored.holders.discard(entry)
+        if stored.holders:
+            return
+        # the file of a write still in flight is removed once it is complete
+        del self.values[id(stored.value)]
+        self.ram_bytes -= stored.size
+        if stored.spilling:
+            self.spilling_bytes -= stored.size
+
+    def release(self, outputs: NodeOutputs, key):
+        """Drop a value from memory and disk"""
+        entry = (outputs.owner, key)
+        if entry in self.resident:
+            self.dropHolder(entry)
+        outputs.resident.pop(key, None)
+        spilled = outputs.spilled.pop(key, None)
+        if spilled is not None:
+            self.releaseFile(spilled[0])
+        mapped = outputs.mapped.pop(key, None)
+        if mapped is not None:
+            self.releaseFile(mapped)
+
+    def releaseFile(self, path: str):
+        count = self.files.pop(path, 1) - 1
+        if count > 0:
+            self.files[path] = count
+        else:
+            self.removeFile(path)
+
+    def removeFile(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            # still mapped on windows, it goes with the directory at exit
+            if DEBUG: print("OutputStore: could not remove", path)
+
+    def enforce(self, keep: StoredValue = None):
+        """Start spilling least recently used values until the resident total fits the budget"""
+        if self.ram_bytes - self.spilling_bytes <= self.ram_budget:
+            return
+        for entry, value_id in list(self.resident.items()):
+            if self.ram_bytes - self.spilling_bytes <= self.ram_budget:
+                break
+            ref = self.owners.get(entry[0])
+            if ref is None or ref() is None:
+                self.dropHolder(entry)
+                continue
+            stored = self.values[value_id]
+            if stored is keep or stored.pinned or stored.spilling:
+                continue
+            self.spill(stored)
+        if DEBUG and self.ram_bytes - self.spilling_bytes > self.ram_budget:
+            print("OutputStore: %d MB resident over a %d MB budget, nothing left to spill" %
+                  (self.ram_bytes // MB, self.ram_budget // MB))
+
+    def spill(self, stored: StoredValue):
+        stored.spilling = True
+        self.spilling_bytes += stored.size
+        self.executor.submit(self.writeSpill, stored)
+
+    def writeSpill(self, stored: StoredValue):
+        """Runs on the spill thread, the value stays resident until its file is complete"""
+        try:
+            spilled = write_value(self.directory, stored.value)
+        except (pickle.PicklingError, TypeError, AttributeError, ValueError, RuntimeError, OSError) as e:
+            if DEBUG: print("OutputStore: keeping value in memory,", e)
+            with self.lock:
+                if stored.spilling and self.values.get(id(stored.value)) is stored:
+                    self.spilling_bytes -= stored.size
+                stored.spilling = False
+                stored.pinned = True
+            return
+        with self.lock:
+            self.finishSpill(stored, spilled)
+
+    def finishSpill(self, stored: StoredValue, spilled: tuple):
+        if self.values.get(id(stored.value)) is not stored:
+            # released while it was written
+            stored.spilling = False
+            self.removeFile(spilled[0])
+            return
+        for entry in stored.holders:
+            owner, key = entry
+            outputs = self.owners[owner]()
+            del self.resident[entry]
+            if outputs is None:
+                continue
+            del outputs.resident[key]
+            outputs.spilled[key] = spilled
+            mapped = outputs.mapped.pop(key, None)
+            if mapped is not None:
+                self.releaseFile(mapped)
+            self.files[spilled[0]] = self.files.get(spilled[0], 0) + 1
+        if spilled[0] not in self.files:
+            self.removeFile(spilled[0])
+        del self.values[id(stored.value)]
+        self.ram_bytes -= stored.size
+        self.spilling_bytes -= stored.size
+        stored.spilling = False
+        stored.value = None
+        stored.holders = set()
+        self.spills += 1
+        if DEBUG: print("OutputStore: spilled value to", spilled[0])
+
+    def reload(self, outputs: NodeOutputs, key):
+        path, spill_format, device = outputs.spilled.pop(key)
+        value = read_value(path, spill_format, device)
+        if spill_format == SPILL_PICKLE:
+            self.releaseFile(path)
+        else:
+            # the value maps the file, it is released once the value is released or spilled again
+            outputs.mapped[key] = path
+        outputs.resident[key] = value
+        self.reloads += 1
+        self.track(outputs, key, value)
+        return value
+
+    def clear(self):
+        """Release the values of every node and remove the spill directory"""
+        with self.lock:
+            for ref in list(self.owners.values()):
+                outputs = ref()
+                if outputs is not None:
+                    outputs.clear()
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def get_output_store():
+    """
+    Returns the process wide output store, or None if outputs are not budgeted (``output_store_ram_mb: 0``).
+    """
+    if getattr(gs, "output_store", None) is None:
+        ram_mb = getattr(gs, "output_store_ram_mb", 0)
+        if not ram_mb:
+            return None
+        gs.output_store = OutputStore(ram_budget=ram_mb * MB,
+                                      directory=getattr(gs, "output_store_dir", "cache/values"))
+        atexit.register(shutil.rmtree, gs.output_store.directory, True)
+    return gs.output_store
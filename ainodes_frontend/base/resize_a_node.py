@@ -13,7 +13,7 @@ from qtpy.QtWidgets import QGraphicsItem, QWidget, QGraphicsTextItem
 
 from ainodes_frontend import singleton as gs
 from ainodes_frontend.node_engine.node_graphics_edge import QDMGraphicsEdge
-from ainodes_frontend.node_engine.node_graphics_node import BackdropSizer
+from ainodes_frontend.node_engine.node_graphics_node import BackdropSizer, node_resized
 
 
 class QDMGraphicsResizeNode(QGraphicsItem):
@@ -295,6 +295,7 @@ class QDMGraphicsResizeNode(QGraphicsItem):
     def on_sizer_pos_changed(self, pos):
         self._width = pos.x() + self._sizer.size
         self._height = pos.y() + self._sizer.size
+        node_resized(self)
 
     def on_sizer_pos_mouse_release(self):
         size = {
@@ -318,6 +319,7 @@ class QDMGraphicsResizeNode(QGraphicsItem):
     @width.setter
     def width(self, width=0.0):
         self._width = width
+        node_resized(self)
 
     @property
     def height(self):
@@ -326,3 +328,4 @@ class QDMGraphicsResizeNode(QGraphicsItem):
     @height.setter
     def height(self, height=0.0):
         self._height = height
+        node_resized(self)
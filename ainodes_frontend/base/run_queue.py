@@ -0,0 +1,279 @@
+"""
+Persistent, prioritized queue of graph runs.
+
+Jobs are serialized graphs (the ``Scene.serialize()`` format) plus optional per node content overrides. They are
+executed one after another with the headless executor on a background thread, highest priority first and in
+submission order within the same priority. Pending jobs are written to ``queue/jobs.json`` on every change, so
+a crash or restart does not lose a batch; a job that was running when the process died is queued again.
+"""
+import copy
+import json
+import os
+import threading
+import time
+import uuid
+
+from ainodes_frontend import singleton as gs
+from ainodes_frontend.cancellation import CancellationToken, RunCancelled
+from ainodes_frontend.base.node_config import resolve_node_classes
+from ainodes_frontend.base.settings import handle_ainodes_exception
+
+DEBUG = False
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+
+def apply_overrides(data: dict, overrides: dict) -> dict:
+    """
+    Return a copy of serialized graph data with content values replaced.
+
+    Args:
+        data (dict): Serialized scene.
+        overrides (dict): Maps a node id or node title to ``{content name: value}``.
+
+    Returns:
+        dict: The graph data to run.
+    """
+    if not overrides:
+        return data
+    data = copy.deepcopy(data)
+    for node_data in data['nodes']:
+        for key in (node_data['id'], str(node_data['id']), node_data.get('title')):
+            if key in overrides:
+                node_data['content'].update(overrides[key])
+    return data
+
+
+class RunJob:
+    """A single queued graph run"""
+
+    def __init__(self, graph: dict, overrides: dict = None, priority: int = 0, name: str = ""):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.graph = graph
+        self.overrides = overrides or {}
+        self.priority = priority
+        self.status = JOB_PENDING
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.token = CancellationToken()
+        self.sequence = 0
+
+    def __str__(self):
+        return "<RunJob %s '%s' p%d %s>" % (self.id[:8], self.name, self.priority, self.status)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token.is_cancelled
+
+    @property
+    def wait_time(self) -> float:
+        return (self.started_at or time.time()) - self.submitted_at
+
+    @property
+    def run_time(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def serialize(self) -> dict:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'graph': self.graph,
+            'overrides': self.overrides,
+            'priority': self.priority,
+            'submitted_at': self.submitted_at,
+            'sequence': self.sequence,
+        }
+
+    @classmethod
+    def deserialize(cls, data: dict) -> 'RunJob':
+        job = cls(data['graph'], data.get('overrides'), data.get('priority', 0), data.get('name', ""))
+        job.id = data['id']
+        job.submitted_at = data.get('submitted_at', job.submitted_at)
+        job.sequence = data.get('sequence', 0)
+        return job
+
+
+def run_job_headless(job: RunJob):
+    """Default runner, executes the job graph with the headless executor"""
+    from ainodes_frontend.base.headless import HeadlessExecutor, HeadlessGraph
+    graph = HeadlessGraph(apply_overrides(job.graph, job.overrides))
+    HeadlessExecutor(graph, token=job.token).run()
+
+
+class RunQueue:
+    """
+    Args:
+        persist_path (str): File the pending jobs are stored in, None disables persistence.
+        runner (callable): Called with the :class:`RunJob` to execute, on the queue's worker thread.
+    """
+
+    def __init__(self, persist_path: str = "queue/jobs.json", runner=None):
+        self.persist_path = persist_path
+        self.runner = runner if runner is not None else run_job_headless
+        self.jobs = []
+        self.history = []
+        self.current = None
+        self.paused = False
+        self.lock = threading.RLock()
+        self._sequence = 0
+        self._job_finished_listeners = []
+        self.load()
+
+    def addJobFinishedListener(self, callback: 'function'):
+        """Register callback(job), called from the queue's worker thread when a job stops for any reason"""
+        self._job_finished_listeners.append(callback)
+
+    def submit(self, graph: dict, overrides: dict = None, priority: int = 0, name: str = "") -> RunJob:
+        # jobs run on the queue's thread, which must not import node modules
+        resolve_node_classes(graph)
+        job = RunJob(graph, overrides, priority, name)
+        with self.lock:
+            self._sequence += 1
+            job.sequence = self._sequence
+            self.jobs.append(job)
+            self.save()
+        if DEBUG: print("RunQueue: submitted", job)
+        self.start_next_task()
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        with self.lock:
+            if self.current is not None and self.current.id == job_id:
+                self.current.token.cancel()
+                return True
+            for job in self.jobs:
+                if job.id == job_id:
+                    self.jobs.remove(job)
+                    job.token.cancel()
+                    job.status = JOB_CANCELLED
+                    self.history.append(job)
+                    self.save()
+                    return True
+        return False
+
+    def setPriority(self, job_id: str, priority: int) -> bool:
+        with self.lock:
+            for job in self.jobs:
+                if job.id == job_id:
+                    job.priority = priority
+                    self.save()
+                    return True
+        return False
+
+    def pause(self):
+        """Finish the current job, but don't start new ones"""
+        self.paused = True
+
+    def resume(self):
+        # restored jobs were never submitted in this session
+        for job in self.pending():
+            resolve_node_classes(job.graph)
+        self.paused = False
+        self.start_next_task()
+
+    def pending(self) -> list:
+        with self.lock:
+            return sorted(self.jobs, key=lambda job: (-job.priority, job.sequence))
+
+    def start_next_task(self):
+        with self.lock:
+            if self.paused or self.current is not None or not self.jobs:
+                return
+            job = self.pending()[0]
+            self.jobs.remove(job)
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+            self.current = job
+        threading.Thread(target=self.runJob, args=(job,), daemon=True, name="RunQueue").start()
+
+    def runJob(self, job: RunJob):
+        if DEBUG: print("RunQueue: starting", job)
+        try:
+            self.runner(job)
+            job.status = JOB_CANCELLED if job.cancelled else JOB_DONE
+        except RunCancelled:
+            job.status = JOB_CANCELLED
+        except Exception as e:
+            handle_ainodes_exception()
+            job.status = JOB_FAILED
+            job.error = str(e)
+        job.finished_at = time.time()
+        job.graph = None
+        with self.lock:
+            self.current = None
+            self.history.append(job)
+            self.save()
+        for callback in self._job_finished_listeners:
+            try:
+                callback(job)
+            except Exception:
+                handle_ainodes_exception()
+        self.start_next_task()
+
+    def stats(self) -> dict:
+        """Throughput and wait time figures over the jobs finished in this session"""
+        with self.lock:
+            finished = [job for job in self.history if job.started_at is not None]
+            done = [job for job in finished if job.status == JOB_DONE]
+            waits = [job.wait_time for job in finished]
+            runs = [job.run_time for job in done]
+            span = (max(job.finished_at for job in finished) - min(job.started_at for job in finished)) if finished else 0
+            return {
+                'pending': len(self.jobs),
+                'running': 1 if self.current is not None else 0,
+                'done': len(done),
+                'failed': len([job for job in self.history if job.status == JOB_FAILED]),
+                'cancelled': len([job for job in self.history if job.status == JOB_CANCELLED]),
+                'jobs_per_hour': len(done) / span * 3600 if span > 0 else 0.0,
+                'avg_wait': sum(waits) / len(waits) if waits else 0.0,
+                'max_wait': max(waits) if waits else 0.0,
+                'avg_run': sum(runs) / len(runs) if runs else 0.0,
+            }
+
+    def save(self):
+        if self.persist_path is None:
+            return
+        with self.lock:
+            jobs = list(self.jobs)
+            if self.current is not None and self.current.graph is not None:
+                # stored as pending, so it runs again after a crash
+                jobs.append(self.current)
+            data = [job.serialize() for job in jobs]
+        directory = os.path.dirname(self.persist_path)
+        if directory: os.makedirs(directory, exist_ok=True)
+        temp_path = self.persist_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(json.dumps(data))
+        os.replace(temp_path, self.persist_path)
+
+    def load(self):
+        if self.persist_path is None or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as file:
+                data = json.loads(file.read())
+        except (OSError, json.JSONDecodeError):
+            handle_ainodes_exception()
+            return
+        self.jobs = [RunJob.deserialize(job_data) for job_data in data]
+        self._sequence = max([job.sequence for job in self.jobs], default=0)
+        if self.jobs:
+            print(f"Restored {len(self.jobs)} pending job(s) from {self.persist_path}")
+            # restored jobs wait for an explicit resume, nobody asked to run them in this session yet
+            self.paused = True
+
+
+def get_run_queue() -> RunQueue:
+    """Returns the process wide run queue"""
+    if getattr(gs, "run_queue", None) is None:
+        gs.run_queue = RunQueue()
+    return gs.run_queue
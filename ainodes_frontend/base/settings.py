@@ -121,6 +121,16 @@ def load_settings():
         except:
             setup_defaults()
             save_settings()
+        gs.output_cache_ram_mb = settings.get('output_cache_ram_mb', 4096)
+        gs.output_cache_disk_mb = settings.get('output_cache_disk_mb', 0)
+        gs.output_cache_dir = settings.get('output_cache_dir', 'cache/outputs')
+        gs.output_store_ram_mb = settings.get('output_store_ram_mb', 8192)
+        gs.output_store_dir = settings.get('output_store_dir', 'cache/values')
+        gs.autosave_interval_s = settings.get('autosave_interval_s', 60)
+        gs.autosave_dir = settings.get('autosave_dir', 'cache/recovery')
+        gs.autosave_keep = settings.get('autosave_keep', 5)
+        gs.lod_content_zoom = settings.get('lod_content_zoom', 0.5)
+        gs.lod_box_zoom = settings.get('lod_box_zoom', 0.25)
 
         
 def setup_defaults():
@@ -186,6 +196,9 @@ def init_globals():
     gs.loaded_kandinsky = ""
     gs.loaded_hypernetworks = []
     gs.threads = {}
+    gs.output_cache = None
+    gs.output_store = None
+    gs.run_queue = None
     gs.help_items = get_help()
     try:
         import xformers
@@ -0,0 +1,152 @@
+"""
+Node execution tracing.
+
+Enabled with ``--trace PATH``. Every node evaluation (``AiNode.evalImplementationThreadHandler``) and every
+``Worker.run`` is recorded with its wall time, thread, queue wait, output size and CUDA memory before and after.
+At exit the events are written to ``PATH`` in the Chrome trace-event format (open it in ``chrome://tracing`` or
+https://ui.perfetto.dev) and a per-node summary table is printed and saved next to it.
+
+When tracing is off :data:`TRACER` is ``None`` and the instrumented call sites only pay for that check.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+from ainodes_frontend.base.output_cache import estimate_size
+
+TRACER = None
+
+
+def cuda_memory_allocated() -> int:
+    # torch is only looked up, tracing must never be the reason it gets imported
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        return torch.cuda.memory_allocated()
+    return 0
+
+
+class Tracer:
+    """
+    Args:
+        path (str): Where the Chrome trace json is written by :meth:`export`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.origin = time.perf_counter()
+        self.events = []
+        self.thread_names = {}
+        self.lock = threading.Lock()
+
+    def timestamp(self, perf_counter: float) -> float:
+        """Microseconds since the tracer was created, the unit trace events use"""
+        return (perf_counter - self.origin) * 1e6
+
+    def addEvent(self, name: str, category: str, start: float, end: float, args: dict):
+        thread = threading.current_thread()
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': self.timestamp(start),
+            'dur': (end - start) * 1e6,
+            'pid': os.getpid(),
+            'tid': thread.ident,
+            'args': args,
+        }
+        with self.lock:
+            self.events.append(event)
+            self.thread_names[thread.ident] = thread.name
+
+    def traceNode(self, node, fn):
+        """Run ``fn`` (the node's evaluation) and record it"""
+        memory_before = cuda_memory_allocated()
+        start = time.perf_counter()
+        result = None
+        try:
+            result = fn()
+            return result
+        finally:
+            end = time.perf_counter()
+            self.addEvent(node.title, "node", start, end, {
+                'class': node.__class__.__name__,
+                'node_id': node.id,
+                'output_bytes': estimate_size(result),
+                'cuda_before': memory_before,
+                'cuda_after': cuda_memory_allocated(),
+            })
+
+    def traceWorker(self, worker, fn):
+        """Run ``fn`` (the worker's body) and record it together with the time it spent waiting in the pool"""
+        start = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            end = time.perf_counter()
+            name = getattr(worker.fn, "__qualname__", None) or getattr(worker.fn, "__name__", None) or repr(worker.fn)
+            self.addEvent(name, "worker", start, end, {
+                'queue_wait_ms': (start - worker.queued_at) * 1000 if worker.queued_at is not None else None,
+            })
+
+    def summary(self) -> list:
+        """Per node rows of (title, class, calls, total ms, mean ms, max ms, output MB, CUDA delta MB), slowest first"""
+        rows = {}
+        with self.lock:
+            events = [event for event in self.events if event['cat'] == "node"]
+        for event in events:
+            key = (event['name'], event['args']['class'])
+            row = rows.setdefault(key, [0, 0.0, 0.0, 0, 0])
+            duration = event['dur'] / 1000
+            row[0] += 1
+            row[1] += duration
+            row[2] = max(row[2], duration)
+            row[3] += event['args']['output_bytes']
+            row[4] += event['args']['cuda_after'] - event['args']['cuda_before']
+        table = []
+        for (title, class_name), (calls, total, longest, output_bytes, cuda_delta) in rows.items():
+            table.append((title, class_name, calls, total, total / calls, longest,
+                          output_bytes / (1024 * 1024), cuda_delta / (1024 * 1024)))
+        table.sort(key=lambda row: row[3], reverse=True)
+        return table
+
+    def formatSummary(self) -> str:
+        lines = ["%-32s %-28s %6s %11s %10s %10s %10s %10s" % (
+            "node", "class", "calls", "total ms", "mean ms", "max ms", "out MB", "cuda MB")]
+        for row in self.summary():
+            lines.append("%-32.32s %-28.28s %6d %11.1f %10.1f %10.1f %10.1f %10.1f" % row)
+        return "\n".join(lines)
+
+    def export(self):
+        with self.lock:
+            events = list(self.events)
+            thread_names = dict(self.thread_names)
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}}
+                    for tid, name in thread_names.items()]
+        directory = os.path.dirname(self.path)
+        if directory: os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write(json.dumps({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}))
+        summary = self.formatSummary()
+        with open(os.path.splitext(self.path)[0] + "_summary.txt", "w", encoding="utf-8") as file:
+            file.write(summary + "\n")
+        print(f"Trace with {len(events)} events written to {self.path}")
+        print(summary)
+
+
+def enable_tracing(path: str) -> Tracer:
+    """
+    Start recording node executions, the trace is exported when the process exits.
+
+    Args:
+        path (str): Output path of the Chrome trace json.
+
+    Returns:
+        Tracer: The active tracer.
+    """
+    global TRACER
+    TRACER = Tracer(path)
+    atexit.register(TRACER.export)
+    return TRACER
@@ -1,8 +1,11 @@
 import sys
+import time
 import traceback
 
 from qtpy.QtCore import Slot, QRunnable, Signal, QObject
 
+from ainodes_frontend.base import tracing
+
 
 class WorkerSignals(QObject):
     """
@@ -53,6 +56,8 @@ class Worker(QRunnable):
         self.kwargs = kwargs
         self.signals = WorkerSignals()
         self.lock = lock
+        # only needed to report the time spent waiting in the pool
+        self.queued_at = time.perf_counter() if tracing.TRACER is not None else None
         # Add the callback to our kwargs
         #self.kwargs["progress_callback"] = self.signals.progress
 
@@ -64,7 +69,10 @@ class Worker(QRunnable):
 
         # Retrieve args/kwargs here; and fire processing using them
         try:
-            result = self.fn(*self.args, **self.kwargs)
+            if tracing.TRACER is not None:
+                result = tracing.TRACER.traceWorker(self, lambda: self.fn(*self.args, **self.kwargs))
+            else:
+                result = self.fn(*self.args, **self.kwargs)
         except:
             traceback.print_exc()
             exctype, value = sys.exc_info()[:2]
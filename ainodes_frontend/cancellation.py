@@ -0,0 +1,71 @@
+"""
+Per-run cancellation.
+
+Every run (a :class:`~ainodes_frontend.base.graph_scheduler.GraphScheduler` run, a headless run, a queued job)
+owns a :class:`CancellationToken`. The executor activates the token on the thread evaluating a node, and long
+loops such as sampler steps call :func:`check_cancelled` between iterations, which raises :class:`RunCancelled`
+once the run's token was cancelled. Tokens are thread local, so cancelling one run never stops another.
+
+This module has no Qt or torch dependency, so it can be imported from the samplers in ``ldm``.
+"""
+import gc
+import sys
+import threading
+from contextlib import contextmanager
+
+
+class RunCancelled(BaseException):
+    """
+    Raised in the thread of a cancelled run. Like ``KeyboardInterrupt`` it derives from ``BaseException``, so the
+    ``except Exception`` blocks in node and sampler code do not swallow it.
+    """
+
+
+class CancellationToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+
+    def raiseIfCancelled(self):
+        if self._event.is_set():
+            raise RunCancelled()
+
+
+_local = threading.local()
+
+
+def current_token():
+    """Returns the token of the run the calling thread works for, or None"""
+    return getattr(_local, "token", None)
+
+
+@contextmanager
+def activate(token: CancellationToken):
+    """Make ``token`` the current token of the calling thread for the duration of the block"""
+    previous = getattr(_local, "token", None)
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+def check_cancelled():
+    """Raise :class:`RunCancelled` if the run the calling thread works for was cancelled, meant for loop bodies"""
+    token = getattr(_local, "token", None)
+    if token is not None and token._event.is_set():
+        raise RunCancelled()
+
+
+def release_memory():
+    """Give memory held by a cancelled run back right away, instead of at the next allocation"""
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the scene level adjacency index.
+
+Every complete :class:`~node_engine.node_edge.Edge` (both sockets set) is registered under the node and socket index
+on each of its ends, so the traversal helpers of :class:`~node_engine.node_node.Node` are dictionary lookups instead of
+walks over ``socket.edges``. Node lists handed out by the index are cached until an edge of that node changes.
+"""
+
+DEBUG = False
+
+
+class AdjacencyIndex:
+    """
+    Upstream and downstream connections of every node, keyed by socket index.
+
+    :Instance Attributes:
+
+        - **upstream** - ``{node: {input index: {edge: output socket on the other end}}}``
+        - **downstream** - ``{node: {output index: {edge: input socket on the other end}}}``
+    """
+
+    def __init__(self):
+        self.upstream = {}
+        self.downstream = {}
+        self._inputs_cache = {}
+        self._outputs_cache = {}
+        self._children_cache = {}
+
+    @staticmethod
+    def endpoints(edge: 'Edge'):
+        """
+        Return the (output socket, input socket) pair of an ``Edge`` or ``None`` if it is not connected on both ends
+        """
+        start_socket, end_socket = edge.start_socket, edge.end_socket
+        if start_socket is None or end_socket is None:
+            return None
+        if start_socket.is_output:
+            return start_socket, end_socket
+        return end_socket, start_socket
+
+    def addEdge(self, edge: 'Edge'):
+        sockets = self.endpoints(edge)
+        if sockets is None: return
+        output_socket, input_socket = sockets
+        self.downstream.setdefault(output_socket.node, {}).setdefault(output_socket.index, {})[edge] = input_socket
+        self.upstream.setdefault(input_socket.node, {}).setdefault(input_socket.index, {})[edge] = output_socket
+        self.invalidate(output_socket.node, input_socket.node)
+        if DEBUG: print("AdjacencyIndex: added", edge)
+
+    def removeEdge(self, edge: 'Edge'):
+        sockets = self.endpoints(edge)
+        if sockets is None: return
+        output_socket, input_socket = sockets
+        self._discard(self.downstream, output_socket, edge)
+        self._discard(self.upstream, input_socket, edge)
+        self.invalidate(output_socket.node, input_socket.node)
+        if DEBUG: print("AdjacencyIndex: removed", edge)
+
+    @staticmethod
+    def _discard(side: dict, socket: 'Socket', edge: 'Edge'):
+        by_index = side.get(socket.node)
+        if by_index is None: return
+        connections = by_index.get(socket.index)
+        if connections is None: return
+        connections.pop(edge, None)
+        if not connections:
+            del by_index[socket.index]
+            if not by_index: del side[socket.node]
+
+    def invalidate(self, *nodes):
+        for node in nodes:
+            self._children_cache.pop(node, None)
+            self._inputs_cache.pop(node, None)
+            self._outputs_cache.pop(node, None)
+
+    def firstInput(self, node: 'Node', index: int):
+        """
+        The output socket of the first connection into input ``index`` of ``node`` or ``None``
+        """
+        connections = self.upstream.get(node, {}).get(index)
+        if not connections: return None
+        return next(iter(connections.values()))
+
+    def inputs(self, node: 'Node', index: int) -> list:
+        """Nodes connected to the input ``index`` of ``node``, the returned list is shared and must not be modified"""
+        cache = self._inputs_cache.setdefault(node, {})
+        nodes = cache.get(index)
+        if nodes is None:
+            nodes = [socket.node for socket in self.upstream.get(node, {}).get(index, {}).values()]
+            cache[index] = nodes
+        return nodes
+
+    def outputs(self, node: 'Node', index: int) -> list:
+        """Nodes connected to the output ``index`` of ``node``, the returned list is shared and must not be modified"""
+        cache = self._outputs_cache.setdefault(node, {})
+        nodes = cache.get(index)
+        if nodes is None:
+            nodes = [socket.node for socket in self.downstream.get(node, {}).get(index, {}).values()]
+            cache[index] = nodes
+        return nodes
+
+    def children(self, node: 'Node') -> list:
+        """Nodes connected to any output of ``node``, the returned list is shared and must not be modified"""
+        nodes = self._children_cache.get(node)
+        if nodes is None:
+            by_index = self.downstream.get(node, {})
+            nodes = [socket.node for index in sorted(by_index) for socket in by_index[index].values()]
+            self._children_cache[node] = nodes
+        return nodes
+
+    def parents(self, node: 'Node') -> set:
+        """Distinct nodes connected to any input of ``node``"""
+        return {socket.node for connections in self.upstream.get(node, {}).values() for socket in connections.values()}
+
+    def upstreamConnections(self, node: 'Node') -> dict:
+        """``{input index: {edge: output socket}}`` of ``node``"""
+        return self.upstream.get(node, {})
+
+    def clear(self):
+        self.upstream.clear()
+        self.downstream.clear()
+        self._inputs_cache.clear()
+        self._outputs_cache.clear()
+        self._children_cache.clear()
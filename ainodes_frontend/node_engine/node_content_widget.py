@@ -9,6 +9,101 @@ from qtpy import QtGui
 from qtpy.QtWidgets import QWidget, QLabel, QVBoxLayout, QTextEdit
 
 from ainodes_frontend.node_engine.node_serializable import Serializable
+from ainodes_frontend.node_engine.utils import dumpException
+
+
+def to_bool(value) -> bool:
+    """Checkbox values, older files store them as ``"True"``/``"False"`` strings"""
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1")
+    return bool(value)
+
+
+def to_int(value) -> int:
+    """Spin box and slider values, older files store them as strings"""
+    return int(float(value)) if isinstance(value, str) else int(value)
+
+
+#: (widget class, getter, setter) of the serializable widgets, a widget uses the first class it is an instance of
+FIELD_ACCESSORS = [
+    (QtWidgets.QComboBox, lambda widget: widget.currentText(),
+     lambda widget, value: widget.setCurrentText(str(value))),
+    (QtWidgets.QLineEdit, lambda widget: widget.text(),
+     lambda widget, value: widget.setText(str(value))),
+    (QtWidgets.QTextEdit, lambda widget: widget.toPlainText(),
+     lambda widget, value: widget.setPlainText(str(value))),
+    (QtWidgets.QSpinBox, lambda widget: widget.value(),
+     lambda widget, value: widget.setValue(to_int(value))),
+    (QtWidgets.QDoubleSpinBox, lambda widget: widget.value(),
+     lambda widget, value: widget.setValue(float(value))),
+    (QtWidgets.QSlider, lambda widget: widget.value(),
+     lambda widget, value: widget.setValue(to_int(value))),
+    (QtWidgets.QCheckBox, lambda widget: widget.isChecked(),
+     lambda widget, value: widget.setChecked(to_bool(value))),
+]
+
+_accessors_by_class = {}
+
+
+def field_accessors(widget_class: type):
+    """
+    (getter, setter) pair serializing widgets of ``widget_class`` or ``None`` if they hold no value, resolved once
+    per class
+    """
+    try:
+        return _accessors_by_class[widget_class]
+    except KeyError:
+        accessors = next(((getter, setter) for base, getter, setter in FIELD_ACCESSORS
+                          if issubclass(widget_class, base)), None)
+        _accessors_by_class[widget_class] = accessors
+        return accessors
+
+
+class ContentSchema:
+    """
+    The serializable fields of a content widget, compiled from its ``widget_list``: the widgets in the list and the
+    widgets directly inside the layouts in the list, stored by their `objectName`.
+
+    Serializing walks the compiled fields instead of the layouts, and values keep their type (``int``, ``float``,
+    ``bool``) instead of being stored as strings. Deserializing accepts both.
+    """
+
+    def __init__(self, widget_list: list):
+        self.length = len(widget_list)
+        self.layouts = []
+        self.fields = []
+        for item in widget_list:
+            if isinstance(item, QtWidgets.QLayout):
+                self.layouts.append(item)
+                for i in range(item.count()):
+                    layout_item = item.itemAt(i)
+                    if isinstance(layout_item, QtWidgets.QWidgetItem):
+                        self.addField(layout_item.widget())
+            elif isinstance(item, QtWidgets.QWidget):
+                self.addField(item)
+        self.counts = [layout.count() for layout in self.layouts]
+
+    def addField(self, widget: QWidget):
+        accessors = field_accessors(type(widget))
+        if accessors is not None:
+            self.fields.append((widget.objectName(), widget) + accessors)
+
+    def matches(self, widget_list: list) -> bool:
+        """``False`` if widgets were added to or removed from ``widget_list`` or its layouts since compiling"""
+        return len(widget_list) == self.length and \
+            all(layout.count() == count for layout, count in zip(self.layouts, self.counts))
+
+    def serialize(self) -> dict:
+        return {name: getter(widget) for name, widget, getter, setter in self.fields}
+
+    def deserialize(self, data: dict):
+        for name, widget, getter, setter in self.fields:
+            value = data.get(name)
+            if value is None: continue
+            try:
+                setter(widget, value)
+            except Exception as e:
+                dumpException(e)
 
 
 class QDMNodeContentWidget(QWidget, Serializable):
@@ -17,6 +112,8 @@ class QDMNodeContentWidget(QWidget, Serializable):
 
     """Base class for representation of the Node's graphics content. This class also provides layout
     for other widgets inside of a :py:class:`~node_engine.node_node.Node`"""
+    _content_schema = None
+
     def __init__(self, node:'Node', parent:QWidget=None):
         """
         :param node: reference to the :py:class:`~node_engine.node_node.Node`
@@ -68,98 +165,22 @@ class QDMNodeContentWidget(QWidget, Serializable):
     """def serialize(self) -> OrderedDict:
         return OrderedDict([
         ])"""
-    def serialize(self) -> dict:
-        res = {}
-        for item in self.widget_list:
-            if isinstance(item, QtWidgets.QLayout):
-                for i in range(item.layout().count()):
-                    widget = item.layout().itemAt(i)
-                    if isinstance(widget, QtWidgets.QWidgetItem):
-                        widget = widget.widget()
-                        if isinstance(widget, QtWidgets.QComboBox):
-                            res[f"{widget.objectName()}"] = widget.currentText()
-                            #print(res[f"{widget.objectName()}"])
-                        elif isinstance(widget, QtWidgets.QLineEdit):
-                            res[f"{widget.objectName()}"] = widget.text()
-                        elif isinstance(widget, QtWidgets.QTextEdit):
-                            res[f"{widget.objectName()}"] = widget.toPlainText()
-                        elif isinstance(widget, QtWidgets.QSpinBox) or isinstance(widget, QtWidgets.QDoubleSpinBox):
-                            res[f"{widget.objectName()}"] = str(widget.value())
-                        elif isinstance(widget, QtWidgets.QSlider):
-                            res[f"{widget.objectName()}"] = str(widget.value())
-                        elif isinstance(widget, QtWidgets.QCheckBox):
-                            res[f"{widget.objectName()}"] = str(widget.isChecked())
-            elif isinstance(item, QtWidgets.QWidget):
-                widget = item
-                if isinstance(widget, QtWidgets.QComboBox):
-                    res[f"{widget.objectName()}"] = widget.currentText()
-                    #print(res[f"{widget.objectName()}"])
-                elif isinstance(widget, QtWidgets.QLineEdit):
-                    res[f"{widget.objectName()}"] = widget.text()
-                elif isinstance(widget, QtWidgets.QTextEdit):
-                    res[f"{widget.objectName()}"] = widget.toPlainText()
-                elif isinstance(widget, QtWidgets.QSpinBox) or isinstance(widget, QtWidgets.QDoubleSpinBox):
-                    res[f"{widget.objectName()}"] = str(widget.value())
-                elif isinstance(widget, QtWidgets.QSlider):
-                    res[f"{widget.objectName()}"] = str(widget.value())
-                elif isinstance(widget, QtWidgets.QCheckBox):
-                    res[f"{widget.objectName()}"] = str(widget.isChecked())
-        return res
+    def contentSchema(self) -> 'ContentSchema':
+        """
+        The compiled :class:`ContentSchema` of this content, compiled again when widgets were added since
 
+        :rtype: :class:`ContentSchema`
+        """
+        schema = self._content_schema
+        if schema is None or not schema.matches(self.widget_list):
+            schema = self._content_schema = ContentSchema(self.widget_list)
+        return schema
 
+    def serialize(self) -> dict:
+        return self.contentSchema().serialize()
 
     def deserialize(self, data, hashmap={}, restore_id:bool=True) -> bool:
-        for item in self.widget_list:
-            if isinstance(item, QtWidgets.QLayout):
-                for i in range(item.layout().count()):
-                    widget = item.layout().itemAt(i)
-                    if isinstance(widget, QtWidgets.QWidgetItem):
-                        widget = widget.widget()
-                        try:
-                            value = data[f"{widget.objectName()}"]
-                        except:
-                            value = None
-                        if value is not None:
-                            if isinstance(widget, QtWidgets.QComboBox):
-                                widget.setCurrentText(str(data[f"{widget.objectName()}"]))
-                            elif isinstance(widget, QtWidgets.QLineEdit):
-                                widget.setText(str(data[f"{widget.objectName()}"]))
-                            elif isinstance(widget, QTextEdit):
-                                widget.setPlainText(str(data[f"{widget.objectName()}"]))
-                            elif isinstance(widget, QtWidgets.QSpinBox):
-                                widget.setValue(int(data[f"{widget.objectName()}"]))
-                            elif isinstance(widget, QtWidgets.QDoubleSpinBox):
-                                widget.setValue(float(data[f"{widget.objectName()}"]))
-                            elif isinstance(widget, QtWidgets.QSlider):
-                                widget.setValue(data[f"{widget.objectName()}"])
-                            elif isinstance(widget, QtWidgets.QCheckBox):
-                                widget.setChecked(bool(data[f"{widget.objectName()}"]))
-            elif isinstance(item, QtWidgets.QWidget):
-                widget = item
-                try:
-                    value = data[f"{widget.objectName()}"]
-                except:
-                    value = None
-
-                if value is not None:
-                    if isinstance(widget, QtWidgets.QComboBox):
-                        try:
-                            widget.setCurrentText(data[f"{widget.objectName()}"])
-                        except:
-                            pass
-                    elif isinstance(widget, QtWidgets.QLineEdit):
-                        widget.setText(str(data[f"{widget.objectName()}"]))
-                    elif isinstance(widget, QTextEdit):
-                        widget.setPlainText(str(data[f"{widget.objectName()}"]))
-                    elif isinstance(widget, QtWidgets.QSpinBox):
-                        widget.setValue(int(data[f"{widget.objectName()}"]))
-                    elif isinstance(widget, QtWidgets.QDoubleSpinBox):
-                        widget.setValue(float(data[f"{widget.objectName()}"]))
-                    elif isinstance(widget, QtWidgets.QSlider):
-                        widget.setValue(data[f"{widget.objectName()}"])
-                    elif isinstance(widget, QtWidgets.QCheckBox):
-                        if value is not None:
-                            widget.setChecked(True) if value == "True" else widget.setChecked(False)
+        self.contentSchema().deserialize(data)
         return True
 
         """#try:
@@ -244,6 +265,24 @@ class QDMNodeContentWidget(QWidget, Serializable):
             self.node.markDirty(True)
             self.node.eval()"""
 
+    def connect_change_signal(self, widget):
+        """Emit mark_dirty_signal whenever the user changes the value of the given widget.
+
+        Args:
+            widget (QtWidgets.QWidget): Input widget created by one of the create_* helpers.
+        """
+        if isinstance(widget, QtWidgets.QComboBox):
+            signal = widget.currentTextChanged
+        elif isinstance(widget, (QtWidgets.QLineEdit, QtWidgets.QTextEdit)):
+            signal = widget.textChanged
+        elif isinstance(widget, (QtWidgets.QSpinBox, QtWidgets.QDoubleSpinBox, QtWidgets.QSlider)):
+            signal = widget.valueChanged
+        elif isinstance(widget, QtWidgets.QCheckBox):
+            signal = widget.stateChanged
+        else:
+            return
+        signal.connect(lambda *args: self.mark_dirty_signal.emit())
+
     def create_combo_box(self, items, label_text, accessible_name=None) -> QtWidgets.QComboBox:
         """Create a combo box widget with the given items and label text.
 
@@ -265,6 +304,7 @@ class QDMNodeContentWidget(QWidget, Serializable):
         layout.addWidget(label)
         layout.addWidget(combo_box)
         combo_box.layout = layout
+        self.connect_change_signal(combo_box)
         self.widget_list.append(combo_box)
         return combo_box
 
@@ -290,6 +330,7 @@ class QDMNodeContentWidget(QWidget, Serializable):
         layout.addWidget(label)
         layout.addWidget(line_edit)
         line_edit.layout = layout
+        self.connect_change_signal(line_edit)
         self.widget_list.append(line_edit)
         return line_edit
     def create_text_edit(self, label_text, placeholder="") -> QtWidgets.QTextEdit:
@@ -309,6 +350,7 @@ class QDMNodeContentWidget(QWidget, Serializable):
         layout.addWidget(label)
         layout.addWidget(line_edit)
         line_edit.layout = layout
+        self.connect_change_signal(line_edit)
         self.widget_list.append(line_edit)
         return line_edit
 
@@ -376,6 +418,7 @@ class QDMNodeContentWidget(QWidget, Serializable):
         layout.addWidget(label)
         layout.addWidget(spin_box)
         spin_box.layout = layout
+        self.connect_change_signal(spin_box)
         self.widget_list.append(spin_box)
         return spin_box
     def create_double_spin_box(self, label_text:str, min_val:float =0.0, max_val:float=10.0, step:float=0.01, default_val:float=1.0, accessible_name=None ) -> QtWidgets.QDoubleSpinBox:
@@ -404,6 +447,7 @@ class QDMNodeContentWidget(QWidget, Serializable):
         layout.addWidget(label)
         layout.addWidget(double_spin_box)
         double_spin_box.layout = layout
+        self.connect_change_signal(double_spin_box)
         self.widget_list.append(double_spin_box)
         return double_spin_box
 
@@ -430,6 +474,7 @@ class QDMNodeContentWidget(QWidget, Serializable):
         palette.setColor(QtGui.QPalette.WindowText, QtGui.QColor("white"))
         palette.setColor(QtGui.QPalette.Disabled, QtGui.QPalette.WindowText, QtGui.QColor("black"))
         check_box.setPalette(palette)
+        self.connect_change_signal(check_box)
         self.widget_list.append(check_box)
         return check_box
 
@@ -451,6 +496,7 @@ class QDMNodeContentWidget(QWidget, Serializable):
                 palette.setColor(QtGui.QPalette.Disabled, QtGui.QPalette.WindowText, QtGui.QColor("black"))
                 widget.setPalette(palette)
             button_layout.addWidget(widget)
+            self.connect_change_signal(widget)
         self.widget_list.append(button_layout)
         return button_layout
 
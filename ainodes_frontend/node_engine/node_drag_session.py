@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the node drag session.
+
+Dragging a selection used to walk every node of the scene on each mouse move and refresh the edges of every selected
+node, so an edge between two selected nodes was recalculated twice per event and mouse moves arriving faster than the
+display refreshes were all turned into geometry updates. A :class:`NodeDragSession` collects the dragged nodes and the
+distinct edges touching them once, when the drag starts, and refreshes those edges at most once per display frame.
+History and the `modified` flag are left to the release of the mouse button.
+"""
+import math
+import time
+
+from qtpy.QtCore import QTimer
+from qtpy.QtGui import QGuiApplication
+
+DEBUG = False
+
+#: refresh rate assumed when the screen does not report one
+DEFAULT_REFRESH_RATE = 60.0
+
+
+def frame_interval_ms() -> float:
+    """Duration of one display frame of the primary screen in milliseconds"""
+    screen = QGuiApplication.primaryScreen()
+    rate = screen.refreshRate() if screen is not None else 0
+    return 1000.0 / (rate if rate > 1 else DEFAULT_REFRESH_RATE)
+
+
+class NodeDragSession:
+    """
+    Edge updates of one drag of a node selection
+
+    :param scene: reference to the :class:`~node_engine.node_scene.Scene`
+    :param node: :class:`~node_engine.node_node.Node` grabbed by the mouse, dragged even if it is not selected
+
+    :Instance Attributes:
+
+        - **nodes** - `Nodes` moved by this drag
+        - **edges** - distinct `Edges` connected to any of the moved `Nodes`
+    """
+
+    def __init__(self, scene: 'Scene', node: 'Node' = None):
+        self.scene = scene
+        self.nodes = [item.node for item in scene.grScene.selectedItems()
+                      if hasattr(item, 'node') and item.node in scene.nodes]
+        if node is not None and node not in self.nodes:
+            self.nodes.append(node)
+
+        edges = {}
+        for moved in self.nodes:
+            for socket in moved.inputs + moved.outputs:
+                for edge in socket.edges:
+                    edges[edge] = None
+        self.edges = list(edges)
+
+        self.interval_ms = frame_interval_ms()
+        self.last_update = 0.0
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.update)
+        if DEBUG: print("NodeDragSession: %d nodes, %d edges" % (len(self.nodes), len(self.edges)))
+
+    def moved(self):
+        """The dragged `Nodes` moved, refresh their edges now or with the next frame"""
+        remaining = self.interval_ms - (time.perf_counter() - self.last_update) * 1000
+        if remaining <= 0:
+            self.update()
+        elif not self.timer.isActive():
+            self.timer.start(int(math.ceil(remaining)))
+
+    def update(self):
+        """Refresh every edge of the session once"""
+        self.timer.stop()
+        self.last_update = time.perf_counter()
+        spatial_index = self.scene.spatial_index
+        for node in self.nodes:
+            spatial_index.nodeMoved(node)
+        for edge in self.edges:
+            # an edge removed while dragging, e.g. by a node reacting to the move
+            if edge.start_socket is None: continue
+            edge.updatePositions()
+
+    def finish(self):
+        """The drag ended, bring every edge to the final positions"""
+        self.update()
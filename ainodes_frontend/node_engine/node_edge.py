@@ -73,6 +73,9 @@ class Edge(Serializable):
 
     @start_socket.setter
     def start_socket(self, value):
+        # the adjacency index only knows complete edges, take us out while the ends change
+        self.scene.adjacency.removeEdge(self)
+
         # if we were assigned to some socket before, delete us from the socket
         if self._start_socket is not None:
             self._start_socket.removeEdge(self)
@@ -83,6 +86,8 @@ class Edge(Serializable):
         if self.start_socket is not None:
             self.start_socket.addEdge(self)
 
+        self.scene.adjacency.addEdge(self)
+
     @property
     def end_socket(self):
         """
@@ -96,6 +101,8 @@ class Edge(Serializable):
 
     @end_socket.setter
     def end_socket(self, value):
+        self.scene.adjacency.removeEdge(self)
+
         # if we were assigned to some socket before, delete us from the socket
         if self._end_socket is not None:
             self._end_socket.removeEdge(self)
@@ -106,6 +113,8 @@ class Edge(Serializable):
         if self.end_socket is not None:
             self.end_socket.addEdge(self)
 
+        self.scene.adjacency.addEdge(self)
+
     @property
     def edge_type(self):
         """
@@ -166,6 +175,10 @@ class Edge(Serializable):
         elif self.end_socket == from_socket:
             self.end_socket = to_socket
 
+    def onIdChanged(self, old_id):
+        """Keep the `Scene` id index pointing at this `Edge`"""
+        self.scene.edges.reindex(self, old_id)
+
     def getGraphicsEdgeClass(self):
         """Returns the class representing Graphics Edge"""
         return QDMGraphicsEdge
@@ -229,7 +242,7 @@ class Edge(Serializable):
         self.start_socket = None
 
 
-    def remove(self, silent_for_socket:'Socket'=None, silent=False):
+    def remove(self, silent_for_socket:'Socket'=None, silent=False, update_scene=True):
         """
         Safely remove this Edge.
 
@@ -246,6 +259,8 @@ class Edge(Serializable):
         :type silent_for_socket: :class:`~nodeeditor.node_socket.Socket`
         :param silent: ``True`` if no events should be triggered during removing
         :type silent: ``bool``
+        :param update_scene: ``False`` when many items are removed at once and the caller repaints afterwards
+        :type update_scene: ``bool``
         """
         old_sockets = [self.start_socket, self.end_socket]
 
@@ -258,7 +273,7 @@ class Edge(Serializable):
         self.scene.grScene.removeItem(self.grEdge)
         if DEBUG: print("   grEdge:", self.grEdge)
 
-        self.scene.grScene.update()
+        if update_scene: self.scene.grScene.update()
 
         if DEBUG: print("# Removing Edge", self)
         if DEBUG: print(" - remove edge from all sockets")
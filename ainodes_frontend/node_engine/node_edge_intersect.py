@@ -106,13 +106,13 @@ class EdgeIntersect:
         :type scene_pos_y: `float`
         """
         rect = self.hotZoneRect(self.draggedNode)
-        grItems = self.grScene.items(rect)
+        edges = self.grScene.scene.spatial_index.edgesIn(rect)
         for grEdge in self.hoveredList: grEdge.hovered = False
         self.hoveredList = []
-        for grItem in grItems:
-            if hasattr(grItem, 'edge') and not self.draggedNode.hasConnectedEdge(grItem.edge):
-                self.hoveredList.append(grItem)
-                grItem.hovered = True
+        for edge in edges:
+            if not self.draggedNode.hasConnectedEdge(edge):
+                self.hoveredList.append(edge.grEdge)
+                edge.grEdge.hovered = True
 
     def intersect(self, node_box: 'QRectF') -> 'Edge':
         """
@@ -124,10 +124,9 @@ class EdgeIntersect:
         :rtype: :class:`~nodeeditor.node_edge.Edge`
         """
         # returns the first edge that intersects with the dropped node, ignores the rest
-        grItems = self.grScene.items(node_box)
-        for grItem in grItems:
-            if hasattr(grItem, 'edge') and not self.draggedNode.hasConnectedEdge(grItem.edge):
-                return grItem.edge
+        for edge in self.grScene.scene.spatial_index.edgesIn(node_box):
+            if not self.draggedNode.hasConnectedEdge(edge):
+                return edge
         return None
 
     def isConnected(self, node: 'Node'):
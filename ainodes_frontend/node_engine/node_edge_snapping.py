@@ -33,8 +33,7 @@ class EdgeSnapping():
             scenepos.x() - self.edge_snapping_radius, scenepos.y() - self.edge_snapping_radius,
             self.edge_snapping_radius * 2, self.edge_snapping_radius * 2
         )
-        items = self.grScene.items(scanrect)
-        items = list(filter(lambda x: isinstance(x, QDMGraphicsSocket), items))
+        items = self.grScene.scene.spatial_index.socketsIn(scanrect)
 
         if len(items) == 0:
             return None, scenepos
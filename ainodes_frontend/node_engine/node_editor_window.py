@@ -91,7 +91,7 @@ class NodeEditorWindow(QMainWindow):
 
 
         # List all JSON files in the graphs and example_graphs folders
-        graphs_files = [f for f in os.listdir('graphs') if f.endswith('.json')]
+        graphs_files = [f for f in os.listdir('graphs') if f.endswith(('.json', '.aigraph'))]
         #example_graphs_files = [f for f in os.listdir('example_graphs') if f.endswith('.json')]
 
         # Add JSON files to the submenus and connect actions
@@ -255,7 +255,7 @@ class NodeEditorWindow(QMainWindow):
 
     def getFileDialogFilter(self):
         """Returns ``str`` standard file open/save filter for ``QFileDialog``"""
-        return 'Graph (*.json);;All files (*)'
+        return 'Graph (*.json *.aigraph);;Binary graph (*.aigraph);;All files (*)'
 
     def onFileNew(self):
         """Hande File New operation"""
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the compact binary graph file format (``.aigraph``).
+
+Layout::
+
+    b"AIGB"  uint16 version  uint16 flags
+    record*  uint8 type  uint32 length  payload[length]
+
+Records appear in this order: one ``SCENE`` record, then for every node a ``NODE`` record immediately followed by
+its ``CONTENT`` record, then the ``EDGE`` records and a final ``END`` record. Scene, node and content payloads are
+compact json; edges are packed structs (``EDGE_JSON`` is used for edges whose ids do not fit). All integers are
+little endian.
+
+Because every record is self contained, files can be read as a stream with :func:`read_graph_records`, building each
+node while the rest of the file is still being parsed. The module has no Qt dependency.
+"""
+import json
+import struct
+
+MAGIC = b"AIGB"
+VERSION = 1
+EXTENSION = ".aigraph"
+
+REC_END = 0
+REC_SCENE = 1
+REC_NODE = 2
+REC_CONTENT = 3
+REC_EDGE = 4
+REC_EDGE_JSON = 5
+
+_HEADER = struct.Struct("<4sHH")
+_RECORD = struct.Struct("<BI")
+# edge id, start socket id, end socket id, edge type
+_EDGE = struct.Struct("<qqqB")
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+class InvalidBinaryGraph(Exception): pass
+
+
+def _encode_json(value) -> bytes:
+    return json.dumps(value, separators=(',', ':')).encode("utf-8")
+
+
+def _fits_edge_struct(edge_data: dict) -> bool:
+    for key in ('id', 'start', 'end'):
+        value = edge_data.get(key)
+        if not isinstance(value, int) or isinstance(value, bool) or not _INT64_MIN <= value <= _INT64_MAX:
+            return False
+    return 0 <= edge_data.get('edge_type', 0) <= 255
+
+
+def is_binary_graph(filename: str) -> bool:
+    """Return ``True`` if ``filename`` starts with the binary graph magic"""
+    with open(filename, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def write_record(file, record_type: int, payload: bytes):
+    file.write(_RECORD.pack(record_type, len(payload)))
+    file.write(payload)
+
+
+def write_graph(file, data: dict):
+    """
+    Write ``Scene.serialize()`` data to a binary file object
+
+    :param file: file opened for binary writing
+    :param data: serialized scene
+    :type data: ``dict``
+    """
+    file.write(_HEADER.pack(MAGIC, VERSION, 0))
+    scene_data = {key: value for key, value in data.items() if key not in ('nodes', 'edges')}
+    write_record(file, REC_SCENE, _encode_json(scene_data))
+    for node_data in data['nodes']:
+        node_record = {key: value for key, value in node_data.items() if key != 'content'}
+        write_record(file, REC_NODE, _encode_json(node_record))
+        write_record(file, REC_CONTENT, _encode_json(node_data.get('content', {})))
+    for edge_data in data['edges']:
+        if _fits_edge_struct(edge_data):
+            write_record(file, REC_EDGE, _EDGE.pack(edge_data['id'], edge_data['start'], edge_data['end'],
+                                                    edge_data.get('edge_type', 0)))
+        else:
+            write_record(file, REC_EDGE_JSON, _encode_json(edge_data))
+    write_record(file, REC_END, b"")
+
+
+def _read_exact(file, size: int) -> bytes:
+    chunk = file.read(size)
+    if len(chunk) != size:
+        raise InvalidBinaryGraph("Unexpected end of file")
+    return chunk
+
+
+def read_graph_records(file):
+    """
+    Parse a binary graph file object record by record
+
+    :param file: file opened for binary reading
+    :return: generator of ``('scene', dict)``, ``('node', dict)`` and ``('edge', dict)`` tuples in file order, node
+        dicts include their content
+    :raises: :class:`InvalidBinaryGraph` if the file is not a binary graph or is truncated
+    """
+    magic, version, flags = _HEADER.unpack(_read_exact(file, _HEADER.size))
+    if magic != MAGIC:
+        raise InvalidBinaryGraph("Not a binary graph file")
+    if version > VERSION:
+        raise InvalidBinaryGraph("Binary graph version %d is newer than the supported version %d" % (version, VERSION))
+
+    node_data = None
+    while True:
+        record_type, length = _RECORD.unpack(_read_exact(file, _RECORD.size))
+        payload = _read_exact(file, length)
+        if record_type == REC_END:
+            break
+        if record_type == REC_CONTENT:
+            if node_data is None:
+                raise InvalidBinaryGraph("Content record without a node")
+            node_data['content'] = json.loads(payload)
+            yield 'node', node_data
+            node_data = None
+            continue
+        if node_data is not None:
+            # node written without a content record
+            node_data['content'] = {}
+            yield 'node', node_data
+            node_data = None
+        if record_type == REC_SCENE:
+            yield 'scene', json.loads(payload)
+        elif record_type == REC_NODE:
+            node_data = json.loads(payload)
+        elif record_type == REC_EDGE:
+            edge_id, start, end, edge_type = _EDGE.unpack(payload)
+            yield 'edge', {'id': edge_id, 'edge_type': edge_type, 'start': start, 'end': end}
+        elif record_type == REC_EDGE_JSON:
+            yield 'edge', json.loads(payload)
+        # unknown record types are skipped, newer writers may add optional records
+    if node_data is not None:
+        node_data['content'] = {}
+        yield 'node', node_data
+
+
+def graph_records(data: dict):
+    """The records of already parsed ``Scene.serialize()`` data, in the same order :func:`read_graph_records` yields"""
+    yield 'scene', {key: value for key, value in data.items() if key not in ('nodes', 'edges')}
+    for node_data in data['nodes']:
+        yield 'node', node_data
+    for edge_data in data['edges']:
+        yield 'edge', edge_data
+
+
+def save_graph(filename: str, data: dict):
+    with open(filename, "wb") as file:
+        write_graph(file, data)
+
+
+def load_graph(filename: str) -> dict:
+    """Read a whole binary graph file into ``Scene.serialize()`` data"""
+    data = {'nodes': [], 'edges': []}
+    with open(filename, "rb") as file:
+        for kind, item in read_graph_records(file):
+            if kind == 'scene': data.update(item)
+            else: data[kind + 's'].append(item)
+    return data
@@ -3,12 +3,16 @@
 A module containing the Graphics representation of an Edge
 """
 from qtpy.QtCore import Qt, QRectF, QPointF
-from qtpy.QtGui import QColor, QPen, QPainterPath
+from qtpy.QtGui import QColor, QPen, QPainterPath, QPainter, QPainterPathStroker
 from qtpy.QtWidgets import QGraphicsPathItem, QWidget, QGraphicsItem
 
 from ainodes_frontend.node_engine.node_graphics_edge_path import GraphicsEdgePathBezier, GraphicsEdgePathDirect, \
     GraphicsEdgePathSquare
 from ainodes_frontend.node_engine.node_graphics_socket import SOCKET_COLORS
+from ainodes_frontend.node_engine.node_lod import LOD_REDUCED, painter_level_of_detail
+
+#: width of the stroked shape used for hovering and clicking edges
+EDGE_SHAPE_WIDTH = 10.0
 
 
 class QDMGraphicsEdge(QGraphicsPathItem):
@@ -30,6 +34,10 @@ class QDMGraphicsEdge(QGraphicsPathItem):
 
         self.edge = edge
 
+        # geometry cached until the end points or the path calculator change
+        self._path = None
+        self._shape = None
+
         # create instance of our path class
         self.pathCalculator = self.determineEdgePathClass()(self)
 
@@ -70,6 +78,7 @@ class QDMGraphicsEdge(QGraphicsPathItem):
     def createEdgePathCalculator(self):
         """Create instance of :class:`~node_engine.node_graphics_edge_path.GraphicsEdgePathBase`"""
         self.pathCalculator = self.determineEdgePathClass()(self)
+        self.invalidatePath()
         return self.pathCalculator
 
     def determineEdgePathClass(self):
@@ -148,7 +157,9 @@ class QDMGraphicsEdge(QGraphicsPathItem):
             x -= self.offset
         else:
             x += self.offset
-        self.posSource = [x, y]
+        if self.posSource != [x, y]:
+            self.posSource = [x, y]
+            self.invalidatePath()
 
     def setDestination(self, x:float, y:float):
         """ Set destination point
@@ -163,7 +174,22 @@ class QDMGraphicsEdge(QGraphicsPathItem):
         else:
             x -= self.offset
 
-        self.posDestination = [x, y]
+        if self.posDestination != [x, y]:
+            self.posDestination = [x, y]
+            self.invalidatePath()
+
+    def invalidatePath(self):
+        """Drop the cached path and shape, they are calculated again the next time they are needed"""
+        self.prepareGeometryChange()
+        self._path = None
+        self._shape = None
+        self.edge.scene.spatial_index.edgeMoved(self.edge)
+
+    def edgePath(self) -> QPainterPath:
+        """Returns the cached ``QPainterPath`` of this `Edge`, see :py:meth:`calcPath`"""
+        if self._path is None:
+            self._path = self.calcPath()
+        return self._path
 
     def boundingRect(self) -> QRectF:
         """Defining Qt' bounding rectangle"""
@@ -175,7 +201,11 @@ class QDMGraphicsEdge(QGraphicsPathItem):
         :return: path representation
         :rtype: ``QPainterPath``
         """
-        return self.calcPath()
+        if self._shape is None:
+            stroker = QPainterPathStroker()
+            stroker.setWidth(EDGE_SHAPE_WIDTH)
+            self._shape = stroker.createStroke(self.edgePath())
+        return self._shape
 
     def paint(self, painter, QStyleOptionGraphicsItem, widget=None):
         """Qt's overridden method to paint this Graphics Edge. Path calculated
@@ -183,13 +213,14 @@ class QDMGraphicsEdge(QGraphicsPathItem):
         if self._color == self._default_color:
             self.setColorFromSockets()
 
-        self.setPath(self.calcPath())
+        path = self.edgePath()
 
+        if painter_level_of_detail(painter) >= LOD_REDUCED: painter.setRenderHint(QPainter.Antialiasing, False)
         painter.setBrush(Qt.NoBrush)
 
         if self.hovered and self.edge.end_socket is not None:
             painter.setPen(self._pen_hovered)
-            painter.drawPath(self.path())
+            painter.drawPath(path)
 
         if self.edge.end_socket is None:
             painter.setPen(self._pen_dragging)
@@ -203,7 +234,7 @@ class QDMGraphicsEdge(QGraphicsPathItem):
             pen.setWidth(3)  # Set the width to 3 pixels
             painter.setPen(pen)
 
-        painter.drawPath(self.path())
+        painter.drawPath(path)
 
     def intersectsWith(self, p1:QPointF, p2:QPointF) -> bool:
         """Does this Graphics Edge intersect with the line between point A and point B ?
@@ -217,8 +248,7 @@ class QDMGraphicsEdge(QGraphicsPathItem):
         """
         cutpath = QPainterPath(p1)
         cutpath.lineTo(p2)
-        path = self.calcPath()
-        return cutpath.intersects(path)
+        return cutpath.intersects(self.edgePath())
 
     def calcPath(self) -> QPainterPath:
         """Will handle drawing QPainterPath from Point A to B. Internally there exist self.pathCalculator which
@@ -3,13 +3,22 @@
 A module containing Graphics representation of :class:`~node_engine.node_node.Node`
 """
 from qtpy import QtWidgets, QtCore, QtGui
-from qtpy.QtCore import Qt, QRectF
+from qtpy.QtCore import Qt, QRectF, QTimer
 from qtpy.QtGui import QFont, QColor, QPen, QBrush, QPainterPath
 # from ainodes_frontend.node_engine.node_node import Node
 from qtpy.QtWidgets import QGraphicsItem, QWidget, QGraphicsTextItem
 
 from ainodes_frontend import singleton as gs
 from ainodes_frontend.node_engine.node_graphics_edge import QDMGraphicsEdge
+from ainodes_frontend.node_engine.node_lod import LOD_BOX, LOD_FULL, painter_level_of_detail
+
+
+def node_resized(grNode):
+    """The size of a graphics node changed, its sockets moved with it"""
+    node = getattr(grNode, 'node', None)
+    scene = getattr(node, 'scene', None)
+    spatial_index = getattr(scene, 'spatial_index', None)
+    if spatial_index is not None: spatial_index.nodeMoved(node)
 
 
 class QDMGraphicsNode(QGraphicsItem):
@@ -32,6 +41,7 @@ class QDMGraphicsNode(QGraphicsItem):
         self.hovered = False
         self._was_moved = False
         self._last_selected_state = False
+        self._content_requested = False
 
         self.initSizes()
         self.initAssets()
@@ -69,6 +79,17 @@ class QDMGraphicsNode(QGraphicsItem):
         self.title = self.node.title
 
         self.initContent()
+        self.setLevelOfDetail(self.node.scene.grScene.lod)
+
+    def setLevelOfDetail(self, lod: int):
+        """
+        Show only the child items which are drawn at this level of detail, see :mod:`~node_engine.node_lod`
+
+        :param lod: level of detail tier of the editor view
+        :type lod: ``int``
+        """
+        if self.grContent is not None: self.grContent.setVisible(lod == LOD_FULL)
+        self.title_item.setVisible(lod < LOD_BOX)
 
     def initSizes(self):
         """Set up internal attributes like `width`, `height`, etc."""
@@ -117,20 +138,19 @@ class QDMGraphicsNode(QGraphicsItem):
         """Overridden event to detect that we moved with this `Node`"""
         super().mouseMoveEvent(event)
 
-        # optimize me! just update the selected nodes
-        for node in self.scene().scene.nodes:
-            if node.grNode.isSelected():
-                node.updateConnectedEdges()
+        # edges of the dragged selection are refreshed once per frame
+        self.node.scene.nodeDragSession(self.node).moved()
         self._was_moved = True
 
     def mouseReleaseEvent(self, event):
         """Overriden event to handle when we moved, selected or deselected this `Node`"""
         super().mouseReleaseEvent(event)
+        self.node.scene.endNodeDrag()
 
         # handle when grNode moved
         if self._was_moved:
             self._was_moved = False
-            self.node.scene.history.storeHistory("Node moved", setModified=True)
+            self.node.scene.history.scheduleHistory("Node moved", setModified=True)
 
             self.node.scene.resetLastSelectedStates()
             self.doSelect()     # also trigger itemSelected when node was moved
@@ -190,6 +210,12 @@ class QDMGraphicsNode(QGraphicsItem):
 
     def initContent(self):
         """Set up the `grContent` - ``QGraphicsProxyWidget`` to have a container for `Graphics Content`"""
+        self.grContent = None
+        # lazily created content is attached once the node materializes it
+        if self.node.isContentMaterialized(): self.attachContent()
+
+    def attachContent(self):
+        """Insert the `Node`'s content widget into the scene as `grContent`"""
         if self.content is not None:
             self.content.setGeometry(self.edge_padding, self.title_height + self.edge_padding,
                                  self.width - 2 * self.edge_padding, self.height - 2 * self.edge_padding - self.title_height)
@@ -200,8 +226,24 @@ class QDMGraphicsNode(QGraphicsItem):
         self.grContent.setParentItem(self)
 
 
+    def onContentRequested(self):
+        # the node may have been removed in the meantime
+        if self.node is not None and self.node.grNode is self:
+            self.node.materializeContent()
+
     def paint(self, painter, QStyleOptionGraphicsItem, widget=None):
         """Painting the rounded rectanglar `Node`"""
+        lod = painter_level_of_detail(painter)
+        if lod >= LOD_BOX:
+            painter.setPen(self._pen_selected if self.isSelected() else Qt.NoPen)
+            painter.setBrush(self._brush_title)
+            painter.drawRect(0, 0, self.width, self.height)
+            return
+        if lod == LOD_FULL and not self._content_requested and not self.node.isContentMaterialized():
+            # the node's content is on screen, build its widgets right after this frame
+            self._content_requested = True
+            QTimer.singleShot(0, self.onContentRequested)
+
         # title
         path_title = QPainterPath()
         path_title.setFillRule(Qt.WindingFill)
@@ -239,6 +281,7 @@ class QDMGraphicsNode(QGraphicsItem):
     def on_sizer_pos_changed(self, pos):
         self._width = pos.x() + self._sizer.size
         self._height = pos.y() + self._sizer.size
+        node_resized(self)
 
     def on_sizer_pos_mouse_release(self):
         return
@@ -264,6 +307,7 @@ class QDMGraphicsNode(QGraphicsItem):
     @width.setter
     def width(self, width=0.0):
         self._width = width
+        node_resized(self)
 
     @property
     def height(self):
@@ -272,6 +316,7 @@ class QDMGraphicsNode(QGraphicsItem):
     @height.setter
     def height(self, height=0.0):
         self._height = height
+        node_resized(self)
     def wheelEvent(self, event):
         super().wheelEvent(event)
 
@@ -433,12 +478,10 @@ class QDMGraphicsBGNode(QGraphicsItem):
         """Overridden event to detect that we moved with this `Node`"""
         super().mouseMoveEvent(event)
 
-        # optimize me! just update the selected nodes
+        # edges of the dragged selection are refreshed once per frame
         if self.pressed:
             #print("MOVED WHILE PRESSED")
-            for node in self.scene().scene.nodes:
-                if node.grNode.isSelected():
-                    node.updateConnectedEdges()
+            self.node.scene.nodeDragSession(self.node).moved()
             self._was_moved = True
 
     def mouseDoubleClickEvent(self, event):
@@ -540,6 +583,7 @@ class QDMGraphicsBGNode(QGraphicsItem):
     def on_sizer_pos_changed(self, pos):
         self._width = pos.x() + self._sizer.size
         self._height = pos.y() + self._sizer.size
+        node_resized(self)
 
     def on_sizer_pos_mouse_release(self):
         return
@@ -565,6 +609,7 @@ class QDMGraphicsBGNode(QGraphicsItem):
     @width.setter
     def width(self, width=0.0):
         self._width = width
+        node_resized(self)
 
     @property
     def height(self):
@@ -573,6 +618,7 @@ class QDMGraphicsBGNode(QGraphicsItem):
     @height.setter
     def height(self, height=0.0):
         self._height = height
+        node_resized(self)
 
 class QDMGraphicsBGInfoNode(QGraphicsItem):
     """Class describing Graphics representation of :class:`~node_engine.node_node.Node`"""
@@ -698,10 +744,8 @@ class QDMGraphicsBGInfoNode(QGraphicsItem):
         """Overridden event to detect that we moved with this `Node`"""
         super().mouseMoveEvent(event)
 
-        # optimize me! just update the selected nodes
-        for node in self.scene().scene.nodes:
-            if node.grNode.isSelected():
-                node.updateConnectedEdges()
+        # edges of the dragged selection are refreshed once per frame
+        self.node.scene.nodeDragSession(self.node).moved()
         self._was_moved = True
 
     """def mouseReleaseEvent(self, event):
@@ -827,6 +871,7 @@ class QDMGraphicsBGInfoNode(QGraphicsItem):
     def on_sizer_pos_changed(self, pos):
         self._width = pos.x() + self._sizer.size
         self._height = pos.y() + self._sizer.size
+        node_resized(self)
 
     def on_sizer_pos_mouse_release(self):
         #return
@@ -854,6 +899,7 @@ class QDMGraphicsBGInfoNode(QGraphicsItem):
     @width.setter
     def width(self, width=0.0):
         self._width = width
+        node_resized(self)
 
     @property
     def height(self):
@@ -862,6 +908,7 @@ class QDMGraphicsBGInfoNode(QGraphicsItem):
     @height.setter
     def height(self, height=0.0):
         self._height = height
+        node_resized(self)
 class BackdropSizer(QtWidgets.QGraphicsItem):
     """
     Sizer item for resizing a backdrop item.
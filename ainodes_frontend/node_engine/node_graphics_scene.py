@@ -6,12 +6,18 @@ import math
 
 from qtpy import QtGui, QtWidgets
 from qtpy.QtCore import Signal, QRect, QLine, Qt
-from qtpy.QtGui import QColor, QPen, QFont, QPainter
+from qtpy.QtGui import QColor, QPen, QFont, QPainter, QBrush, QPixmap, QTransform
 from qtpy.QtWidgets import QGraphicsScene, QWidget
 
 from ainodes_frontend.node_engine.node_graphics_view import STATE_STRING, DEBUG_STATE
+from ainodes_frontend.node_engine.node_lod import LOD_FULL
 from ainodes_frontend.node_engine.utils_no_qt import dumpException
 
+# grid tiles larger than this (zoomed far in) are not cached, the few visible lines are drawn directly
+GRID_TILE_MAX_PX = 2048
+# zoom levels with a cached grid tile
+GRID_TILE_CACHE_SIZE = 16
+
 
 class QDMGraphicsScene(QGraphicsScene):
     """Class representing Graphic of :class:`~node_engine.node_scene.Scene`"""
@@ -45,12 +51,25 @@ class QDMGraphicsScene(QGraphicsScene):
         # settings
         self.gridSize = 20
         self.gridSquares = 5
+        # level of detail tier of the editor view, see node_engine.node_lod
+        self.lod = LOD_FULL
 
         self.initAssets()
         self.setBackgroundBrush(self._color_background)
 
 
 
+    def setLevelOfDetail(self, lod: int):
+        """
+        Hide or show the child items of every node for a new level of detail tier
+
+        :param lod: tier from :func:`~node_engine.node_lod.level_of_detail`
+        :type lod: ``int``
+        """
+        self.lod = lod
+        for node in self.scene.nodes:
+            if hasattr(node.grNode, 'setLevelOfDetail'): node.grNode.setLevelOfDetail(lod)
+
     def initAssets(self):
         """Initialize ``QObjects`` like ``QColor``, ``QPen`` and ``QBrush``"""
         self._color_background = QColor("#393939")
@@ -66,6 +85,9 @@ class QDMGraphicsScene(QGraphicsScene):
         self._pen_state = QPen(self._color_state)
         self._font_state = QFont("Monospace", 16)
 
+        # pre-rendered grid brushes, keyed by grid settings and device scale
+        self._grid_tiles = {}
+
 
     # the drag events won't be allowed until dragMoveEvent is overriden
     def dragMoveEvent(self, event):
@@ -76,8 +98,55 @@ class QDMGraphicsScene(QGraphicsScene):
         """Set `width` and `height` of the `Graphics Scene`"""
         self.setSceneRect(-width // 2, -height // 2, width, height)
 
+    def gridTile(self, device_scale: float) -> QBrush:
+        """
+        Brush painting the grid at ``device_scale`` device pixels per scene unit, tiled every major grid square.
+        The tile is rendered once per zoom level and reused for every repaint.
+
+        :param device_scale: view scale times device pixel ratio
+        :type device_scale: ``float``
+        :return: texture brush in scene coordinates or ``None`` if the tile would be too large to cache
+        :rtype: ``QBrush``
+        """
+        key = (self.gridSize, self.gridSquares, round(device_scale, 4))
+        brush = self._grid_tiles.get(key)
+        if brush is not None: return brush
+
+        period = self.gridSize * self.gridSquares
+        size = int(round(period * device_scale))
+        if size < 1 or size > GRID_TILE_MAX_PX: return None
+
+        tile = QPixmap(size, size)
+        tile.fill(self._color_background)
+        painter = QPainter(tile)
+        painter.scale(size / period, size / period)
+        painter.setPen(self._pen_light)
+        for offset in range(self.gridSize, period, self.gridSize):
+            painter.drawLine(offset, 0, offset, period)
+            painter.drawLine(0, offset, period, offset)
+        # major lines sit on the tile edges, each tile draws its half of them
+        painter.setPen(self._pen_dark)
+        for offset in (0, period):
+            painter.drawLine(offset, 0, offset, period)
+            painter.drawLine(0, offset, period, offset)
+        painter.end()
+
+        brush = QBrush(tile)
+        # map the tile back to exactly one major grid square, so the pattern never drifts from the scene grid
+        brush.setTransform(QTransform.fromScale(period / size, period / size))
+        if len(self._grid_tiles) >= GRID_TILE_CACHE_SIZE: self._grid_tiles.clear()
+        self._grid_tiles[key] = brush
+        return brush
+
     def drawBackground(self, painter:QPainter, rect:QRect):
         """Draw background scene grid"""
+        device_scale = painter.worldTransform().m11() * painter.device().devicePixelRatioF()
+        brush = self.gridTile(device_scale) if device_scale > 0 else None
+        if brush is not None:
+            painter.fillRect(rect, brush)
+            self.drawState(painter, rect)
+            return
+
         super().drawBackground(painter, rect)
 
         # here we create our grid
@@ -111,6 +180,9 @@ class QDMGraphicsScene(QGraphicsScene):
         #except TypeError: painter.drawLines(lines_dark)         # supporting PySide2
         painter.drawLines(lines_dark)         # supporting PySide2
 
+        self.drawState(painter, rect)
+
+    def drawState(self, painter: QPainter, rect: QRect):
         if DEBUG_STATE:
             try:
                 painter.setFont(self._font_state)
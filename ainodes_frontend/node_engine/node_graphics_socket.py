@@ -8,6 +8,7 @@ from qtpy.QtGui import QColor, QBrush, QPen
 from qtpy.QtWidgets import QGraphicsItem
 
 from ainodes_frontend import singleton as gs
+from ainodes_frontend.node_engine.node_lod import LOD_BOX, LOD_REDUCED, painter_level_of_detail
 
 SOCKET_COLORS = [
     QColor("#FFFF7700"),
@@ -95,6 +96,9 @@ class QDMGraphicsSocket(QGraphicsItem):
         self._brush = QBrush(self._color_background)
 
     def paint(self, painter, QStyleOptionGraphicsItem, widget=None):
+        lod = painter_level_of_detail(painter)
+        if lod >= LOD_BOX: return
+        if lod >= LOD_REDUCED: painter.setRenderHint(QtGui.QPainter.Antialiasing, False)
 
         #if gs.highlight_sockets:
         mode = self.socket.node.scene.getView().mode
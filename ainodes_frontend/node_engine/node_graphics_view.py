@@ -19,6 +19,7 @@ from ainodes_frontend.node_engine.node_edge_rerouting import EdgeRerouting
 from ainodes_frontend.node_engine.node_edge_snapping import EdgeSnapping
 from ainodes_frontend.node_engine.node_graphics_cutline import QDMCutLine
 from ainodes_frontend.node_engine.node_graphics_edge import QDMGraphicsEdge
+from ainodes_frontend.node_engine.node_lod import level_of_detail
 from ainodes_frontend.node_engine.node_graphics_socket import QDMGraphicsSocket
 from ainodes_frontend.node_engine.utils import dumpException
 
@@ -288,6 +289,13 @@ class QDMGraphicsView(QGraphicsView):
 
     def mousePressEvent(self, event: QMouseEvent):
         """Dispatch Qt's mousePress event to corresponding function below"""
+        if self.grScene.scene.isLoading() and event.button() != Qt.MiddleButton \
+                and self.dragMode() != QGraphicsView.ScrollHandDrag:
+            # a graph is still being built, only panning is allowed
+            event.ignore()
+            return
+        # a new interaction starts, a pending scheduled change must not absorb what it does
+        self.grScene.scene.history.flushHistory()
         if event.button() == Qt.MiddleButton:
             self.middleMouseButtonPress(event)
         elif event.button() == Qt.LeftButton:
@@ -299,6 +307,8 @@ class QDMGraphicsView(QGraphicsView):
 
     def mouseReleaseEvent(self, event: QMouseEvent):
         """Dispatch Qt's mouseRelease event to corresponding function below"""
+        # the grabbed node may not get the release, e.g. when the mouse left the window
+        self.grScene.scene.endNodeDrag()
         if event.button() == Qt.MiddleButton:
             self.middleMouseButtonRelease(event)
         elif event.button() == Qt.LeftButton:
@@ -687,8 +697,19 @@ class QDMGraphicsView(QGraphicsView):
         """Reset the zoom level to its default value."""
         self.zoom = 1  # Set the default zoom level
         self.setTransform(QTransform().scale(self.zoom, self.zoom))
+        self.updateLevelOfDetail()
+
+    def updateLevelOfDetail(self):
+        """
+        Apply the level of detail tier of the current zoom to the scene's nodes. Nothing is done unless the zoom
+        crossed one of the ``lod_content_zoom`` / ``lod_box_zoom`` thresholds.
+        """
+        lod = level_of_detail(self.transform().m11())
+        if lod != self.grScene.lod:
+            self.grScene.setLevelOfDetail(lod)
     def cutIntersectingEdges(self):
         """Compare which `Edges` intersect with current `Cut line` and delete them safely"""
+        spatial_index = self.grScene.scene.spatial_index
         for ix in range(len(self.cutline.line_points) - 1):
             p1 = self.cutline.line_points[ix]
             p2 = self.cutline.line_points[ix + 1]
@@ -696,7 +717,9 @@ class QDMGraphicsView(QGraphicsView):
             # @TODO: we could collect all touched nodes, and notify them once after all edges removed
             # we could cut 3 edges leading to a single node_engine this will notify it 3x
             # maybe we could use some Notifier class with methods collect() and dispatch()
-            for edge in self.grScene.scene.edges.copy():
+            candidates = spatial_index.edgeCandidates(min(p1.x(), p2.x()), min(p1.y(), p2.y()),
+                                                      max(p1.x(), p2.x()), max(p1.y(), p2.y()))
+            for edge in candidates:
                 if edge.grEdge.intersectsWith(p1, p2):
                     edge.remove()
         self.grScene.scene.history.storeHistory("Delete cutted edges", setModified=True)
@@ -705,18 +728,17 @@ class QDMGraphicsView(QGraphicsView):
     def setSocketHighlights(self, scenepos: QPointF, highlighted: bool = True, radius: float = 50):
         """Set/disable socket highlights in Scene area defined by `scenepos` and `radius`"""
         scanrect = QRectF(scenepos.x() - radius, scenepos.y() - radius, radius * 2, radius * 2)
-        items = self.grScene.items(scanrect)
-        items = list(filter(lambda x: isinstance(x, QDMGraphicsSocket), items))
+        items = self.grScene.scene.spatial_index.socketsIn(scanrect)
         for grSocket in items: grSocket.isHighlighted = highlighted
         return items
 
     def deleteSelected(self):
         """Shortcut for safe deleting every object selected in the `Scene`."""
-        for item in self.grScene.selectedItems():
-            if isinstance(item, QDMGraphicsEdge):
-                item.edge.remove()
-            elif hasattr(item, 'node'):
-                item.node.remove()
+        self.grScene.scene.history.flushHistory()
+        selected = self.grScene.selectedItems()
+        self.grScene.scene.removeItems(
+            [item.node for item in selected if not isinstance(item, QDMGraphicsEdge) and hasattr(item, 'node')],
+            [item.edge for item in selected if isinstance(item, QDMGraphicsEdge)])
         self.grScene.scene.history.storeHistory("Delete selected", setModified=True)
 
 
@@ -779,6 +801,7 @@ class QDMGraphicsView(QGraphicsView):
             if not clamped or self.zoomClamp is False:
                 self.scale(zoomFactor, zoomFactor)
                 gs.zoom = self.zoom
+                self.updateLevelOfDetail()
         if gs.hovered:
             if gs.hover_node:
                 super().wheelEvent(event)
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the level of detail tiers used to paint the scene zoomed out.
+
+Painting is decided per painter from its world transform, so every view (and the mini map) gets the tier matching its
+own zoom. Items which are expensive even when not painted, like the ``QGraphicsProxyWidget`` holding a node's
+content, are hidden by :py:meth:`~node_engine.node_graphics_view.QDMGraphicsView.updateLevelOfDetail` when the
+editor view crosses a threshold. Thresholds are the ``lod_content_zoom`` and ``lod_box_zoom`` settings.
+"""
+from qtpy.QtWidgets import QStyleOptionGraphicsItem
+
+from ainodes_frontend import singleton as gs
+
+#: everything is drawn
+LOD_FULL = 0
+#: node content widgets are hidden, sockets and edges are drawn without antialiasing
+LOD_REDUCED = 1
+#: nodes are drawn as plain boxes without titles, status icons or sockets
+LOD_BOX = 2
+
+
+def level_of_detail(scale: float) -> int:
+    """Returns the level of detail tier for a view ``scale``, 1.0 being 100% zoom"""
+    if scale < getattr(gs, "lod_box_zoom", 0.25): return LOD_BOX
+    if scale < getattr(gs, "lod_content_zoom", 0.5): return LOD_REDUCED
+    return LOD_FULL
+
+
+def painter_level_of_detail(painter: 'QPainter') -> int:
+    """Returns the level of detail tier an item is currently being painted at"""
+    return level_of_detail(QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform()))
@@ -110,6 +110,7 @@ class Node(Serializable):
         :param y: Y `Scene` position
         """
         self.grNode.setPos(x, y)
+        self.scene.spatial_index.nodeMoved(self)
 
 
     def initInnerClasses(self):
@@ -222,7 +223,11 @@ class Node(Serializable):
         :type socket: :class:`~nodeeditor.node_socket.Socket`
         """
         self.markDirty()
-        #self.markDescendantsDirty()
+        self.markDescendantsDirty()
+
+    def onIdChanged(self, old_id):
+        """Keep the `Scene` id index pointing at this `Node`"""
+        self.scene.nodes.reindex(self, old_id)
 
     def onDeserialized(self, data: dict):
         """Event manually called when this node was deserialized. Currently called when node is deserialized from scene
@@ -311,6 +316,8 @@ class Node(Serializable):
 
     def updateConnectedEdges(self):
         """Recalculate (Refresh) positions of all connected `Edges`. Used for updating Graphics Edges"""
+        # called whenever the node was dragged, its sockets moved with it
+        self.scene.spatial_index.nodeMoved(self)
         for socket in self.inputs + self.outputs:
             # if socket.hasEdge():
             for edge in socket.edges:
@@ -365,7 +372,6 @@ class Node(Serializable):
         pass
 
     def markChildrenDirty(self, new_value: bool=True):
-        return
         """Mark all first level children of this `Node` to be `Dirty`. Not this `Node` it self. Not other descendants
 
         :param new_value: ``True`` if children should be `Dirty`. ``False`` if you want to un-dirty children
@@ -375,15 +381,23 @@ class Node(Serializable):
             other_node.markDirty(new_value)
 
     def markDescendantsDirty(self, new_value: bool=True):
-        return
         """Mark all children and descendants of this `Node` to be `Dirty`. Not this `Node` it self
 
         :param new_value: ``True`` if children and descendants should be `Dirty`. ``False`` if you want to un-dirty children and descendants
         :type new_value: ``bool``
         """
-        for other_node in self.getChildrenNodes():
+        for other_node in self.getDescendantNodes():
             other_node.markDirty(new_value)
-            other_node.markDescendantsDirty(new_value)
+
+    def onContentChanged(self):
+        """Called when a value in the content widget was edited. Marks this `Node` and all its descendants `Dirty`,
+        so an incremental run re-evaluates exactly the affected part of the graph"""
+        self.markDirty()
+        self.markDescendantsDirty()
+        for node in [self] + self.getDescendantNodes():
+            if node.grNode is not None: node.grNode.update()
+        # typing produces a change per key, they are merged into one undo step
+        self.scene.history.scheduleHistory("Edited %s" % self.title, setModified=True)
 
     def isInvalid(self) -> bool:
         """Is this node marked as `Invalid`?
@@ -449,15 +463,29 @@ class Node(Serializable):
         :return: list of `Nodes` connected to this `Node` from all `Outputs`
         :rtype: List[:class:`~node_engine.node_node.Node`]
         """
-        if self.outputs == []: return []
-        other_nodes = []
-        for ix in range(len(self.outputs)):
-            for edge in self.outputs[ix].edges:
-                other_node = edge.getOtherSocket(self.outputs[ix]).node
-                other_nodes.append(other_node)
-        return other_nodes
+        return list(self.scene.adjacency.children(self))
 
 
+    def getDescendantNodes(self) -> 'List[Node]':
+        """
+        Retrieve all nodes reachable from this `Node` `Outputs`, each one once, breadth first
+
+        :return: list of descendant `Nodes`, not including this `Node`
+        :rtype: List[:class:`~node_engine.node_node.Node`]
+        """
+        adjacency = self.scene.adjacency
+        visited = {self}
+        descendants = []
+        queue = [self]
+        while queue:
+            node = queue.pop(0)
+            for other_node in adjacency.children(node):
+                if other_node not in visited:
+                    visited.add(other_node)
+                    descendants.append(other_node)
+                    queue.append(other_node)
+        return descendants
+
     def getInput(self, index: int=0) -> ['Node', None]:
         """
         Get the first Node connected to the Input specified by index.
@@ -468,12 +496,10 @@ class Node(Serializable):
         Returns:
             tuple: A tuple containing the connected Node and the socket index, or (None, None) if there is no connection or the index is out of range.
         """
+        if not 0 <= index < len(self.inputs): return None, None
         try:
-            input_socket = self.inputs[index]
-            #print("Socket index:", index)
-            if len(input_socket.edges) == 0: return None
-            connecting_edge = input_socket.edges[0]
-            other_socket = connecting_edge.getOtherSocket(self.inputs[index])
+            other_socket = self.scene.adjacency.firstInput(self, index)
+            if other_socket is None: return None
             return other_socket.node, other_socket.index
         except Exception as e:
             dumpException(e)
@@ -489,11 +515,10 @@ class Node(Serializable):
             is connected to the specified `Input` or ``None`` if there is no connection or the index is out of range
         :rtype: (:class:`~nodeeditor.node_node.Node`, :class:`~nodeeditor.node_socket.Socket`)
         """
+        if not 0 <= index < len(self.inputs): return None, None
         try:
-            input_socket = self.inputs[index]
-            if len(input_socket.edges) == 0: return None, None
-            connecting_edge = input_socket.edges[0]
-            other_socket = connecting_edge.getOtherSocket(self.inputs[index])
+            other_socket = self.scene.adjacency.firstInput(self, index)
+            if other_socket is None: return None, None
             return other_socket.node, other_socket
         except Exception as e:
             dumpException(e)
@@ -510,8 +535,8 @@ class Node(Serializable):
         :rtype: (:class:`~nodeeditor.node_node.Node`, int)
         """
         try:
-            edge = self.inputs[index].edges[0]
-            socket = edge.getOtherSocket(self.inputs[index])
+            socket = self.scene.adjacency.firstInput(self, index)
+            if socket is None: return None, None
             return socket.node, socket.index
         except IndexError:
             # print("EXC: Trying to get input with socket index %d, but none is attached to" % index, self)
@@ -530,11 +555,7 @@ class Node(Serializable):
             specified `Input` or ``[]`` if there is no connection or the index is out of range
         :rtype: List[:class:`~node_engine.node_node.Node`]
         """
-        ins = []
-        for edge in self.inputs[index].edges:
-            other_socket = edge.getOtherSocket(self.inputs[index])
-            ins.append(other_socket.node)
-        return ins
+        return list(self.scene.adjacency.inputs(self, index))
 
     def getOutputs(self, index: int=0) -> 'List[Node]':
         """
@@ -546,18 +567,14 @@ class Node(Serializable):
             specified `Output` or ``[]`` if there is no connection or the index is out of range
         :rtype: List[:class:`~node_engine.node_node.Node`]
         """
-        outs = []
-        for edge in self.outputs[index].edges:
-            other_socket = edge.getOtherSocket(self.outputs[index])
-            outs.append(other_socket.node)
-        return outs
+        return list(self.scene.adjacency.outputs(self, index))
     # Output Setting function
 
     def serialize(self) -> OrderedDict:
         inputs, outputs = [], []
         for socket in self.inputs: inputs.append(socket.serialize())
         for socket in self.outputs: outputs.append(socket.serialize())
-        ser_content = self.content.serialize() if isinstance(self.content, Serializable) else {}
+        ser_content = self.serializeContent()
         return OrderedDict([
             ('id', self.id),
             ('title', self.title),
@@ -630,7 +647,38 @@ class Node(Serializable):
 
         # also deserialize the content of the node
         # so far the rest was ok, now as last step the content...
+        return self.deserializeContent(data['content'], hashmap)
+
+    def serializeContent(self) -> dict:
+        """
+        Serialized values of the content widget
+
+        :return: content data stored under ``'content'`` by :py:meth:`serialize`
+        :rtype: ``dict``
+        """
+        return self.content.serialize() if isinstance(self.content, Serializable) else {}
+
+    def deserializeContent(self, data: dict, hashmap: dict={}) -> bool:
+        """
+        Restore the values of the content widget
+
+        :param data: ``'content'`` part of the serialized `Node`
+        :param hashmap: helper dictionary with ids of deserialized objects
+        :return: ``True`` if the content was restored
+        """
         if isinstance(self.content, Serializable):
-            res = self.content.deserialize(data['content'], hashmap)
-            return res
+            return self.content.deserialize(data, hashmap)
         return True
+
+    def isContentMaterialized(self) -> bool:
+        """
+        Has the content widget of this `Node` been created yet? Nodes may create it lazily, once it is first
+        painted or used, see :py:meth:`materializeContent`
+
+        :rtype: ``bool``
+        """
+        return True
+
+    def materializeContent(self):
+        """Create the content widget if this `Node` did not do so yet and return it"""
+        return self.content
@@ -6,10 +6,18 @@ import json
 import os
 import sys
 from collections import OrderedDict
+from contextlib import contextmanager
 
 from qtpy import QtCore
+from qtpy.QtWidgets import QGraphicsView
 
+from ainodes_frontend.cancellation import release_memory
+from ainodes_frontend.node_engine.node_adjacency import AdjacencyIndex
+from ainodes_frontend.node_engine.node_drag_session import NodeDragSession
+from ainodes_frontend.node_engine.node_spatial_index import SceneSpatialIndex
 from ainodes_frontend.node_engine.node_edge import Edge
+from ainodes_frontend.node_engine.node_graph_binary import EXTENSION as BINARY_GRAPH_EXTENSION, InvalidBinaryGraph, \
+    graph_records, is_binary_graph, read_graph_records, save_graph
 from ainodes_frontend.node_engine.node_graphics_scene import QDMGraphicsScene
 from ainodes_frontend.node_engine.node_node import Node
 from ainodes_frontend.node_engine.node_scene_clipboard import SceneClipboard
@@ -18,11 +26,76 @@ from ainodes_frontend.node_engine.node_serializable import Serializable
 from ainodes_frontend.node_engine.utils_no_qt import dumpException
 
 DEBUG_REMOVE_WARNINGS = False
+# nodes built between two progress callbacks while streaming a graph in
+PROGRESS_INTERVAL = 64
 
 
 class InvalidFile(Exception): pass
 
 
+class ItemList:
+    """
+    Ordered, list-like container of `Nodes` or `Edges` with constant time membership test, removal and lookup by id.
+
+    Iterating goes over a snapshot, so items can be removed from the container inside the loop.
+    """
+    def __init__(self, items: list=()):
+        self._items = {}
+        self._by_id = {}
+        for item in items: self.append(item)
+
+    def append(self, item):
+        self._items[item] = None
+        self._by_id[item.id] = item
+
+    def remove(self, item):
+        try:
+            del self._items[item]
+        except KeyError:
+            raise ValueError("ItemList.remove(x): x not in list")
+        if self._by_id.get(item.id) is item: del self._by_id[item.id]
+
+    def reindex(self, item, old_id):
+        """Move ``item`` from ``old_id`` to its current id"""
+        if item not in self._items: return
+        if self._by_id.get(old_id) is item: del self._by_id[old_id]
+        self._by_id[item.id] = item
+
+    def getByID(self, item_id):
+        return self._by_id.get(item_id)
+
+    def copy(self) -> list:
+        return list(self._items)
+
+    def clear(self):
+        self._items.clear()
+        self._by_id.clear()
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        return len(self._items) > 0
+
+    def __getitem__(self, index):
+        if index == 0 and self._items:
+            return next(iter(self._items))
+        return list(self._items)[index]
+
+    def __eq__(self, other):
+        if isinstance(other, ItemList): other = other.copy()
+        return list(self._items) == other
+
+    def __repr__(self):
+        return repr(list(self._items))
+
+
 class Scene(Serializable):
     """Class representing NodeEditor's `Scene`"""
     def __init__(self):
@@ -35,10 +108,15 @@ class Scene(Serializable):
             - **clipboard** - Instance of :class:`~node_engine.node_scene_clipboard.SceneClipboard`
             - **scene_width** - width of this `Scene` in pixels
             - **scene_height** - height of this `Scene` in pixels
+            - **adjacency** - Instance of :class:`~node_engine.node_adjacency.AdjacencyIndex`
+            - **spatial_index** - Instance of :class:`~node_engine.node_spatial_index.SceneSpatialIndex`
+            - **loader** - the ``GraphLoader`` building this `Scene` in the background or ``None``
         """
         super().__init__()
-        self.nodes = []
-        self.edges = []
+        self.nodes = ItemList()
+        self.edges = ItemList()
+        self.adjacency = AdjacencyIndex()
+        self.spatial_index = SceneSpatialIndex()
 
         # current filename assigned to this scene
         self.filename = None
@@ -60,6 +138,11 @@ class Scene(Serializable):
         # here we can store callback for retrieving the class for Nodes
         self.node_class_selector = None
 
+        # set while a graph is built in the background, see ainodes_frontend.base.graph_loader
+        self.loader = None
+        # set while nodes are dragged with the mouse, see nodeDragSession
+        self.drag_session = None
+
         self.initUI()
         self.history = SceneHistory(self)
         self.clipboard = SceneClipboard(self)
@@ -104,10 +187,17 @@ class Scene(Serializable):
         :type node_id: ``int``
         :return: Found ``Node`` or ``None``
         """
-        for node in self.nodes:
-            if node.id == node_id:
-                return node
-        return None
+        return self.nodes.getByID(node_id)
+
+    def getEdgeByID(self, edge_id: int):
+        """
+        Find edge in the scene according to provided `edge_id`
+
+        :param edge_id: ID of the edge we are looking for
+        :type edge_id: ``int``
+        :return: Found ``Edge`` or ``None``
+        """
+        return self.edges.getByID(edge_id)
 
 
     def setSilentSelectionEvents(self, value: bool=True):
@@ -132,7 +222,7 @@ class Scene(Serializable):
                 if len(current_selected_items) == 1:
                     for callback in self._item_selected_listeners: callback(current_selected_items[0])
                 # and store history as a last step always
-                self.history.storeHistory("Selection Changed")
+                self.history.scheduleHistory("Selection Changed")
 
     def onItemsDeselected(self, silent: bool=False):
         """
@@ -153,10 +243,37 @@ class Scene(Serializable):
         if current_selected_items == []:
             self._last_selected_items = []
             if not silent:
-                self.history.storeHistory("Deselected Everything")
+                self.history.scheduleHistory("Deselected Everything")
                 for callback in self._items_deselected_listeners: callback()
 
 
+    def nodeDragSession(self, node: 'Node' = None) -> NodeDragSession:
+        """
+        Returns the :class:`~node_engine.node_drag_session.NodeDragSession` of the current drag, starting one if
+        the mouse just started dragging
+
+        :param node: `Node` grabbed by the mouse
+        :type node: :class:`~node_engine.node_node.Node`
+        """
+        if self.drag_session is None:
+            self.drag_session = NodeDragSession(self, node)
+        return self.drag_session
+
+    def endNodeDrag(self):
+        """Finish the current node drag, if there is one"""
+        if self.drag_session is None: return
+        session, self.drag_session = self.drag_session, None
+        session.finish()
+
+    def isLoading(self) -> bool:
+        """
+        Is a graph being built into this `Scene` in the background?
+
+        :return: ``True`` while a ``GraphLoader`` is attached
+        :rtype: ``bool``
+        """
+        return self.loader is not None
+
     def isModified(self) -> bool:
         """Is this `Scene` dirty aka `has been modified` ?
 
@@ -260,6 +377,7 @@ class Scene(Serializable):
         :type node: :class:`~nodeeditor.node_node.Node`
         """
         self.nodes.append(node)
+        self.spatial_index.addNode(node)
 
     def addEdge(self, edge: Edge):
         """Add :class:`~node_engine.node_edge.Edge` to this `Scene`
@@ -268,6 +386,7 @@ class Scene(Serializable):
         :return: :class:`~node_engine.node_edge.Edge`
         """
         self.edges.append(edge)
+        self.spatial_index.addEdge(edge)
 
     def removeNode(self, node: Node):
         """Remove :class:`~node_engine.node_node.Node` from this `Scene`
@@ -275,6 +394,7 @@ class Scene(Serializable):
         :param node: :class:`~node_engine.node_node.Node` to be removed from this `Scene`
         :type node: :class:`~nodeeditor.node_node.Node`
         """
+        self.spatial_index.removeNode(node)
         if node in self.nodes: self.nodes.remove(node)
         else:
             if DEBUG_REMOVE_WARNINGS: print("!W:", "Scene::removeNode", "wanna remove node_engine", node,
@@ -286,17 +406,77 @@ class Scene(Serializable):
         :param edge: :class:`~node_engine.node_edge.Edge` to be remove from this `Scene`
         :return: :class:`~node_engine.node_edge.Edge`
         """
+        self.spatial_index.removeEdge(edge)
         if edge in self.edges: self.edges.remove(edge)
         else:
             if DEBUG_REMOVE_WARNINGS: print("!W:", "Scene::removeEdge", "wanna remove edge", edge,
                                             "from self.edges but it's not in the list!")
 
 
+    @contextmanager
+    def suspendUpdates(self):
+        """
+        Context manager which stops repainting the views and emitting selection signals, for changes touching many
+        items at once. The views are repainted and a changed selection is reported once when it exits.
+        """
+        views = self.grScene.views()
+        update_modes = [view.viewportUpdateMode() for view in views]
+        for view in views: view.setViewportUpdateMode(QGraphicsView.NoViewportUpdate)
+        signals_blocked = self.grScene.blockSignals(True)
+        silent_selection_events = self._silent_selection_events
+        self._silent_selection_events = True
+        try:
+            yield
+        finally:
+            self._silent_selection_events = silent_selection_events
+            self.grScene.blockSignals(signals_blocked)
+            if not signals_blocked and self._last_selected_items is not None \
+                    and self.getSelectedItems() != self._last_selected_items:
+                if self.getSelectedItems(): self.onItemSelected()
+                else: self.onItemsDeselected()
+            for view, update_mode in zip(views, update_modes):
+                view.setViewportUpdateMode(update_mode)
+                view.viewport().update()
+
+    def removeItems(self, nodes: list=(), edges: list=(), free_memory: bool=False):
+        """
+        Remove many `Nodes` and `Edges` in one batch. The views are not repainted until everything is gone, `Edges`
+        are detached without repainting the scene for each of them, and only `Nodes` which stay in the scene are
+        notified about their lost connections.
+
+        :param nodes: `Nodes` to remove, together with all their `Edges`
+        :param edges: `Edges` to remove
+        :param free_memory: collect the released node outputs right away, a full garbage collection which is only
+            worth it when a whole graph goes away
+        :type free_memory: ``bool``
+        """
+        nodes = [node for node in dict.fromkeys(nodes) if node in self.nodes]
+        removed_nodes = set(nodes)
+        all_edges = dict.fromkeys(edge for edge in edges if edge in self.edges)
+        for node in nodes:
+            for socket in node.inputs + node.outputs:
+                all_edges.update(dict.fromkeys(socket.edges))
+
+        with self.suspendUpdates():
+            for edge in all_edges:
+                start_node = edge.start_socket.node if edge.start_socket is not None else None
+                end_node = edge.end_socket.node if edge.end_socket is not None else None
+                if start_node in removed_nodes and end_node in removed_nodes:
+                    edge.remove(silent=True, update_scene=False)
+                elif start_node in removed_nodes:
+                    edge.remove(silent_for_socket=edge.start_socket, update_scene=False)
+                elif end_node in removed_nodes:
+                    edge.remove(silent_for_socket=edge.end_socket, update_scene=False)
+                else:
+                    edge.remove(update_scene=False)
+            for node in nodes:
+                node.remove()
+
+        if free_memory and nodes: release_memory()
+
     def clear(self):
         """Remove all `Nodes` from this `Scene`. This causes also to remove all `Edges`"""
-        while len(self.nodes) > 0:
-            self.nodes[0].remove()
-
+        self.removeItems(self.nodes.copy(), free_memory=True)
         self.has_been_modified = False
 
 
@@ -314,27 +494,31 @@ class Scene(Serializable):
             pass
 
 
-        if ".json" not in filename:
-            filename = f"{filename}.json"
-        with open(filename, "w") as file:
-            file.write( json.dumps( self.serialize(), indent=4 ) )
+        if filename.endswith(BINARY_GRAPH_EXTENSION):
+            save_graph(filename, self.serialize())
             print("saving to", filename, "was successfull.")
+        else:
+            if ".json" not in filename:
+                filename = f"{filename}.json"
+            with open(filename, "w") as file:
+                file.write( json.dumps( self.serialize(), indent=4 ) )
+                print("saving to", filename, "was successfull.")
 
-            self.has_been_modified = False
+        self.has_been_modified = False
 
-            #print("FILENAME WAS", self.grScene, "WILL BE", filename)
-            try:
-                if self.grScene.scene.getView().parent().window().mdiArea.activeSubWindow().subgraph:
+        #print("FILENAME WAS", self.grScene, "WILL BE", filename)
+        try:
+            if self.grScene.scene.getView().parent().window().mdiArea.activeSubWindow().subgraph:
 
-                    window = self.grScene.scene.getView().parent().window().mdiArea.activeSubWindow()
-                    print("WINDOW FILENAME", window.widget().filename)
-                    print("SELF FILENAME", self.filename)
-                    self.filename = f"{window.widget().filename}.json"
-                    #self.filename = self.grScene.scene.getView().parent().window().mdiArea.activeSubWindow().widget().scene.filename
-                else:
-                    self.filename = filename
-            except:
-                pass
+                window = self.grScene.scene.getView().parent().window().mdiArea.activeSubWindow()
+                print("WINDOW FILENAME", window.widget().filename)
+                print("SELF FILENAME", self.filename)
+                self.filename = f"{window.widget().filename}.json"
+                #self.filename = self.grScene.scene.getView().parent().window().mdiArea.activeSubWindow().widget().scene.filename
+            else:
+                self.filename = filename
+        except:
+            pass
 
     def loadFromFile(self, filename: str):
         """
@@ -344,6 +528,9 @@ class Scene(Serializable):
         :type filename: ``str``
         :raises: :class:`~node_engine.node_scene.InvalidFile` if there was an error decoding JSON file
         """
+        if is_binary_graph(filename):
+            self.loadFromBinaryFile(filename)
+            return
 
         with open(filename, "r") as file:
             raw_data = file.read()
@@ -359,6 +546,28 @@ class Scene(Serializable):
                 raise InvalidFile("%s is not a valid JSON file" % os.path.basename(filename))
             except Exception as e:
                 dumpException(e)
+    def loadFromBinaryFile(self, filename: str):
+        """
+        Load `Scene` from a binary ``.aigraph`` file, building `Nodes` while the file is still being read. Pending
+        paint events are processed every ``PROGRESS_INTERVAL`` nodes, so big graphs appear progressively.
+
+        :param filename: from what file to load the `Scene`
+        :type filename: ``str``
+        :raises: :class:`~node_engine.node_scene.InvalidFile` if the file is not a valid binary graph
+        """
+        def progress(node_count: int):
+            QtCore.QCoreApplication.processEvents(QtCore.QEventLoop.ExcludeUserInputEvents)
+
+        try:
+            with open(filename, "rb") as file:
+                self.filename = filename
+                self.deserializeRecords(read_graph_records(file), progress=progress)
+                self.has_been_modified = False
+        except InvalidBinaryGraph as e:
+            raise InvalidFile("%s is not a valid graph file: %s" % (os.path.basename(filename), e))
+        except Exception as e:
+            dumpException(e)
+
     def loadFromJson(self, json_data, json_name):
         """
         Load `Scene` from a file on disk
@@ -404,6 +613,58 @@ class Scene(Serializable):
         return Node if self.node_class_selector is None else self.node_class_selector(data)
 
 
+    def deserializeNode(self, node_data: dict, hashmap: dict, restore_id: bool=True, found: Node=None,
+                        *args, **kwargs) -> Node:
+        """
+        Create a `Node` from its serialized data, or update ``found`` when the node already exists
+
+        :param node_data: serialized `Node`
+        :type node_data: ``dict``
+        :param hashmap: filled with the deserialized node and sockets, keyed by id
+        :type hashmap: ``dict``
+        :param found: existing node to update in place
+        :type found: :class:`~node_engine.node_node.Node`
+        :return: the created or updated `Node`, ``None`` if deserialization failed
+        """
+        try:
+            node = found if found is not None else self.getNodeClassFromData(node_data)(self)
+            node.deserialize(node_data, hashmap, restore_id, *args, **kwargs)
+            node.onDeserialized(node_data)
+            return node
+        except:
+            dumpException()
+            return None
+
+    def applyChanges(self, nodes_data: list=(), removed_node_ids: list=(), edges_data: list=(),
+                     removed_edge_ids: list=()):
+        """
+        Restore only the given `Nodes` and `Edges`, leaving everything else in the `Scene` untouched.
+        Used by :class:`~node_engine.node_scene_history.SceneHistory` for undo/redo.
+
+        :param nodes_data: serialized `Nodes` to create, or update when a node with the same id exists
+        :param removed_node_ids: ids of `Nodes` to remove
+        :param edges_data: serialized `Edges` to create, or update when an edge with the same id exists
+        :param removed_edge_ids: ids of `Edges` to remove
+        """
+        self.removeItems([self.nodes.getByID(node_id) for node_id in removed_node_ids],
+                         [self.edges.getByID(edge_id) for edge_id in removed_edge_ids])
+
+        hashmap = {}
+        for node_data in nodes_data:
+            self.deserializeNode(node_data, hashmap, True, self.nodes.getByID(node_data['id']))
+
+        if edges_data:
+            # edges may connect to nodes which were not touched, their sockets are needed too
+            for node in self.nodes:
+                for socket in node.inputs + node.outputs:
+                    hashmap.setdefault(socket.id, socket)
+            for edge_data in edges_data:
+                edge = self.edges.getByID(edge_data['id'])
+                if edge is None:
+                    Edge(self).deserialize(edge_data, hashmap, True)
+                else:
+                    edge.deserialize(edge_data, hashmap, True)
+
     def serialize(self) -> OrderedDict:
         nodes, edges = [], []
         for node in self.nodes: nodes.append(node.serialize())
@@ -417,76 +678,64 @@ class Scene(Serializable):
         ])
 
     def deserialize(self, data: dict, hashmap: dict={}, restore_id: bool=True, *args, **kwargs) -> bool:
-        hashmap = {}
-
-        if restore_id: self.id = data['id']
-
-        # -- deserialize NODES
-
-        ## Instead of recreating all the nodes, reuse existing ones...
-        # get list of all current nodes:
-        all_nodes = self.nodes.copy()
-
-        # go through deserialized nodes:
-        for node_data in data['nodes']:
-            # can we find this node in the scene?
-            found = False
-            for node in all_nodes:
-                if node.id == node_data['id']:
-                    found = node
-                    break
-
-            if not found:
-                try:
-                    new_node = self.getNodeClassFromData(node_data)(self)
-                    new_node.deserialize(node_data, hashmap, restore_id, *args, **kwargs)
-                    new_node.onDeserialized(node_data)
-                    # print("New node for", node_data['title'])
-                except:
-                    dumpException()
-            else:
-                try:
-                    found.deserialize(node_data, hashmap, restore_id, *args, **kwargs)
-                    found.onDeserialized(node_data)
-                    all_nodes.remove(found)
-                    # print("Reused", node_data['title'])
-                except: dumpException()
-
-        # remove nodes which are left in the scene and were NOT in the serialized data!
-        # that means they were not in the graph before...
-        while all_nodes != []:
-            node = all_nodes.pop()
-            node.remove()
-
-
-        # -- deserialize EDGES
+        return self.deserializeRecords(graph_records(data), restore_id, *args, **kwargs)
 
+    def deserializeRecords(self, records, restore_id: bool=True, *args, progress: 'function'=None, **kwargs) -> bool:
+        """
+        Deserialize the `Scene` from a stream of ``(kind, data)`` records, as produced by
+        :func:`~node_engine.node_graph_binary.read_graph_records`. Every `Node` is built as soon as its record
+        arrives, so a file can be parsed and built at the same time. Existing `Nodes` and `Edges` with matching ids
+        are reused, the ones missing from the records are removed.
 
-        ## Instead of recreating all the edges, reuse existing ones...
-        # get list of all current edges:
-        all_edges = self.edges.copy()
+        :param records: iterable of ``('scene', dict)``, ``('node', dict)`` and ``('edge', dict)``, nodes first
+        :param progress: called with the number of `Nodes` built so far, every ``PROGRESS_INTERVAL`` nodes
+        :type progress: ``function``
+        """
+        hashmap = {}
 
-        # go through deserialized edges:
-        for edge_data in data['edges']:
-            # can we find this node in the scene?
-            found = False
-            for edge in all_edges:
-                if edge.id == edge_data['id']:
-                    found = edge
-                    break
+        ## Instead of recreating all the nodes and edges, reuse existing ones...
+        # current nodes which are not in the serialized data yet:
+        all_nodes = ItemList(self.nodes)
+        # current edges which are not in the serialized data yet, collected once all nodes are in place
+        all_edges = None
+        node_count = 0
+
+        for kind, item in records:
+            if kind == 'scene':
+                if restore_id: self.id = item['id']
+
+            elif kind == 'node':
+                # can we find this node in the scene?
+                found = all_nodes.getByID(item['id'])
+                self.deserializeNode(item, hashmap, restore_id, found, *args, **kwargs)
+                if found is not None: all_nodes.remove(found)
+                node_count += 1
+                if progress is not None and node_count % PROGRESS_INTERVAL == 0: progress(node_count)
+
+            elif kind == 'edge':
+                if all_edges is None: all_edges = self.removeLeftoverNodes(all_nodes)
+                # can we find this edge in the scene?
+                found = all_edges.getByID(item['id'])
+                if found is None:
+                    Edge(self).deserialize(item, hashmap, restore_id, *args, **kwargs)
+                else:
+                    found.deserialize(item, hashmap, restore_id, *args, **kwargs)
+                    all_edges.remove(found)
 
-            if not found:
-                new_edge = Edge(self).deserialize(edge_data, hashmap, restore_id, *args, **kwargs)
-                # print("New edge for", edge_data)
-            else:
-                found.deserialize(edge_data, hashmap, restore_id, *args, **kwargs)
-                all_edges.remove(found)
+        if all_edges is None: all_edges = self.removeLeftoverNodes(all_nodes)
 
-        # remove nodes which are left in the scene and were NOT in the serialized data!
+        # remove edges which are left in the scene and were NOT in the serialized data!
         # that means they were not in the graph before...
-        while all_edges != []:
-            edge = all_edges.pop()
-            edge.remove()
+        self.removeItems(edges=all_edges.copy())
 
+        return True
 
-        return True
\ No newline at end of file
+    def removeLeftoverNodes(self, all_nodes: ItemList) -> ItemList:
+        """
+        Remove `Nodes` which are left in the scene and were NOT in the serialized data, that means they were not in
+        the graph before...
+
+        :return: the `Edges` remaining in the scene, candidates for reuse
+        """
+        self.removeItems(all_nodes.copy())
+        return ItemList(self.edges)
@@ -97,6 +97,7 @@ class SceneClipboard():
         :param data: ``dict`` data for deserialization to the :class:`node_engine.node_scene.Scene`.
         :type data: ``dict``
         """
+        self.scene.history.flushHistory()
 
         hashmap = {}
 
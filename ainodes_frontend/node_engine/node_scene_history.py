@@ -1,13 +1,34 @@
 # -*- coding: utf-8 -*-
 """
 A module containing all code for working with History (Undo/Redo)
+
+History stamps store structural diffs: every node and edge is kept as its serialized json string, and a stamp holds
+only the items which were added, changed or removed since the previous stamp. Every ``keyframe_interval`` stamps a
+full copy (keyframe) is kept, so any step is rebuilt from at most ``keyframe_interval`` diffs. Undo/redo compares the
+rebuilt state with the current one and restores only the nodes and edges which differ.
+
+Only ``Scene.serialize()`` runs on the UI thread, since it reads the content widgets. Encoding the result and diffing
+it against the previous stamp happens on a background thread; a stamp is complete once its ``future`` is done.
+Changes arriving in bursts (moves, selection, typing into content widgets) are recorded with
+:py:meth:`SceneHistory.scheduleHistory`, which merges them into one stamp after ``coalesce_delay_ms`` of quiet.
 """
+import json
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from qtpy.QtCore import QObject, QTimer, Signal
+
 from ainodes_frontend.node_engine.utils import dumpException
 
 DEBUG = False
 DEBUG_SELECTION = False
 
 
+class HistorySignals(QObject):
+    """Emitted from the encoding thread, delivered on the UI thread"""
+    stamp_encoded = Signal()
+
+
 class SceneHistory():
     """Class contains all the code for undo/redo operations"""
     def __init__(self, scene: 'Scene'):
@@ -19,11 +40,26 @@ class SceneHistory():
 
         - **scene** - reference to the :class:`~node_engine.node_scene.Scene`
         - **history_limit** - number of history steps that can be stored
+        - **history_max_bytes** - size of serialized data the history may hold, oldest steps are dropped above it
+        - **keyframe_interval** - number of steps between two full copies of the scene
+        - **coalesce_delay_ms** - quiet period after which changes passed to :py:meth:`scheduleHistory` are stored
         """
         self.scene = scene
 
+        self._executor = None
+        self._coalesce_timer = None
+        self._scheduled_desc = None
+        self._scheduled_modified = False
+        self._restoring = False
+        # the size of a stamp is only known once it is encoded, the byte limit is checked again then
+        self._signals = HistorySignals()
+        self._signals.stamp_encoded.connect(self.enforceLimits)
+
         self.clear()
         self.history_limit = 32
+        self.history_max_bytes = 64 * 1024 * 1024
+        self.keyframe_interval = 8
+        self.coalesce_delay_ms = 400
 
         self.undo_selection_has_changed = False
 
@@ -34,8 +70,22 @@ class SceneHistory():
 
     def clear(self):
         """Reset the history stack"""
+        self.cancelScheduledHistory()
         self.history_stack = []
         self.history_current_step = -1
+        # resolves to the state of the scene at history_current_step, see captureState
+        self._state_future = None
+
+    @property
+    def history_bytes(self) -> int:
+        """Approximate bytes held by the encoded `History Stamps`"""
+        return sum(hs['size'] for hs in self.history_stack)
+
+    def executor(self) -> ThreadPoolExecutor:
+        # a single worker, stamps are encoded in the order they were stored
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SceneHistory")
+        return self._executor
 
     def storeInitialHistoryStamp(self):
         """Helper function usually used when new or open file requested"""
@@ -84,6 +134,7 @@ class SceneHistory():
         """Undo operation"""
         if DEBUG: print("UNDO")
 
+        self.flushHistory()
         if self.canUndo():
             self.history_current_step -= 1
             self.restoreHistory()
@@ -92,6 +143,7 @@ class SceneHistory():
     def redo(self):
         """Redo operation"""
         if DEBUG: print("REDO")
+        self.flushHistory()
         if self.canRedo():
             self.history_current_step += 1
             self.restoreHistory()
@@ -129,6 +181,9 @@ class SceneHistory():
         - `History Modified`
         - `History Stored`
         """
+        # a pending scheduled change is kept as its own step, before the one stored now
+        self.flushHistory()
+
         if setModified:
             self.scene.has_been_modified = True
 
@@ -140,22 +195,66 @@ class SceneHistory():
         if self.history_current_step+1 < len(self.history_stack):
             self.history_stack = self.history_stack[0:self.history_current_step+1]
 
-        # history is outside of the limits
-        if self.history_current_step+1 >= self.history_limit:
-            self.history_stack = self.history_stack[1:]
-            self.history_current_step -= 1
-
         hs = self.createHistoryStamp(desc)
 
         self.history_stack.append(hs)
         self.history_current_step += 1
+        self._state_future = hs['future']
         if DEBUG: print("  -- setting step to:", self.history_current_step)
 
+        # history is outside of the limits
+        self.enforceLimits()
+
         # always trigger history modified (for i.e. updateEditMenu)
         for callback in self._history_modified_listeners: callback()
         for callback in self._history_stored_listeners: callback()
 
 
+    def scheduleHistory(self, desc: str, setModified: bool=False):
+        """
+        Store a History Stamp once no further change was scheduled for ``coalesce_delay_ms``. A burst of changes,
+        like nudging a selection around or typing into a text field, ends up as a single stamp described by the last
+        ``desc``.
+
+        :param desc: Description of the History Stamp
+        :type desc: ``str``
+        :param setModified: if ``True`` marks :class:`~node_engine.node_scene.Scene` with `has_been_modified`
+        :type setModified: ``bool``
+        """
+        # restoring or loading the scene sets widget values, which must not be recorded as new changes
+        if self._restoring or self.scene.isLoading(): return
+        if setModified:
+            self.scene.has_been_modified = True
+        self._scheduled_desc = desc
+        self._scheduled_modified = self._scheduled_modified or setModified
+        if self._coalesce_timer is None:
+            self._coalesce_timer = QTimer()
+            self._coalesce_timer.setSingleShot(True)
+            self._coalesce_timer.timeout.connect(self.flushHistory)
+        self._coalesce_timer.start(self.coalesce_delay_ms)
+
+    def cancelScheduledHistory(self):
+        if self._coalesce_timer is not None: self._coalesce_timer.stop()
+        self._scheduled_desc = None
+        self._scheduled_modified = False
+
+    def flushHistory(self):
+        """Store the scheduled History Stamp right away, if there is one"""
+        if self._scheduled_desc is None: return
+        desc, modified = self._scheduled_desc, self._scheduled_modified
+        self.cancelScheduledHistory()
+        self.storeHistory(desc, setModified=modified)
+
+    def waitForStamp(self, history_stamp: dict):
+        """Block until the background encoding of ``history_stamp`` is done"""
+        if history_stamp['future'] is not None:
+            history_stamp['future'].result()
+
+    def currentState(self):
+        """State of the scene at ``history_current_step`` or ``None`` when there is no history"""
+        if self._state_future is None: return None
+        return self._state_future.result()
+
     def captureCurrentSelection(self) -> dict:
         """
         Create dictionary with a list of selected nodes and a list of selected edges
@@ -171,22 +270,145 @@ class SceneHistory():
             elif hasattr(item, 'edge'): sel_obj['edges'].append(item.edge.id)
         return sel_obj
 
+    def captureState(self) -> dict:
+        """
+        Serialize the scene into a state: every node and edge as a json string keyed by its id
+
+        :return: ``dict`` 'scene' - scene attributes, 'nodes' and 'edges' - ``OrderedDict`` of id to json string
+        :rtype: ``dict``
+        """
+        return self.stateFromData(self.scene.serialize())
+
+    @staticmethod
+    def stateFromData(data: dict) -> dict:
+        """Turn ``Scene.serialize()`` data into a state, safe to call outside of the UI thread"""
+        return {
+            'scene': OrderedDict((key, value) for key, value in data.items() if key not in ('nodes', 'edges')),
+            'nodes': OrderedDict((node_data['id'], json.dumps(node_data, default=str)) for node_data in data['nodes']),
+            'edges': OrderedDict((edge_data['id'], json.dumps(edge_data, default=str)) for edge_data in data['edges']),
+        }
+
+    @staticmethod
+    def diffStates(old_state: dict, new_state: dict) -> dict:
+        """
+        Items of ``new_state`` which differ from ``old_state``, removed items map to ``None``
+
+        :rtype: ``dict``
+        """
+        delta = {'scene': new_state['scene'] if new_state['scene'] != old_state['scene'] else None}
+        for kind in ('nodes', 'edges'):
+            before, after = old_state[kind], new_state[kind]
+            changes = OrderedDict()
+            for item_id, item in after.items():
+                if before.get(item_id) != item: changes[item_id] = item
+            for item_id in before:
+                if item_id not in after: changes[item_id] = None
+            delta[kind] = changes
+        return delta
+
+    @staticmethod
+    def applyDelta(state: dict, delta: dict):
+        """Apply ``delta`` to ``state`` in place"""
+        if delta['scene'] is not None: state['scene'] = delta['scene']
+        for kind in ('nodes', 'edges'):
+            items = state[kind]
+            for item_id, item in delta[kind].items():
+                if item is None: items.pop(item_id, None)
+                else: items[item_id] = item
+
+    @staticmethod
+    def stateSize(state: dict) -> int:
+        """Approximate bytes held by a state or delta"""
+        return sum(len(item) for kind in ('nodes', 'edges') for item in state[kind].values() if item is not None)
+
+    def stateAt(self, step: int) -> dict:
+        """
+        Rebuild the state of `History Stamp` ``step`` from the nearest keyframe and the diffs after it
+
+        :rtype: ``dict``
+        """
+        keyframe_step = step
+        while not self.history_stack[keyframe_step]['is_keyframe']: keyframe_step -= 1
+        for hs in self.history_stack[keyframe_step:step+1]:
+            self.waitForStamp(hs)
+        keyframe = self.history_stack[keyframe_step]['keyframe']
+        state = {'scene': keyframe['scene'], 'nodes': OrderedDict(keyframe['nodes']), 'edges': OrderedDict(keyframe['edges'])}
+        for hs in self.history_stack[keyframe_step+1:step+1]:
+            self.applyDelta(state, hs['delta'])
+        return state
+
+    def stepsSinceKeyframe(self) -> int:
+        steps = 0
+        for hs in reversed(self.history_stack):
+            if hs['is_keyframe']: return steps
+            steps += 1
+        return steps
+
     def createHistoryStamp(self, desc: str) -> dict:
         """
-        Create History Stamp. Internally serialize whole scene and the current selection
+        Create History Stamp. Serializes the scene and the current selection, the keyframe or the diff to the previous
+        stamp is computed in the background and the stamp's ``future`` resolves to the captured state
 
         :param desc: Descriptive label for the History Stamp
         :return: History stamp serializing state of `Scene` and current selection
         :rtype: ``dict``
         """
+        data = self.scene.serialize()
         history_stamp = {
             'desc': desc,
-            'snapshot': self.scene.serialize(),
+            'is_keyframe': self._state_future is None or not self.history_stack or
+                           self.stepsSinceKeyframe() + 1 >= self.keyframe_interval,
+            'keyframe': None,
+            'delta': None,
+            'size': 0,
             'selection': self.captureCurrentSelection(),
+            'future': None,
         }
-
+        history_stamp['future'] = self.executor().submit(self.encodeHistoryStamp, history_stamp, data,
+                                                         self._state_future)
         return history_stamp
 
+    def encodeHistoryStamp(self, history_stamp: dict, data: dict, previous: Future) -> dict:
+        """
+        Background part of :py:meth:`createHistoryStamp`
+
+        :return: state of the scene at this stamp
+        :rtype: ``dict``
+        """
+        state = self.stateFromData(data)
+        if history_stamp['is_keyframe']:
+            history_stamp['keyframe'] = state
+            history_stamp['size'] = self.stateSize(state)
+        else:
+            # stored in order on a single worker, the previous stamp is done already
+            history_stamp['delta'] = self.diffStates(previous.result(), state)
+            history_stamp['size'] = self.stateSize(history_stamp['delta'])
+        self._signals.stamp_encoded.emit()
+        return state
+
+    def enforceLimits(self):
+        """Drop the oldest `History Stamps` while the stack is over ``history_limit`` or ``history_max_bytes``"""
+        while len(self.history_stack) > 1 and self.history_current_step > 0 and (
+                len(self.history_stack) > self.history_limit or self.history_bytes > self.history_max_bytes):
+            second = self.history_stack[1]
+            if not second['is_keyframe']:
+                # the new first stamp has nothing to be a diff against anymore
+                keyframe = self.stateAt(1)
+                second['keyframe'] = keyframe
+                second['delta'] = None
+                second['size'] = self.stateSize(keyframe)
+                second['is_keyframe'] = True
+            self.history_stack.pop(0)
+            self.history_current_step -= 1
+
+    @staticmethod
+    def stateData(state: dict) -> dict:
+        """Turn a state back into ``Scene.serialize()`` data"""
+        data = OrderedDict(state['scene'])
+        data['nodes'] = [json.loads(item) for item in state['nodes'].values()]
+        data['edges'] = [json.loads(item) for item in state['edges'].values()]
+        return data
+
     def restoreHistoryStamp(self, history_stamp: dict):
         """
         Restore History Stamp to current `Scene` with selection of items included
@@ -196,32 +418,42 @@ class SceneHistory():
         """
         if DEBUG: print("RHS: ", history_stamp['desc'])
 
+        self._restoring = True
         try:
             self.undo_selection_has_changed = False
             previous_selection = self.captureCurrentSelection()
             if DEBUG_SELECTION: print("selected nodes before restore:", previous_selection['nodes'])
 
-            self.scene.deserialize(history_stamp['snapshot'])
+            step = next(index for index, hs in enumerate(self.history_stack) if hs is history_stamp)
+            state = self.stateAt(step)
+            current_state = self.currentState()
+            if current_state is None:
+                self.scene.deserialize(self.stateData(state))
+            else:
+                delta = self.diffStates(current_state, state)
+                if DEBUG: print("RHS: restoring", len(delta['nodes']), "nodes", len(delta['edges']), "edges")
+                changed_nodes = [json.loads(item) for item in delta['nodes'].values() if item is not None]
+                changed_edges = [json.loads(item) for item in delta['edges'].values() if item is not None]
+                self.scene.applyChanges(
+                    changed_nodes, [item_id for item_id, item in delta['nodes'].items() if item is None],
+                    changed_edges, [item_id for item_id, item in delta['edges'].items() if item is None],
+                )
+            self._state_future = Future()
+            self._state_future.set_result(state)
 
             # restore selection
 
-            # first clear all selection on edges
-            for edge in self.scene.edges: edge.grEdge.setSelected(False)
+            # first clear the current selection
+            for item in self.scene.grScene.selectedItems(): item.setSelected(False)
             # now restore selected edges from history_stamp
             for edge_id in history_stamp['selection']['edges']:
-                for edge in self.scene.edges:
-                    if edge.id == edge_id:
-                        edge.grEdge.setSelected(True)
-                        break
+                edge = self.scene.getEdgeByID(edge_id)
+                if edge is not None: edge.grEdge.setSelected(True)
 
-            # first clear all selection on nodes
-            for node in self.scene.nodes: node.grNode.setSelected(False)
             # now restore selected nodes from history_stamp
             for node_id in history_stamp['selection']['nodes']:
-                for node in self.scene.nodes:
-                    if node.id == node_id:
-                        node.grNode.setSelected(True)
-                        break
+                node = self.scene.getNodeByID(node_id)
+                if node is not None: node.grNode.setSelected(True)
 
             current_selection = self.captureCurrentSelection()
             if DEBUG_SELECTION: print("selected nodes after restore:", current_selection['nodes'])
@@ -234,4 +466,6 @@ class SceneHistory():
                 if DEBUG_SELECTION: print("\nSCENE: Selection has changed")
                 self.undo_selection_has_changed = True
 
-        except Exception as e: dumpException(e)
\ No newline at end of file
+        except Exception as e: dumpException(e)
+        finally:
+            self._restoring = False
\ No newline at end of file
@@ -13,6 +13,27 @@ class Serializable():
         """
         self.id = id(self)
 
+    @property
+    def id(self):
+        """
+        Identifier of this object, used to link serialized data back to it
+
+        :getter: Returns the current id
+        :setter: Sets a new id and calls :py:meth:`onIdChanged`, so indexes keyed by id can follow
+        """
+        return self._id
+
+    @id.setter
+    def id(self, value):
+        old_id = getattr(self, "_id", None)
+        self._id = value
+        if old_id is not None and old_id != value:
+            self.onIdChanged(old_id)
+
+    def onIdChanged(self, old_id):
+        """Event called when the id of an already initialized object changes, e.g. when it is deserialized"""
+        pass
+
     def serialize(self) -> OrderedDict:
         """
         Serialization method to serialize this class data into ``OrderedDict`` which can be easily stored
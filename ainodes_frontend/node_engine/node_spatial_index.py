@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+A module containing the scene level spatial index.
+
+The ``QGraphicsScene`` runs without an item index (``NoIndex``), so asking it for the items in a rectangle walks every
+item in the scene. The cut line, dropping a node on an edge and socket snapping only care about edges and sockets close
+to the cursor, so they query this index instead.
+
+Items are kept in a uniform grid of ``cell_size`` squares. Moving an item only marks it dirty; the bounds of dirty
+items are read and placed into the grid the next time the index is queried, so dragging nodes around does no index
+work until an interaction actually needs it. The module has no Qt dependency.
+"""
+import math
+
+DEBUG = False
+
+#: size of one grid cell in scene pixels
+CELL_SIZE = 256
+#: items covering more cells than this are kept in a separate list which every query checks
+MAX_ITEM_CELLS = 256
+#: distance sockets stick out of their node's bounding rect
+SOCKET_MARGIN = 16
+
+
+class SpatialIndex:
+    """
+    Uniform grid over the bounding boxes of arbitrary items.
+
+    :param bounds: function returning the ``(left, top, right, bottom)`` scene bounds of an item or ``None`` while the
+        item cannot tell yet
+    :param cell_size: size of one grid cell
+    """
+
+    def __init__(self, bounds, cell_size: float = CELL_SIZE):
+        self.bounds = bounds
+        self.cell_size = cell_size
+        self.cells = {}
+        self.item_cells = {}
+        self.large = set()
+        self.dirty = set()
+
+    def __len__(self):
+        return len(self.item_cells) + len(self.large) + len(self.dirty)
+
+    def insert(self, item):
+        """Add ``item``, its bounds are read on the next query"""
+        self.dirty.add(item)
+
+    def markDirty(self, item):
+        """``item`` moved or changed its size"""
+        if item in self.item_cells or item in self.large:
+            self.dirty.add(item)
+
+    def remove(self, item):
+        self.dirty.discard(item)
+        self.large.discard(item)
+        for key in self.item_cells.pop(item, ()):
+            cell = self.cells[key]
+            cell.discard(item)
+            if not cell: del self.cells[key]
+
+    def cellRange(self, left: float, top: float, right: float, bottom: float):
+        size = self.cell_size
+        return (math.floor(left / size), math.floor(top / size),
+                math.floor(right / size), math.floor(bottom / size))
+
+    def place(self, item, bounds: tuple):
+        self.remove(item)
+        x0, y0, x1, y1 = self.cellRange(*bounds)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > MAX_ITEM_CELLS:
+            self.large.add(item)
+            return
+        keys = tuple((x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1))
+        for key in keys:
+            self.cells.setdefault(key, set()).add(item)
+        self.item_cells[item] = keys
+
+    def flush(self):
+        """Place every dirty item into the grid"""
+        if not self.dirty: return
+        pending = self.dirty
+        self.dirty = set()
+        for item in pending:
+            bounds = self.bounds(item)
+            if bounds is None:
+                self.dirty.add(item)
+                continue
+            self.place(item, bounds)
+        if DEBUG: print("SpatialIndex: placed", len(pending) - len(self.dirty), "items")
+
+    def query(self, left: float, top: float, right: float, bottom: float) -> set:
+        """
+        Items whose grid cells touch the rectangle, callers do the exact test on this candidate set
+
+        :return: candidate items
+        :rtype: ``set``
+        """
+        self.flush()
+        x0, y0, x1, y1 = self.cellRange(left, top, right, bottom)
+        found = set(self.large)
+        cells = self.cells
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(cells):
+            # the rectangle is larger than the occupied part of the grid
+            for (x, y), cell in cells.items():
+                if x0 <= x <= x1 and y0 <= y <= y1: found.update(cell)
+            return found
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                cell = cells.get((x, y))
+                if cell: found.update(cell)
+        return found
+
+    def clear(self):
+        self.cells.clear()
+        self.item_cells.clear()
+        self.large.clear()
+        self.dirty.clear()
+
+
+def _rect_bounds(rect) -> tuple:
+    return rect.left(), rect.top(), rect.right(), rect.bottom()
+
+
+def edge_bounds(edge: 'Edge'):
+    grEdge = getattr(edge, 'grEdge', None)
+    if grEdge is None: return None
+    return _rect_bounds(grEdge.sceneBoundingRect())
+
+
+def node_bounds(node: 'Node'):
+    grNode = getattr(node, 'grNode', None)
+    if grNode is None: return None
+    left, top, right, bottom = _rect_bounds(grNode.sceneBoundingRect())
+    return left - SOCKET_MARGIN, top - SOCKET_MARGIN, right + SOCKET_MARGIN, bottom + SOCKET_MARGIN
+
+
+class SceneSpatialIndex:
+    """
+    Spatial index of the `Edges` and `Sockets` of a :class:`~node_engine.node_scene.Scene`.
+
+    Sockets are found through their nodes, so sockets added to or removed from a node need no bookkeeping.
+
+    :Instance Attributes:
+
+        - **edges** - :class:`SpatialIndex` of the scene's `Edges`
+        - **nodes** - :class:`SpatialIndex` of the scene's `Nodes`, padded by :data:`SOCKET_MARGIN`
+    """
+
+    def __init__(self):
+        self.edges = SpatialIndex(edge_bounds)
+        self.nodes = SpatialIndex(node_bounds)
+
+    def addNode(self, node: 'Node'):
+        self.nodes.insert(node)
+
+    def removeNode(self, node: 'Node'):
+        self.nodes.remove(node)
+
+    def addEdge(self, edge: 'Edge'):
+        self.edges.insert(edge)
+
+    def removeEdge(self, edge: 'Edge'):
+        self.edges.remove(edge)
+
+    def nodeMoved(self, node: 'Node'):
+        self.nodes.markDirty(node)
+
+    def edgeMoved(self, edge: 'Edge'):
+        self.edges.markDirty(edge)
+
+    def edgesIn(self, rect: 'QRectF') -> list:
+        """
+        `Edges` whose shape intersects ``rect``
+
+        :param rect: area in scene coordinates
+        :type rect: ``QRectF``
+        :return: list of :class:`~node_engine.node_edge.Edge`
+        """
+        return [edge for edge in self.edges.query(*_rect_bounds(rect))
+                if edge.grEdge.shape().intersects(rect)]
+
+    def edgeCandidates(self, left: float, top: float, right: float, bottom: float) -> set:
+        """`Edges` whose bounding box may touch the rectangle"""
+        return self.edges.query(left, top, right, bottom)
+
+    def socketsIn(self, rect: 'QRectF') -> list:
+        """
+        Graphics sockets whose bounding rect intersects ``rect``
+
+        :param rect: area in scene coordinates
+        :type rect: ``QRectF``
+        :return: list of :class:`~node_engine.node_graphics_socket.QDMGraphicsSocket`
+        """
+        grSockets = []
+        for node in self.nodes.query(*_rect_bounds(rect)):
+            for socket in node.inputs + node.outputs:
+                grSocket = getattr(socket, 'grSocket', None)
+                if grSocket is not None and grSocket.isVisible() and grSocket.sceneBoundingRect().intersects(rect):
+                    grSockets.append(grSocket)
+        return grSockets
+
+    def clear(self):
+        self.edges.clear()
+        self.nodes.clear()
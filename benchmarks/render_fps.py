@@ -0,0 +1,86 @@
+"""
+Frame rate of the editor view at different zoom levels.
+
+Builds a synthetic scene of chained nodes, zooms the view so the whole grid is in sight at each scale and renders the
+viewport a number of times into an image, with the level of detail tiers enabled and disabled:
+
+    python benchmarks/render_fps.py --nodes 1000 --frames 20
+
+No display is needed; with ``--opengl`` the frames are rendered through an offscreen OpenGL surface instead.
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qtpy.QtGui import QImage, QPainter, QTransform
+from qtpy.QtWidgets import QApplication
+
+from ainodes_frontend import singleton as gs
+from ainodes_frontend.node_engine.node_edge import Edge
+from ainodes_frontend.node_engine.node_graphics_view import QDMGraphicsView
+from ainodes_frontend.node_engine.node_node import Node
+from ainodes_frontend.node_engine.node_scene import Scene
+
+COLUMNS = 40
+
+
+def build_scene(size: int) -> Scene:
+    scene = Scene()
+    previous = None
+    for index in range(size):
+        node = Node(scene, "Node %d" % index, inputs=[6], outputs=[6])
+        node.setPos((index % COLUMNS) * 250, (index // COLUMNS) * 300)
+        if previous is not None:
+            Edge(scene, previous.outputs[0], node.inputs[0])
+        previous = node
+    return scene
+
+
+def render_fps(view: QDMGraphicsView, scale: float, frames: int) -> float:
+    view.setTransform(QTransform().scale(scale, scale))
+    view.updateLevelOfDetail()
+    view.centerOn(view.grScene.itemsBoundingRect().center())
+    image = QImage(view.viewport().size(), QImage.Format_ARGB32_Premultiplied)
+    start = time.perf_counter()
+    for _ in range(frames):
+        painter = QPainter(image)
+        view.render(painter)
+        painter.end()
+    return frames / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Editor view frame rate versus zoom")
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0, 0.6, 0.4, 0.2, 0.1])
+    parser.add_argument("--opengl", action="store_true")
+    args = parser.parse_args()
+
+    gs.opengl = args.opengl
+    app = QApplication(sys.argv)
+    scene = build_scene(args.nodes)
+    view = QDMGraphicsView(scene.grScene)
+    view.resize(1600, 900)
+    view.show()
+    app.processEvents()
+
+    content_zoom, box_zoom = getattr(gs, "lod_content_zoom", 0.5), getattr(gs, "lod_box_zoom", 0.25)
+    print("%8s %8s %12s %12s %8s" % ("scale", "tier", "fps lod", "fps full", "speedup"))
+    for scale in args.scales:
+        gs.lod_content_zoom, gs.lod_box_zoom = content_zoom, box_zoom
+        with_lod = render_fps(view, scale, args.frames)
+        tier = scene.grScene.lod
+        gs.lod_content_zoom, gs.lod_box_zoom = 0, 0
+        without_lod = render_fps(view, scale, args.frames)
+        print("%8.2f %8d %12.1f %12.1f %7.1fx" % (scale, tier, with_lod, without_lod, with_lod / without_lod))
+
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Scene load time versus graph size.
+
+Builds chains of plain nodes, serializes them and measures:
+
+    load     - Scene.deserialize into an empty scene (opening a file)
+    restore  - Scene.deserialize into the scene holding the same graph (undo/redo)
+    lookup   - Scene.getNodeByID for every node
+    clear    - Scene.clear of the loaded graph (closing or replacing it)
+
+Run from the repository root, no display is needed:
+
+    python benchmarks/scene_load.py --sizes 500 1000 2000 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qtpy.QtWidgets import QApplication
+
+from ainodes_frontend.node_engine.node_edge import Edge
+from ainodes_frontend.node_engine.node_node import Node
+from ainodes_frontend.node_engine.node_scene import Scene
+
+
+def build_graph(size: int) -> dict:
+    scene = Scene()
+    previous = None
+    for index in range(size):
+        node = Node(scene, "Node %d" % index, inputs=[6], outputs=[6])
+        node.setPos((index % 50) * 250, (index // 50) * 150)
+        if previous is not None:
+            Edge(scene, previous.outputs[0], node.inputs[0])
+        previous = node
+    data = scene.serialize()
+    scene.clear()
+    return data
+
+
+def measure(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scene load time versus graph size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 500, 1000, 2000, 5000])
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    print("%8s %12s %12s %12s %12s %14s" % ("nodes", "load s", "restore s", "lookup ms", "clear s", "load us/node"))
+    for size in args.sizes:
+        data = build_graph(size)
+        scene = Scene()
+        load = measure(lambda: scene.deserialize(data))
+        restore = measure(lambda: scene.deserialize(data))
+        ids = [node_data['id'] for node_data in data['nodes']]
+        lookup = measure(lambda: [scene.getNodeByID(node_id) for node_id in ids])
+        assert len(scene.nodes) == size and len(scene.edges) == size - 1
+        clear = measure(scene.clear)
+        assert len(scene.nodes) == 0 and len(scene.edges) == 0
+        print("%8d %12.3f %12.3f %12.3f %12.3f %14.1f" % (size, load, restore, lookup * 1000, clear, load / size * 1e6))
+
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
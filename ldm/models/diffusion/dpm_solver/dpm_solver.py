@@ -3,6 +3,8 @@ import torch.nn.functional as F
 import math
 from tqdm import tqdm
 
+from ainodes_frontend.cancellation import check_cancelled
+
 
 class NoiseScheduleVP:
     def __init__(
@@ -929,6 +931,7 @@ class DPM_Solver:
         else:
             raise ValueError("For adaptive step size solver, order must be 2 or 3, got {}".format(order))
         while torch.abs((s - t_0)).mean() > t_err:
+            check_cancelled()
             t = ns.inverse_lambda(lambda_s + h)
             x_lower, lower_noise_kwargs = lower_update(x, s, t)
             x_higher = higher_update(x, s, t, **lower_noise_kwargs)
@@ -1060,6 +1063,7 @@ class DPM_Solver:
                 t_prev_list = [vec_t]
                 # Init the first `order` values by lower order multistep DPM-Solver.
                 for init_order in tqdm(range(1, order), desc="DPM init order"):
+                    check_cancelled()
                     vec_t = timesteps[init_order].expand(x.shape[0])
                     x = self.multistep_dpm_solver_update(x, model_prev_list, t_prev_list, vec_t, init_order,
                                                          solver_type=solver_type)
@@ -1067,6 +1071,7 @@ class DPM_Solver:
                     t_prev_list.append(vec_t)
                 # Compute the remaining values by `order`-th order multistep DPM-Solver.
                 for step in tqdm(range(order, steps + 1), desc="DPM multistep"):
+                    check_cancelled()
                     vec_t = timesteps[step].expand(x.shape[0])
                     if lower_order_final and steps < 15:
                         step_order = min(order, steps + 1 - step)
@@ -1092,6 +1097,7 @@ class DPM_Solver:
                 orders = [order, ] * K
                 timesteps_outer = self.get_time_steps(skip_type=skip_type, t_T=t_T, t_0=t_0, N=K, device=device)
             for i, order in enumerate(orders):
+                check_cancelled()
                 t_T_inner, t_0_inner = timesteps_outer[i], timesteps_outer[i + 1]
                 timesteps_inner = self.get_time_steps(skip_type=skip_type, t_T=t_T_inner.item(), t_0=t_0_inner.item(),
                                                       N=order, device=device)
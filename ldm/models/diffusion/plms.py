@@ -7,6 +7,7 @@ from functools import partial
 
 from ldm.modules.diffusionmodules.util import make_ddim_sampling_parameters, make_ddim_timesteps, noise_like
 from ldm.models.diffusion.sampling_util import norm_thresholding
+from ainodes_frontend.cancellation import check_cancelled
 
 
 class PLMSSampler(object):
@@ -145,6 +146,7 @@ class PLMSSampler(object):
         old_eps = []
 
         for i, step in enumerate(iterator):
+            check_cancelled()
             index = total_steps - i - 1
             ts = torch.full((b,), step, device=device, dtype=torch.long)
             ts_next = torch.full((b,), time_range[min(i + 1, len(time_range) - 1)], device=device, dtype=torch.long)
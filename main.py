@@ -30,8 +30,8 @@ from ainodes_frontend import singleton as gs
 from ainodes_frontend.base.settings import load_settings, init_globals
 from ainodes_frontend.node_engine.utils import loadStylesheets
 from ainodes_frontend.base.args import get_args
-from ainodes_frontend.base.import_utils import update_all_nodes_req, import_nodes_from_subdirectories, \
-    set_application_attributes
+from ainodes_frontend.base.import_utils import update_all_nodes_req, set_application_attributes
+from ainodes_frontend.base.node_manifest import register_node_packs
 
 # Set environment variable QT_API to use PySide6
 # Install Triton if running on Linux
@@ -78,6 +78,10 @@ init_globals()
 
 gs.args = get_args()
 
+if gs.args.trace:
+    from ainodes_frontend.base.tracing import enable_tracing
+    enable_tracing(gs.args.trace)
+
 # Set environment variables for Hugging Face cache if not using local cache
 if not gs.args.local_hf:
     print("Using HF Cache in app dir")
@@ -97,6 +101,16 @@ if gs.args.highdpi:
     #QtQuick.QQuickWindow.setGraphicsApi(QSGRendererInterface.OpenGLRhi)
 
 
+if gs.args.headless:
+    load_settings()
+    register_node_packs([os.path.join('custom_nodes', folder) for folder in os.listdir('custom_nodes')
+                         if "_nodes" in folder and os.path.isdir(os.path.join('custom_nodes', folder))],
+                        eager=gs.args.eager_nodes)
+    from ainodes_frontend.base.headless import run_graph_file
+    graph = run_graph_file(gs.args.headless)
+    print(f"Headless run took: {datetime.datetime.now() - start_time}")
+    sys.exit(1 if graph.failed or graph.cancelled else 0)
+
 set_application_attributes(QApplication, gs.args)
 
 
@@ -119,11 +133,11 @@ if gs.args.update:
     update_all_nodes_req()
 
 
-for folder in os.listdir(base_folder):
-    folder_path = os.path.join(base_folder, folder)
-    if "__pycache__" not in folder_path and "_nodes" in folder_path:
-        if os.path.isdir(folder_path):
-            import_nodes_from_subdirectories(folder_path)
+# nodes from unchanged files are listed from the manifest, their modules are imported when first used
+register_node_packs([os.path.join(base_folder, folder) for folder in os.listdir(base_folder)
+                     if "__pycache__" not in folder and "_nodes" in folder
+                     and os.path.isdir(os.path.join(base_folder, folder))],
+                    eager=gs.args.eager_nodes)
 
 
 
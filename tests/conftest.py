@@ -0,0 +1,19 @@
+"""
+The tests cover modules without a Qt dependency. ``ainodes_frontend.base`` imports every node window class from its
+``__init__``, so it is registered as a bare package here and its pure python modules are imported directly.
+"""
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+if 'ainodes_frontend.base' not in sys.modules:
+    import ainodes_frontend
+
+    base = types.ModuleType('ainodes_frontend.base')
+    base.__path__ = [os.path.join(ROOT, 'ainodes_frontend', 'base')]
+    sys.modules['ainodes_frontend.base'] = base
+    ainodes_frontend.base = base
@@ -0,0 +1,151 @@
+from ainodes_frontend.node_engine.node_adjacency import AdjacencyIndex
+
+
+class Node:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return "<Node %s>" % self.name
+
+
+class Socket:
+    def __init__(self, node: Node, index: int, is_output: bool):
+        self.node = node
+        self.index = index
+        self.is_output = is_output
+
+
+class Edge:
+    """Reassigns its sockets the way ``node_edge.Edge`` does: out of the index, change the end, back in"""
+
+    def __init__(self, index: AdjacencyIndex, start_socket: Socket = None, end_socket: Socket = None):
+        self.index = index
+        self._start_socket = None
+        self._end_socket = None
+        self.start_socket = start_socket
+        self.end_socket = end_socket
+
+    @property
+    def start_socket(self):
+        return self._start_socket
+
+    @start_socket.setter
+    def start_socket(self, value):
+        self.index.removeEdge(self)
+        self._start_socket = value
+        self.index.addEdge(self)
+
+    @property
+    def end_socket(self):
+        return self._end_socket
+
+    @end_socket.setter
+    def end_socket(self, value):
+        self.index.removeEdge(self)
+        self._end_socket = value
+        self.index.addEdge(self)
+
+
+def make_nodes(*names):
+    return [Node(name) for name in names]
+
+
+def test_complete_edges_are_indexed_in_both_directions():
+    index = AdjacencyIndex()
+    a, b = make_nodes("a", "b")
+    output_socket, input_socket = Socket(a, 1, True), Socket(b, 0, False)
+    edge = Edge(index, output_socket, input_socket)
+
+    assert index.firstInput(b, 0) is output_socket
+    assert index.inputs(b, 0) == [a]
+    assert index.outputs(a, 1) == [b]
+    assert index.children(a) == [b]
+    assert index.parents(b) == {a}
+    assert index.upstreamConnections(b) == {0: {edge: output_socket}}
+
+
+def test_edge_drawn_from_an_input_is_stored_by_direction():
+    index = AdjacencyIndex()
+    a, b = make_nodes("a", "b")
+    Edge(index, Socket(b, 0, False), Socket(a, 0, True))
+    assert index.children(a) == [b]
+    assert index.parents(b) == {a}
+    assert index.parents(a) == set()
+
+
+def test_dangling_edge_is_not_indexed_until_it_is_complete():
+    index = AdjacencyIndex()
+    a, b = make_nodes("a", "b")
+    edge = Edge(index, Socket(a, 0, True))
+    assert index.upstream == {} and index.downstream == {}
+    assert index.children(a) == []
+
+    edge.end_socket = Socket(b, 0, False)
+    assert index.children(a) == [b]
+
+
+def test_reassigning_the_end_socket_moves_the_connection():
+    index = AdjacencyIndex()
+    a, b, c = make_nodes("a", "b", "c")
+    edge = Edge(index, Socket(a, 0, True), Socket(b, 0, False))
+    assert index.children(a) == [b]
+    assert index.inputs(b, 0) == [a]
+
+    edge.end_socket = Socket(c, 2, False)
+    # cached lists of both the old and the new end are refreshed
+    assert index.children(a) == [c]
+    assert index.inputs(b, 0) == []
+    assert index.parents(b) == set()
+    assert index.inputs(c, 2) == [a]
+    assert b not in index.upstream
+
+
+def test_reassigning_the_start_socket_moves_the_connection():
+    index = AdjacencyIndex()
+    a, b, c = make_nodes("a", "b", "c")
+    edge = Edge(index, Socket(a, 0, True), Socket(c, 0, False))
+    assert index.outputs(a, 0) == [c]
+
+    edge.start_socket = Socket(b, 1, True)
+    assert index.outputs(a, 0) == []
+    assert index.children(a) == []
+    assert index.outputs(b, 1) == [c]
+    assert index.parents(c) == {b}
+    assert a not in index.downstream
+
+
+def test_removing_one_of_several_edges_keeps_the_others():
+    index = AdjacencyIndex()
+    a, b, c = make_nodes("a", "b", "c")
+    output_socket = Socket(a, 0, True)
+    to_b = Edge(index, output_socket, Socket(b, 0, False))
+    to_c = Edge(index, output_socket, Socket(c, 0, False))
+    assert index.outputs(a, 0) == [b, c]
+
+    index.removeEdge(to_b)
+    assert index.outputs(a, 0) == [c]
+    assert index.children(a) == [c]
+    assert b not in index.upstream
+
+    index.removeEdge(to_c)
+    index.removeEdge(to_c)
+    assert index.upstream == {} and index.downstream == {}
+
+
+def test_children_follow_output_index_order():
+    index = AdjacencyIndex()
+    a, b, c = make_nodes("a", "b", "c")
+    Edge(index, Socket(a, 2, True), Socket(b, 0, False))
+    Edge(index, Socket(a, 0, True), Socket(c, 0, False))
+    assert index.children(a) == [c, b]
+
+
+def test_clear_drops_connections_and_caches():
+    index = AdjacencyIndex()
+    a, b = make_nodes("a", "b")
+    Edge(index, Socket(a, 0, True), Socket(b, 0, False))
+    assert index.children(a) == [b]
+    index.clear()
+    assert index.children(a) == []
+    assert index.inputs(b, 0) == []
@@ -0,0 +1,133 @@
+import io
+from collections import OrderedDict
+
+import pytest
+
+from ainodes_frontend.node_engine.node_graph_binary import REC_CONTENT, REC_EDGE_JSON, REC_END, REC_NODE, \
+    InvalidBinaryGraph, graph_records, is_binary_graph, load_graph, read_graph_records, save_graph, write_graph, \
+    write_record, _encode_json, _HEADER, MAGIC, VERSION
+
+
+def socket_data(socket_id, index, position, socket_type):
+    return OrderedDict([('id', socket_id), ('index', index), ('multi_edges', True), ('position', position),
+                        ('socket_type', socket_type)])
+
+
+def node_data(node_id, title, inputs, outputs, content):
+    return OrderedDict([
+        ('id', node_id),
+        ('title', title),
+        ('pos_x', -120.5),
+        ('pos_y', 64.0),
+        ('inputs', inputs),
+        ('outputs', outputs),
+        ('content', content),
+    ])
+
+
+def edge_data(edge_id, edge_type, start, end):
+    return OrderedDict([('id', edge_id), ('edge_type', edge_type), ('start', start), ('end', end)])
+
+
+@pytest.fixture
+def scene_data():
+    """Shaped like ``Scene.serialize()`` output"""
+    return OrderedDict([
+        ('id', 140230117760016),
+        ('scene_width', 64000),
+        ('scene_height', 64000),
+        ('nodes', [
+            node_data(140230117761024, "Torch Loader", [socket_data(11, 0, 2, 6)],
+                      [socket_data(12, 0, 5, 4), socket_data(13, 1, 5, 6)],
+                      {'content_label_objname': "torch_loader_node", 'Model:': "model.safetensors", 'Steps': 25}),
+            node_data(140230117762048, "Sampler", [socket_data(21, 0, 2, 4), socket_data(22, 1, 2, 6)],
+                      [socket_data(23, 0, 5, 5)], {'Prompt': "a ünïcode prompt", 'Seed': "", 'Enabled': True}),
+        ]),
+        ('edges', [
+            edge_data(31, 2, 12, 21),
+            edge_data(32, 2, 13, 22),
+        ]),
+    ])
+
+
+def roundtrip(data: dict) -> dict:
+    file = io.BytesIO()
+    write_graph(file, data)
+    file.seek(0)
+    loaded = {'nodes': [], 'edges': []}
+    for kind, item in read_graph_records(file):
+        if kind == 'scene': loaded.update(item)
+        else: loaded[kind + 's'].append(item)
+    return loaded
+
+
+def test_roundtrip_matches_serialized_scene(scene_data):
+    assert roundtrip(scene_data) == scene_data
+
+
+def test_save_and_load_file(scene_data, tmp_path):
+    filename = str(tmp_path / "graph.aigraph")
+    save_graph(filename, scene_data)
+    assert is_binary_graph(filename)
+    assert load_graph(filename) == scene_data
+
+
+def test_json_graph_is_not_binary(tmp_path):
+    filename = tmp_path / "graph.json"
+    filename.write_text('{"nodes": [], "edges": []}')
+    assert not is_binary_graph(str(filename))
+
+
+@pytest.mark.parametrize("edge", [
+    edge_data(31, 2, 12, None),
+    edge_data("31", 2, 12, 21),
+    edge_data(31, 2, 2 ** 63, 21),
+    edge_data(31, 300, 12, 21),
+    edge_data(31, 2, True, 21),
+])
+def test_edges_which_do_not_fit_the_struct_use_json_records(scene_data, edge):
+    scene_data['edges'] = [edge]
+    file = io.BytesIO()
+    write_graph(file, scene_data)
+    assert _encode_json(edge) in file.getvalue()
+    file.seek(0)
+    assert [item for kind, item in read_graph_records(file) if kind == 'edge'] == [edge]
+
+
+def test_records_match_parsed_data_order(scene_data):
+    file = io.BytesIO()
+    write_graph(file, scene_data)
+    file.seek(0)
+    assert list(read_graph_records(file)) == list(graph_records(scene_data))
+
+
+def test_node_without_content_record_and_unknown_records():
+    file = io.BytesIO()
+    file.write(_HEADER.pack(MAGIC, VERSION, 0))
+    write_record(file, REC_NODE, _encode_json({'id': 1, 'title': "A"}))
+    write_record(file, 99, b"optional data of a newer writer")
+    write_record(file, REC_NODE, _encode_json({'id': 2, 'title': "B"}))
+    write_record(file, REC_CONTENT, _encode_json({'Steps': 4}))
+    write_record(file, REC_EDGE_JSON, _encode_json({'id': "e", 'start': 1, 'end': 2}))
+    write_record(file, REC_END, b"")
+    file.seek(0)
+    assert list(read_graph_records(file)) == [
+        ('node', {'id': 1, 'title': "A", 'content': {}}),
+        ('node', {'id': 2, 'title': "B", 'content': {'Steps': 4}}),
+        ('edge', {'id': "e", 'start': 1, 'end': 2}),
+    ]
+
+
+def test_truncated_and_foreign_files_raise(scene_data):
+    file = io.BytesIO()
+    write_graph(file, scene_data)
+    with pytest.raises(InvalidBinaryGraph):
+        list(read_graph_records(io.BytesIO(file.getvalue()[:-7])))
+    with pytest.raises(InvalidBinaryGraph):
+        list(read_graph_records(io.BytesIO(b'{"nodes": [], "edges": []}')))
+
+
+def test_newer_version_is_rejected():
+    file = io.BytesIO(_HEADER.pack(MAGIC, VERSION + 1, 0))
+    with pytest.raises(InvalidBinaryGraph):
+        list(read_graph_records(file))
@@ -0,0 +1,128 @@
+import copy
+import types
+from collections import OrderedDict
+
+import pytest
+
+pytest.importorskip("qtpy.QtCore", reason="SceneHistory coalesces changes with a QTimer")
+
+from ainodes_frontend.node_engine.node_scene_history import SceneHistory
+
+
+def node_data(node_id: int, **content) -> OrderedDict:
+    return OrderedDict([('id', node_id), ('title', "Node %d" % node_id), ('pos_x', 0.0), ('pos_y', 0.0),
+                        ('inputs', []), ('outputs', []), ('content', content)])
+
+
+def edge_data(edge_id: int, start: int, end: int) -> OrderedDict:
+    return OrderedDict([('id', edge_id), ('edge_type', 2), ('start', start), ('end', end)])
+
+
+class Scene:
+    """Serializes whatever ``data`` currently is, like ``Scene.serialize()`` does for the real scene"""
+
+    def __init__(self):
+        self.data = OrderedDict([('id', 1), ('scene_width', 64000), ('scene_height', 64000),
+                                 ('nodes', []), ('edges', [])])
+        self.grScene = types.SimpleNamespace(selectedItems=lambda: [])
+        self.has_been_modified = False
+
+    def serialize(self) -> OrderedDict:
+        return copy.deepcopy(self.data)
+
+    def isLoading(self) -> bool:
+        return False
+
+
+def edits():
+    """Successive changes of a scene: adding, changing and removing nodes and edges, and scene attributes"""
+    yield lambda data: data['nodes'].append(node_data(1, Steps=20))
+    yield lambda data: data['nodes'].append(node_data(2, Prompt="a cat"))
+    yield lambda data: data['edges'].append(edge_data(10, 1, 2))
+    yield lambda data: data['nodes'][0]['content'].update(Steps=25)
+    yield lambda data: data.update(scene_width=32000)
+    yield lambda data: data['nodes'].append(node_data(3, Seed=""))
+    yield lambda data: data['edges'].clear()
+    yield lambda data: data['nodes'].pop(0)
+    yield lambda data: data['nodes'][0]['content'].update(Prompt="a dog")
+
+
+@pytest.fixture
+def scene():
+    return Scene()
+
+
+@pytest.fixture
+def history(scene):
+    history = SceneHistory(scene)
+    history.keyframe_interval = 3
+    yield history
+    if history._executor is not None: history._executor.shutdown(wait=True)
+
+
+def record(history: SceneHistory, scene: Scene) -> list:
+    """Store a stamp after every edit, returns the state expected at every step"""
+    history.storeInitialHistoryStamp()
+    expected = [SceneHistory.stateFromData(scene.serialize())]
+    for edit in edits():
+        edit(scene.data)
+        history.storeHistory("edit")
+        expected.append(SceneHistory.stateFromData(scene.serialize()))
+    return expected
+
+
+def test_delta_applied_to_the_old_state_gives_the_new_state(scene):
+    states = [SceneHistory.stateFromData(scene.serialize())]
+    for edit in edits():
+        edit(scene.data)
+        states.append(SceneHistory.stateFromData(scene.serialize()))
+    for old_state, new_state in zip(states, states[1:]):
+        delta = SceneHistory.diffStates(old_state, new_state)
+        state = copy.deepcopy(old_state)
+        SceneHistory.applyDelta(state, delta)
+        assert state == new_state
+
+
+def test_delta_holds_only_changed_items(scene):
+    scene.data['nodes'] = [node_data(1, Steps=20), node_data(2, Prompt="a cat")]
+    old_state = SceneHistory.stateFromData(scene.serialize())
+    scene.data['nodes'][1]['content']['Prompt'] = "a dog"
+    scene.data['nodes'].pop(0)
+    delta = SceneHistory.diffStates(old_state, SceneHistory.stateFromData(scene.serialize()))
+    assert delta['scene'] is None
+    assert list(delta['nodes']) == [2, 1]
+    assert delta['nodes'][1] is None
+    assert delta['edges'] == {}
+
+
+def test_every_step_is_rebuilt_across_keyframes(history, scene):
+    expected = record(history, scene)
+    assert [hs['is_keyframe'] for hs in history.history_stack] == [True, False, False] * 3 + [True]
+    for step, state in enumerate(expected):
+        assert history.stateAt(step) == state
+
+
+def test_dropping_old_steps_turns_the_new_first_step_into_a_keyframe(history, scene):
+    history.history_limit = 5
+    expected = record(history, scene)[-5:]
+    assert len(history.history_stack) == 5
+    assert history.history_stack[0]['is_keyframe']
+    assert history.history_stack[0]['delta'] is None
+    for step, state in enumerate(expected):
+        assert history.stateAt(step) == state
+
+
+def test_byte_limit_counts_encoded_stamps(history, scene):
+    expected = record(history, scene)
+    for hs in history.history_stack: history.waitForStamp(hs)
+    assert history.history_bytes == sum(hs['size'] for hs in history.history_stack) > 0
+
+    history.history_max_bytes = history.history_stack[-1]['size'] + history.history_stack[-2]['size']
+    history.enforceLimits()
+    remaining = len(history.history_stack)
+    assert remaining < len(expected)
+    # the current step is never dropped, even when it alone is over the limit
+    assert history.history_bytes <= history.history_max_bytes or remaining == 1
+    assert history.history_stack[0]['is_keyframe']
+    for step, state in enumerate(expected[-remaining:]):
+        assert history.stateAt(step) == state
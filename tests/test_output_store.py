@@ -0,0 +1,115 @@
+import gc
+import os
+
+import pytest
+
+from ainodes_frontend.base.output_cache import OutputCache, OutputRef, cached_result, MB
+from ainodes_frontend.base.output_store import NodeOutputs, OutputStore
+
+
+def wait_for_spills(store: OutputStore):
+    store.executor.submit(lambda: None).result()
+
+
+def spill_files(store: OutputStore) -> list:
+    if not os.path.isdir(store.directory):
+        return []
+    return sorted(os.listdir(store.directory))
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = OutputStore(ram_budget=1 * MB, directory=str(tmp_path / "values"))
+    yield store
+    store.executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def cache(store, tmp_path):
+    return OutputCache(ram_budget=100 * MB, directory=str(tmp_path / "outputs"), store=store)
+
+
+def test_value_shared_by_node_and_cache_is_counted_once(store, cache):
+    node = NodeOutputs(store)
+    latent = bytearray(600 * 1024)
+    node['latent'] = latent
+    cache.put('key', {'outputs': {0: latent}, 'result': [OutputRef(0)]})
+
+    assert len(store.values) == 1
+    assert store.ram_bytes < 1 * MB
+
+
+def test_spill_reload_and_release_of_a_shared_value(store, cache):
+    node = NodeOutputs(store)
+    latent = bytearray(600 * 1024)
+    node['latent'] = latent
+    cache.put('key', {'outputs': {0: latent}, 'result': [OutputRef(0), "info"]})
+    cache_outputs = cache.ram['key'][0]['outputs']
+    del latent
+
+    # going over the budget spills the coldest value, for both holders with a single file
+    node['image'] = bytearray(600 * 1024)
+    wait_for_spills(store)
+    assert store.spills == 1
+    assert 'latent' in node.spilled and 0 in cache_outputs.spilled
+    path = node.spilled['latent'][0]
+    assert cache_outputs.spilled[0][0] == path
+    assert store.files == {path: 2}
+    assert spill_files(store) == [os.path.basename(path)]
+    assert store.ram_bytes - store.spilling_bytes <= 1 * MB
+
+    # reloading for the node releases only the node's reference to the file
+    assert len(node['latent']) == 600 * 1024
+    assert store.reloads == 1
+    assert store.files[path] == 1
+    assert os.path.exists(path)
+
+    # the cache reads its own copy back, then the file is gone
+    result = cached_result(cache.get('key'))
+    assert len(result[0]) == 600 * 1024 and result[1] == "info"
+    assert store.reloads == 2
+    assert path not in store.files
+    assert not os.path.exists(path)
+
+
+def test_released_holders_remove_the_spilled_file(store, cache):
+    node = NodeOutputs(store)
+    latent = bytearray(600 * 1024)
+    node['latent'] = latent
+    cache.put('key', {'outputs': {0: latent}, 'result': [OutputRef(0)]})
+    del latent
+    node['image'] = bytearray(600 * 1024)
+    wait_for_spills(store)
+    path = node.spilled['latent'][0]
+
+    node['latent'] = None
+    assert store.files == {path: 1}
+    cache.clear()
+    gc.collect()
+    assert store.files == {}
+    assert not os.path.exists(path)
+
+
+def test_value_released_while_being_written_leaves_no_file(store):
+    node = NodeOutputs(store)
+    node['latent'] = bytearray(600 * 1024)
+    node['image'] = bytearray(600 * 1024)
+    del node['latent']
+    wait_for_spills(store)
+    assert store.files == {}
+    assert spill_files(store) == []
+    assert store.ram_bytes == store.values[id(node['image'])].size
+    assert store.spilling_bytes == 0
+
+
+def test_collected_node_releases_its_values(store):
+    node = NodeOutputs(store)
+    node['latent'] = bytearray(600 * 1024)
+    node['image'] = bytearray(600 * 1024)
+    wait_for_spills(store)
+    assert len(store.files) == 1
+    del node
+    gc.collect()
+    assert store.files == {}
+    assert store.ram_bytes == 0
+    assert spill_files(store) == []
@@ -0,0 +1,111 @@
+import threading
+
+import pytest
+
+pytest.importorskip("qtpy.QtGui", reason="run_queue reports errors through the Qt based settings module")
+
+from ainodes_frontend import singleton as gs
+from ainodes_frontend.base.run_queue import JOB_CANCELLED, JOB_DONE, JOB_FAILED, RunQueue, apply_overrides
+
+
+GRAPH = {'id': 1, 'nodes': [], 'edges': []}
+
+
+class Runner:
+    """Records the jobs it runs, in order"""
+
+    def __init__(self, expected: int):
+        self.names = []
+        self.expected = expected
+        self.done = threading.Event()
+
+    def __call__(self, job):
+        self.names.append(job.name)
+        if job.name == "broken":
+            raise ValueError("broken graph")
+
+    def finished(self, job):
+        if len(self.names) >= self.expected:
+            self.done.set()
+
+
+def submit_all(queue: RunQueue):
+    queue.submit(GRAPH, name="low", priority=-1)
+    queue.submit(GRAPH, name="first", priority=0)
+    queue.submit(GRAPH, name="urgent", priority=5)
+    queue.submit(GRAPH, name="second", priority=0)
+
+
+def test_pending_jobs_are_ordered_by_priority_then_submission(tmp_path):
+    queue = RunQueue(persist_path=str(tmp_path / "jobs.json"), runner=Runner(0))
+    queue.pause()
+    submit_all(queue)
+    assert [job.name for job in queue.pending()] == ["urgent", "first", "second", "low"]
+
+    job = queue.pending()[-1]
+    assert queue.setPriority(job.id, 10)
+    assert [job.name for job in queue.pending()] == ["low", "urgent", "first", "second"]
+
+
+def test_jobs_run_in_priority_order(tmp_path):
+    runner = Runner(4)
+    queue = RunQueue(persist_path=str(tmp_path / "jobs.json"), runner=runner)
+    queue.addJobFinishedListener(runner.finished)
+    queue.pause()
+    submit_all(queue)
+    queue.resume()
+    assert runner.done.wait(10)
+    assert runner.names == ["urgent", "first", "second", "low"]
+    assert [job.status for job in queue.history] == [JOB_DONE] * 4
+
+
+def test_restored_queue_keeps_its_order_and_starts_paused(tmp_path):
+    path = str(tmp_path / "jobs.json")
+    queue = RunQueue(persist_path=path, runner=Runner(0))
+    queue.pause()
+    submit_all(queue)
+    cancelled = queue.pending()[1]
+    assert queue.cancel(cancelled.id)
+    assert cancelled.status == JOB_CANCELLED
+
+    runner = Runner(3)
+    restored = RunQueue(persist_path=path, runner=runner)
+    restored.addJobFinishedListener(runner.finished)
+    assert restored.paused
+    assert [job.name for job in restored.pending()] == ["urgent", "second", "low"]
+    assert [job.id for job in restored.pending()] == [job.id for job in queue.pending()]
+    assert runner.names == []
+
+    # new submissions are ordered after the restored ones of the same priority
+    job = restored.submit(GRAPH, name="new", priority=0)
+    assert [job.name for job in restored.pending()] == ["urgent", "second", "new", "low"]
+    restored.cancel(job.id)
+
+    restored.resume()
+    assert runner.done.wait(10)
+    assert runner.names == ["urgent", "second", "low"]
+    assert RunQueue(persist_path=path).jobs == []
+
+
+def test_failing_job_does_not_stop_the_queue(monkeypatch, tmp_path):
+    # set up by load_settings in the app, the error log is written to the working directory
+    monkeypatch.setattr(gs, "error_stack", [], raising=False)
+    monkeypatch.chdir(tmp_path)
+    runner = Runner(2)
+    queue = RunQueue(persist_path=None, runner=runner)
+    queue.addJobFinishedListener(runner.finished)
+    queue.pause()
+    queue.submit(GRAPH, name="broken", priority=1)
+    queue.submit(GRAPH, name="fine")
+    queue.resume()
+    assert runner.done.wait(10)
+    assert [(job.name, job.status) for job in queue.history] == [("broken", JOB_FAILED), ("fine", JOB_DONE)]
+    assert queue.history[0].error == "broken graph"
+
+
+def test_overrides_replace_content_values_by_id_or_title():
+    graph = {'nodes': [{'id': 7, 'title': "Sampler", 'content': {'Steps': 20, 'Seed': ""}},
+                       {'id': 8, 'title': "Prompt", 'content': {'Prompt': "a cat"}}], 'edges': []}
+    data = apply_overrides(graph, {7: {'Steps': 4}, "Prompt": {'Prompt': "a dog"}})
+    assert [node['content'] for node in data['nodes']] == [{'Steps': 4, 'Seed': ""}, {'Prompt': "a dog"}]
+    assert graph['nodes'][0]['content']['Steps'] == 20